@@ -1,4 +1,4 @@
-from .database import get_database_url, get_db, create_tables
+from .database import get_database_url, get_db, create_tables, run_migrations
 from .routers import general, hotels, rooms, users, bookings, tasks
 
-__all__ = ["get_database_url", "get_db", "create_tables", "general", "hotels", "rooms", "users", "bookings", "tasks"]
\ No newline at end of file
+__all__ = ["get_database_url", "get_db", "create_tables", "run_migrations", "general", "hotels", "rooms", "users", "bookings", "tasks"]
\ No newline at end of file
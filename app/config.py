@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./hotel_booking.db"
@@ -18,6 +18,94 @@ class Settings(BaseSettings):
 
     DEBUG: bool = False
     
+    # Пул соединений каждого движка PostgreSQL (основного, асинхронного, реплики).
+    # Всего соединений к базе: воркеры * движки * (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+    # Ожидание соединения дольше DB_POOL_WAIT_WARN_MS, занявшее не меньше
+    # DB_POOL_WAIT_DOMINANT_RATIO времени запроса, пишется в лог и метрики
+    DB_POOL_WAIT_WARN_MS: float = 100.0
+    DB_POOL_WAIT_DOMINANT_RATIO: float = 0.5
+    # Автоподстройка: исчерпанный пул расширяет max_overflow на шаг до предела
+    DB_POOL_AUTOTUNE: bool = False
+    DB_POOL_AUTOTUNE_STEP: int = 5
+    DB_POOL_AUTOTUNE_MAX_OVERFLOW: int = 50
+    
+    # Порог нечеткого совпадения city/country/room_type в поиске комнат (как
+    # pg_trgm.similarity_threshold; на PostgreSQL действует сама настройка pg_trgm)
+    SEARCH_SIMILARITY_THRESHOLD: float = 0.3
+    
+    # Поиск свободных комнат по таблице room_nights (анти-join по ночам) вместо
+    # пересечения интервалов бронирований; таблица ведется всегда
+    ROOM_NIGHTS_ENABLED: bool = True
+    
+    # Реплика для чтения: GET-запросы идут на нее, пока она не отстала больше
+    # REPLICA_MAX_LAG_SECONDS; клиент, который только что писал, читает с
+    # основной базы READ_YOUR_WRITES_SECONDS. Без URL все идет в основную базу.
+    READ_REPLICA_URL: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 2.0
+    READ_YOUR_WRITES_SECONDS: float = 10.0
+    
+    # Счетчик SQL на HTTP-запрос: заголовки X-DB-* в DEBUG, метрики в /tasks/db/stats
+    QUERY_STATS_ENABLED: bool = True
+    # Сколько повторов одной формы запроса за HTTP-запрос считать N+1
+    QUERY_STATS_N_PLUS_ONE_THRESHOLD: int = 5
+    
+    # False, если миграции применяются отдельным шагом деплоя (alembic upgrade head)
+    RUN_MIGRATIONS_ON_STARTUP: bool = True
+    
+    # Индекс занятости живет в памяти процесса и не видит записи других
+    # воркеров и Celery-задач; включать только при одном воркере API
+    BOOKING_INDEX_ENABLED: bool = False
+    # Матрица занятости "комнаты × ночи" в NumPy для поиска по многим отелям
+    # сразу; те же ограничения, что у индекса, плюс нужен пакет numpy.
+    # Горизонт - OCCUPANCY_MATRIX_DAYS ночей от сегодня, дальше поиск идет в БД
+    OCCUPANCY_MATRIX_ENABLED: bool = False
+    OCCUPANCY_MATRIX_DAYS: int = 365
+    
+    # Завершенные и отмененные бронирования с выездом раньше, чем
+    # BOOKING_RETENTION_DAYS дней назад, задача cleanup_old_data переносит
+    # в bookings_archive пачками по BOOKING_ARCHIVE_BATCH_SIZE строк
+    BOOKING_RETENTION_DAYS: int = 365
+    BOOKING_ARCHIVE_BATCH_SIZE: int = 1000
+    
+    # Пачка бронирований на одну транзакцию при удалении комнаты или отеля
+    REMOVAL_BATCH_SIZE: int = 1000
+    
+    # Массовый импорт: строк в пачке (одна транзакция и одна инвалидация кэша)
+    # и сколько ошибок строк возвращать в ответе
+    IMPORT_CHUNK_SIZE: int = 5000
+    IMPORT_MAX_ERRORS: int = 100
+    
+    # Сколько бронирование ждет блокировку комнаты, прежде чем вернуть 409
+    BOOKING_LOCK_TIMEOUT_MS: int = 5000
+    # Максимум комнат в одном групповом бронировании (POST /bookings/batch)
+    BOOKING_BATCH_MAX_ROOMS: int = 100
+    
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_MAX_ENTRIES: int = 1024
+    LOCAL_CACHE_TTL: float = 30.0
+    
+    # Single-flight промахов кэша: аренда блокировки вычисления и период опроса ожидающих
+    SINGLE_FLIGHT_LOCK_TTL: float = 5.0
+    SINGLE_FLIGHT_POLL_INTERVAL: float = 0.05
+    
+    # Мягкий и жесткий TTL (секунды) по семействам ключей кэша. После мягкого
+    # запись отдается сразу и пересчитывается в фоне, после жесткого - удаляется.
+    # Переопределяется JSON'ом: CACHE_TTLS='{"rooms_search": [120, 900], ...}'
+    CACHE_TTLS: Dict[str, List[int]] = {
+        "hotels": [300, 3600],
+        "rooms": [60, 300],
+        "rooms_search": [300, 1800],
+        "user_bookings": [60, 300],
+    }
+    # beta XFetch: больше 1 - пересчет раньше, 0 - только по мягкому TTL
+    CACHE_XFETCH_BETA: float = 1.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = False 
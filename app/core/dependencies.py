@@ -1,19 +1,20 @@
 from fastapi import Depends, HTTPException, status, Query, Path
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.hotels import User
 from app.core.enums import UserRole
 from app.core.security import verify_token
+from app.services.repository import Repository
 
 security = HTTPBearer()
 
 async def get_current_user_path(
     user_id: int = Path(..., description="ID пользователя"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Получить текущего пользователя по ID из path параметра"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await Repository(db).get_user(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -23,7 +24,7 @@ async def get_current_user_path(
 
 async def get_current_user_jwt(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """Получить текущего пользователя из JWT токена"""
     token = credentials.credentials
@@ -44,7 +45,7 @@ async def get_current_user_jwt(
             detail="Неверный токен",
         )
     
-    user = db.query(User).filter(User.email == email, User.id == user_id).first()
+    user = await Repository(db).get_user_by_token(email, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
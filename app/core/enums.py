@@ -14,6 +14,13 @@ class BookingStatus(str, enum.Enum):
     CHECKED_IN = "checked_in"
     CHECKED_OUT = "checked_out"
 
+# Статусы, при которых бронирование занимает комнату
+ACTIVE_BOOKING_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN)
+# Статусы состоявшихся проживаний
+COMPLETED_BOOKING_STATUSES = (BookingStatus.COMPLETED, BookingStatus.CHECKED_OUT)
+# Статусы завершенных бронирований, которые уходят в архив
+ARCHIVABLE_BOOKING_STATUSES = (BookingStatus.CANCELLED, BookingStatus.COMPLETED, BookingStatus.CHECKED_OUT)
+
 class UserRole(str, enum.Enum):
     ADMIN = "admin"
     USER = "user"
\ No newline at end of file
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import Select, tuple_
+
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class SortOrder(str, Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    """Курсор - base64 от [поле, порядок, значение поля, id] последней строки страницы"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, order, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> Tuple[str, str, Any, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        sort, order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        SortOrder(order)
+        if not isinstance(row_id, int):
+            raise ValueError(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    return sort, order, value, row_id
+
+class PageParams:
+    """
+    Параметры keyset-пагинации: страница начинается строго после
+    (значение поля сортировки, id) последней строки предыдущей страницы,
+    поэтому глубина страницы не влияет на стоимость запроса.
+    """
+
+    def __init__(self, model, sort: str, order: SortOrder, limit: int, cursor: Optional[str] = None, skip: int = 0):
+        self.model = model
+        self.sort = sort
+        self.order = SortOrder(order)
+        self.limit = limit
+        self.cursor = cursor
+        self.skip = skip
+        self.after: Optional[Tuple[Any, int]] = None
+
+        if cursor:
+            # Курсор сам задает сортировку - клиенту достаточно передать его
+            self.sort, order, value, row_id = decode_cursor(cursor)
+            self.order = SortOrder(order)
+            self.after = (value, row_id)
+            self.skip = 0
+
+    @property
+    def column(self):
+        return getattr(self.model, self.sort)
+
+    @property
+    def cache_key(self) -> str:
+        """Часть ключа кэша: одна запись на страницу, общая для всех клиентов"""
+        key = f"sort:{self.sort}:order:{self.order.value}:limit:{self.limit}:cursor:{self.cursor}"
+        if self.skip:
+            key += f":skip:{self.skip}"
+        return key
+
+    def apply(self, query: Select) -> Select:
+        """Добавить к запросу условие курсора, сортировку и LIMIT (на одну строку больше)"""
+        model, column = self.model, self.column
+        descending = self.order == SortOrder.DESC
+
+        if self.after is not None:
+            value, row_id = self.after
+            if self.sort == "id":
+                query = query.where(model.id < row_id if descending else model.id > row_id)
+            else:
+                key = tuple_(column, model.id)
+                query = query.where(key < (value, row_id) if descending else key > (value, row_id))
+
+        if self.sort == "id":
+            order_by = [model.id.desc() if descending else model.id]
+        else:
+            order_by = [column.desc(), model.id.desc()] if descending else [column, model.id]
+
+        query = query.order_by(*order_by)
+        if self.skip:
+            # Устаревший OFFSET оставлен для старых клиентов
+            query = query.offset(self.skip)
+        # Лишняя строка показывает, есть ли следующая страница
+        return query.limit(self.limit + 1)
+
+    def split(self, rows: Sequence[Any]) -> Tuple[List[Any], Optional[str]]:
+        """Отрезать лишнюю строку и вернуть (строки страницы, курсор следующей страницы)"""
+        rows = list(rows)
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        return rows, encode_cursor(self.sort, self.order.value, getattr(last, self.sort), last.id)
+
+    def validate(self, allowed: Sequence[str]):
+        """Проверить поле сортировки и привести значение из курсора к типу колонки"""
+        if self.sort not in allowed:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Недопустимое поле сортировки: {self.sort}. Допустимые: {', '.join(allowed)}"
+            )
+        if self.after is None or self.sort == "id":
+            return
+        value, row_id = self.after
+        try:
+            python_type = self.column.type.python_type
+            value = datetime.fromisoformat(value) if python_type is datetime else python_type(value)
+        except (NotImplementedError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        self.after = (value, row_id)
+
+def page_params(model, *sort_fields: str):
+    """
+    Зависимость FastAPI с параметрами страницы выборки model. sort_fields -
+    допустимые поля сортировки кроме id; под каждое нужен индекс (поле, id).
+    """
+    allowed = ("id",) + sort_fields
+
+    def dependency(
+        cursor: Optional[str] = Query(None, description=f"Курсор следующей страницы из заголовка {NEXT_CURSOR_HEADER}"),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        sort: str = Query("id", description=f"Поле сортировки: {', '.join(allowed)}"),
+        order: SortOrder = SortOrder.ASC,
+        skip: int = Query(0, ge=0, deprecated=True, description="Устарело, используйте cursor"),
+    ) -> PageParams:
+        params = PageParams(model, sort, order, limit, cursor, skip)
+        params.validate(allowed)
+        return params
+
+    return dependency
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]):
+    """Передать курсор следующей страницы в заголовках X-Next-Cursor и Link"""
+    if not next_cursor:
+        return
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    url = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{url}>; rel="next"'
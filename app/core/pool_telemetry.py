@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+from app.core.query_stats import record_pool_wait
+
+logger = logging.getLogger(__name__)
+
+# Не чаще одного увеличения пула за этот интервал (секунды)
+AUTOTUNE_COOLDOWN = 30.0
+
+class PoolStats:
+    """Счетчики пула одного движка: ожидание соединений, переполнение, инвалидации"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.autotuned = 0
+        self.autotuned_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_wait(self, duration: float, saturated: bool):
+        with self._lock:
+            self.wait_total += duration
+            self.wait_max = max(self.wait_max, duration)
+            if saturated:
+                self.waits += 1
+
+    def info(self, pool) -> Dict[str, Any]:
+        checkouts = self.checkouts or 1
+        return {
+            "pool_size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "saturated_waits": self.waits,
+            "avg_wait_ms": round(self.wait_total / checkouts * 1000, 3),
+            "max_wait_ms": round(self.wait_max * 1000, 3),
+            "autotuned": self.autotuned,
+        }
+
+class TelemetryPoolMixin:
+    """
+    Замер ожидания соединения: время внутри _do_get, включая ожидание
+    освободившегося соединения и открытие нового. Ожидание добавляется
+    и в статистику текущего HTTP-запроса (X-DB-Pool-Wait-Ms).
+    """
+
+    telemetry: Optional[PoolStats] = None
+
+    def _do_get(self):
+        saturated = self._max_overflow > -1 and self._overflow >= self._max_overflow
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.telemetry is not None:
+                self.telemetry.timeouts += 1
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            record_pool_wait(duration)
+            if self.telemetry is not None:
+                self.telemetry.record_wait(duration, saturated)
+                if saturated:
+                    self._maybe_autotune(duration)
+
+    def _maybe_autotune(self, duration: float):
+        """Пул исчерпан и ждать пришлось долго - расширить переполнение (DB_POOL_AUTOTUNE)"""
+        if duration * 1000 < settings.DB_POOL_WAIT_WARN_MS:
+            return
+        stats = self.telemetry
+        now = time.monotonic()
+        if stats.autotuned_at is not None and now - stats.autotuned_at < AUTOTUNE_COOLDOWN:
+            return
+        stats.autotuned_at = now
+
+        if not settings.DB_POOL_AUTOTUNE or self._max_overflow >= settings.DB_POOL_AUTOTUNE_MAX_OVERFLOW:
+            logger.warning(
+                f"Pool {stats.name} exhausted: waited {duration * 1000:.0f} ms for a connection "
+                f"(size {self.size()}, overflow {self._max_overflow}); consider raising DB_POOL_SIZE/DB_MAX_OVERFLOW"
+            )
+            return
+
+        with self._overflow_lock:
+            previous = self._max_overflow
+            self._max_overflow = min(previous + settings.DB_POOL_AUTOTUNE_STEP, settings.DB_POOL_AUTOTUNE_MAX_OVERFLOW)
+        stats.autotuned += 1
+        logger.warning(
+            f"Pool {stats.name} exhausted: waited {duration * 1000:.0f} ms, "
+            f"max_overflow raised {previous} -> {self._max_overflow}"
+        )
+
+    def recreate(self):
+        # dispose() пересоздает пул - счетчики и подстроенный размер сохраняются
+        pool = super().recreate()
+        pool.telemetry = self.telemetry
+        return pool
+
+class TelemetryQueuePool(TelemetryPoolMixin, QueuePool):
+    pass
+
+class TelemetryAsyncQueuePool(TelemetryPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+_engines: Dict[str, Any] = {}
+
+def instrument_pool(engine, name: str):
+    """Подключить счетчики к пулу движка (для AsyncEngine - sync_engine)"""
+    pool = engine.pool
+    if not isinstance(pool, TelemetryPoolMixin):
+        return
+    stats = PoolStats(name)
+    pool.telemetry = stats
+    _engines[name] = engine
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        stats.checkouts += 1
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        stats.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        stats.invalidations += 1
+
+def pool_info() -> Dict[str, Any]:
+    """Снимок пулов всех инструментированных движков"""
+    return {
+        name: engine.pool.telemetry.info(engine.pool)
+        for name, engine in _engines.items()
+        if isinstance(engine.pool, TelemetryPoolMixin) and engine.pool.telemetry is not None
+    }
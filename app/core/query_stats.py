@@ -0,0 +1,259 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from starlette.datastructures import MutableHeaders
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+STATEMENTS_HEADER = "X-DB-Statements"
+TIME_HEADER = "X-DB-Time-Ms"
+DUPLICATES_HEADER = "X-DB-Duplicates"
+POOL_WAIT_HEADER = "X-DB-Pool-Wait-Ms"
+
+# Плейсхолдеры драйверов: ? (sqlite), $1 (asyncpg), %(name)s (psycopg2)
+_PLACEHOLDER = re.compile(r"\?|\$\d+(?:::\w+)?|%\(\w+\)s")
+# Списки IN (?, ?, ?) разной длины - одна и та же форма запроса
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+def statement_shape(statement: str) -> str:
+    """Форма запроса: текст без значений параметров и длины списков IN"""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?...", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+class QueryStats:
+    """SQL-запросы одного HTTP-запроса: число, суммарное время, повторы форм и ожидание пула"""
+
+    __slots__ = ("statements", "duration", "shapes", "pool_wait")
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+        self.pool_wait = 0.0
+
+    def record(self, statement: str, duration: float):
+        self.statements += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    @property
+    def duplicates(self) -> int:
+        """Сколько запросов повторяют уже выполненную форму"""
+        return sum(count - 1 for count in self.shapes.values() if count > 1)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Формы, выполненные не меньше threshold раз - признак N+1"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            STATEMENTS_HEADER: str(self.statements),
+            TIME_HEADER: f"{self.duration * 1000:.2f}",
+            DUPLICATES_HEADER: str(self.duplicates),
+            POOL_WAIT_HEADER: f"{self.pool_wait * 1000:.2f}",
+        }
+
+class QueryMetrics:
+    """
+    Накопленная статистика SQL по эндпоинтам процесса - метрики для
+    продакшена, где заголовки X-DB-* не отдаются.
+    """
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: QueryStats, n_plus_one: bool, pool_bound: bool = False):
+        with self._lock:
+            metrics = self._routes.setdefault(route, {
+                "requests": 0,
+                "statements": 0,
+                "db_time_ms": 0.0,
+                "max_statements": 0,
+                "duplicates": 0,
+                "n_plus_one_requests": 0,
+                "pool_wait_ms": 0.0,
+                "pool_bound_requests": 0,
+            })
+            metrics["requests"] += 1
+            metrics["statements"] += stats.statements
+            metrics["db_time_ms"] += stats.duration * 1000
+            metrics["max_statements"] = max(metrics["max_statements"], stats.statements)
+            metrics["duplicates"] += stats.duplicates
+            metrics["n_plus_one_requests"] += int(n_plus_one)
+            metrics["pool_wait_ms"] += stats.pool_wait * 1000
+            metrics["pool_bound_requests"] += int(pool_bound)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                route: {
+                    **metrics,
+                    "db_time_ms": round(metrics["db_time_ms"], 2),
+                    "pool_wait_ms": round(metrics["pool_wait_ms"], 2),
+                    "avg_statements": round(metrics["statements"] / metrics["requests"], 2),
+                }
+                for route, metrics in sorted(self._routes.items())
+            }
+
+query_metrics = QueryMetrics()
+
+class CompiledCacheStats:
+    """
+    Кэш скомпилированных запросов SQLAlchemy по движкам: попадания,
+    промахи (запрос компилировался заново) и запросы вне кэша.
+    Растущие промахи при стабильной нагрузке - признак запросов, которые
+    каждый раз строятся по-разному, или слишком маленького кэша.
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, Any] = {}
+        self._names: Dict[Any, str] = {}
+        self._counts: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def register(self, engine, name: str):
+        """Новый движок под тем же именем заменяет прежний (например, в тестах)"""
+        with self._lock:
+            previous = self._engines.get(name)
+            if previous is not None:
+                self._names.pop(previous, None)
+            self._engines[name] = engine
+            self._names[engine] = name
+
+    def record(self, engine, cache_hit):
+        name = self._names.get(engine)
+        if name is None:
+            return
+        if cache_hit == CacheStats.CACHE_HIT:
+            key = "hits"
+        elif cache_hit == CacheStats.CACHE_MISS:
+            key = "misses"
+        else:
+            key = "uncached"
+        with self._lock:
+            self._counts.setdefault(name, Counter())[key] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+    def info(self) -> Dict[str, Any]:
+        result = {}
+        with self._lock:
+            for name, engine in self._engines.items():
+                counts = self._counts.get(name, Counter())
+                compiled = counts["hits"] + counts["misses"]
+                cache = engine._compiled_cache
+                result[name] = {
+                    "hits": counts["hits"],
+                    "misses": counts["misses"],
+                    "uncached": counts["uncached"],
+                    "hit_ratio": round(counts["hits"] / compiled, 4) if compiled else None,
+                    "size": len(cache) if cache is not None else 0,
+                    "capacity": cache.capacity if cache is not None else 0,
+                }
+        return result
+
+compiled_cache_stats = CompiledCacheStats()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats.get() is not None:
+        context._query_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        compiled_cache_stats.record(conn.engine, context.cache_hit)
+    stats = _current_stats.get()
+    started_at = getattr(context, "_query_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+def record_pool_wait(duration: float):
+    """Ожидание соединения из пула в рамках текущего HTTP-запроса"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.pool_wait += duration
+
+def instrument_engine(engine, name: str = "default"):
+    """
+    Считать запросы движка в статистику текущего HTTP-запроса и в
+    compiled_cache_stats под именем name (для AsyncEngine - sync_engine)
+    """
+    compiled_cache_stats.register(engine, name)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+def is_pool_bound(stats: QueryStats, elapsed: float) -> bool:
+    """Ожидание пула заметно и занимает большую часть времени запроса"""
+    return (
+        stats.pool_wait * 1000 >= settings.DB_POOL_WAIT_WARN_MS
+        and stats.pool_wait >= elapsed * settings.DB_POOL_WAIT_DOMINANT_RATIO
+    )
+
+def route_name(scope) -> str:
+    endpoint = scope.get("endpoint")
+    name = getattr(endpoint, "__name__", "unmatched")
+    return f"{scope.get('method', '')} {name}".strip()
+
+class QueryStatsMiddleware:
+    """
+    ASGI-middleware: собирает QueryStats на время запроса, в DEBUG
+    отдает их в заголовках X-DB-*, всегда копит в query_metrics и
+    пишет в лог формы запросов, повторенные подозрительно много раз,
+    и запросы, большую часть времени ждавшие соединения из пула.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.QUERY_STATS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = MutableHeaders(scope=message)
+                for name, value in stats.headers().items():
+                    headers.append(name, value)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            route = route_name(scope)
+            repeated = stats.repeated(settings.QUERY_STATS_N_PLUS_ONE_THRESHOLD)
+            for shape, count in repeated:
+                logger.warning(f"Possible N+1 in {route}: {count} x {shape[:200]}")
+            elapsed = time.perf_counter() - started
+            pool_bound = is_pool_bound(stats, elapsed)
+            if pool_bound:
+                logger.warning(
+                    f"{route} spent {stats.pool_wait * 1000:.0f} ms of {elapsed * 1000:.0f} ms "
+                    "waiting for a DB connection"
+                )
+            query_metrics.record(route, stats, n_plus_one=bool(repeated), pool_bound=pool_bound)
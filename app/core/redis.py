@@ -2,14 +2,26 @@ import redis.asyncio as redis
 import json
 import logging
 import os
-from typing import Any, Optional, List, Dict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, List, Dict, Iterable, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Время жизни множеств-тегов: заведомо больше TTL любой закэшированной записи
+TAG_TTL = 24 * 3600
+
+# Канал широковещательной инвалидации локальных кэшей воркеров
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+def tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
 class RedisManager:
     def __init__(self, redis_url: str = None):
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.redis: Optional[redis.Redis] = None
+        # self.redis создается до проверки связи - состояние храним отдельно
+        self.connected = False
     
     async def connect(self):
         """Подключиться к Redis"""
@@ -21,15 +33,26 @@ class RedisManager:
                 decode_responses=True
             )
             await self.redis.ping()
+            self.connected = True
             logger.info("Successfully connected to Redis")
         except Exception as e:
+            self.connected = False
             logger.error(f"Failed to connect to Redis: {e}")
             logger.warning("Continuing without Redis...")
     
+    async def ping(self) -> bool:
+        """Проверить связь с Redis без записи ошибок в лог; обновляет connected"""
+        try:
+            self.connected = bool(self.redis) and bool(await self.redis.ping())
+        except Exception:
+            self.connected = False
+        return self.connected
+    
     async def close(self):
         """Закрыть соединение с Redis"""
         if self.redis:
             await self.redis.close()
+            self.connected = False
             logger.info("Redis connection closed")
     
     async def set_key(self, key: str, value: Any, expire: int = 3600):
@@ -64,6 +87,188 @@ class RedisManager:
         except Exception as e:
             logger.error(f"Failed to delete key {key}: {e}")
     
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Optional["redis.client.Pipeline"]]:
+        """
+        Pipeline для группировки команд в один round-trip.
+        Накопленные команды выполняются при выходе из блока; если нужны
+        результаты, вызовите await pipe.execute() внутри блока.
+        С transaction=True - атомарно (MULTI/EXEC). Без Redis отдает None.
+        В отличие от остальных методов менеджера ошибки Redis не глотаются:
+        и явный execute(), и выполнение на выходе пробрасывают исключение,
+        обработка остается вызывающему.
+        """
+        if not self.redis:
+            yield None
+            return
+        async with self.redis.pipeline(transaction=transaction) as pipe:
+            yield pipe
+            if pipe.command_stack:
+                await pipe.execute()
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Получить значения нескольких ключей одним MGET"""
+        try:
+            if not self.redis or not keys:
+                return [None] * len(keys)
+            values = await self.redis.mget(keys)
+            return [json.loads(value) if value else None for value in values]
+        except Exception as e:
+            logger.error(f"Failed to get keys {keys}: {e}")
+            return [None] * len(keys)
+    
+    async def set_many(self, mapping: Dict[str, Any], expire: int = 3600):
+        """Установить несколько ключей с общим TTL за один round-trip"""
+        try:
+            if not self.redis or not mapping:
+                return
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.mset({key: json.dumps(value) for key, value in mapping.items()})
+                for key in mapping:
+                    pipe.expire(key, expire)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to set keys {list(mapping)}: {e}")
+    
+    async def delete_keys(self, keys: Iterable[str]) -> int:
+        """Удалить несколько ключей одним UNLINK"""
+        keys = list(keys)
+        try:
+            if not self.redis or not keys:
+                return 0
+            return await self.redis.unlink(*keys)
+        except Exception as e:
+            logger.error(f"Failed to delete keys {keys}: {e}")
+            return 0
+    
+    async def increment_many(self, keys: Iterable[str]) -> List[int]:
+        """Инкрементировать несколько счетчиков за один round-trip"""
+        keys = list(keys)
+        try:
+            if not self.redis or not keys:
+                return [0] * len(keys)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.incr(key)
+                return await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to increment keys {keys}: {e}")
+            return [0] * len(keys)
+    
+    async def set_key_with_tags(self, key: str, value: Any, tags: Iterable[str], expire: int = 3600):
+        """Установить ключ и зарегистрировать его под тегами одним pipeline"""
+        try:
+            if not self.redis:
+                return
+            serialized_value = json.dumps(value)
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(key, serialized_value, ex=expire)
+                for tag in tags:
+                    pipe.sadd(tag_key(tag), key)
+                    pipe.expire(tag_key(tag), TAG_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to set tagged key {key}: {e}")
+    
+    async def invalidate_tags(
+        self,
+        tags: Iterable[str],
+        keys: Iterable[str] = (),
+        publish: Optional[Dict[str, Any]] = None
+    ) -> int:
+        """
+        Удалить ключи под тегами и дополнительные ключи за два round-trip'а:
+        SMEMBERS всех тегов одним pipeline, затем UNLINK ключей и SREM
+        прочитанных членов из тегов другим. UNLINK отправляется по ключу на
+        команду, поэтому в Redis Cluster ключи могут лежать в разных слотах.
+        Ключ, зарегистрированный под тегом между шагами, остается в теге и
+        удалится следующей инвалидацией; опустевший тег Redis удаляет сам.
+        publish - сообщение для CACHE_INVALIDATION_CHANNEL во втором pipeline.
+        """
+        # Списки до try: логирование ошибки не должно получить пустой итератор
+        tags = list(tags)
+        keys = list(keys)
+        try:
+            if not self.redis:
+                return 0
+            tag_keys = [tag_key(tag) for tag in tags]
+            members = []
+            if tag_keys:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key in tag_keys:
+                        pipe.smembers(key)
+                    members = await pipe.execute()
+            
+            doomed = set(keys).union(*members)
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in doomed:
+                    pipe.unlink(key)
+                for key, tag_members in zip(tag_keys, members):
+                    if tag_members:
+                        pipe.srem(key, *tag_members)
+                if publish is not None:
+                    pipe.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(publish))
+                results = await pipe.execute()
+            return sum(results[:len(doomed)])
+        except Exception as e:
+            logger.error(f"Failed to invalidate tags {tags}: {e}")
+            return 0
+    
+    async def delete_pattern(self, pattern: str, batch_size: int = 500) -> int:
+        """Удалить ключи по шаблону: SCAN вместо KEYS и UNLINK пачками"""
+        try:
+            if not self.redis:
+                return 0
+            deleted = 0
+            batch = []
+            async for key in self.redis.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    deleted += await self.redis.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.redis.unlink(*batch)
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete keys for pattern {pattern}: {e}")
+            return 0
+    
+    async def try_lock(self, name: str, lease: float) -> Tuple[bool, Optional[Any]]:
+        """
+        Неблокирующая попытка взять блокировку с арендой lease секунд (SET NX PX).
+        Возвращает (можно_вычислять, блокировка): (True, lock) - взята,
+        (False, None) - занята другим, (True, None) - Redis недоступен.
+        """
+        try:
+            if not self.redis:
+                return True, None
+            lock = self.redis.lock(name, timeout=lease, blocking=False)
+            if await lock.acquire():
+                return True, lock
+            return False, None
+        except Exception as e:
+            logger.error(f"Failed to acquire lock {name}: {e}")
+            return True, None
+    
+    async def release_lock(self, lock: Optional[Any]):
+        """Отпустить блокировку, если она еще наша (аренда могла истечь)"""
+        if lock is None:
+            return
+        try:
+            await lock.release()
+        except Exception as e:
+            logger.warning(f"Failed to release lock {lock.name}: {e}")
+    
+    async def exists(self, key: str) -> bool:
+        """Существует ли ключ"""
+        try:
+            if not self.redis:
+                return False
+            return bool(await self.redis.exists(key))
+        except Exception as e:
+            logger.error(f"Failed to check key {key}: {e}")
+            return False
+    
     async def keys(self, pattern: str) -> List[str]:
         """Найти ключи по шаблону"""
         try:
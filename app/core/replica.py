@@ -0,0 +1,144 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ("GET", "HEAD")
+
+# Cookie с моментом (unix time), до которого клиент читает с основной базы
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+# Отставание реплики PostgreSQL в секундах. Если все полученное уже применено,
+# отставания нет, даже когда последняя транзакция была давно (простой основной базы).
+PG_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+class ReplicaRouter:
+    """
+    Выбор базы для сессии запроса. GET/HEAD читают с реплики, если она
+    настроена, отвечает и отстает не больше REPLICA_MAX_LAG_SECONDS, а
+    клиент не писал в последние READ_YOUR_WRITES_SECONDS. Остальное -
+    основная база. Отставание замеряется не чаще REPLICA_LAG_CHECK_INTERVAL.
+    """
+
+    def __init__(self, primary_factory: async_sessionmaker, replica_engine: Optional[AsyncEngine] = None):
+        self.configure(primary_factory, replica_engine)
+
+    def configure(self, primary_factory: async_sessionmaker, replica_engine: Optional[AsyncEngine] = None):
+        self.primary_factory = primary_factory
+        self.replica_engine = replica_engine
+        self.replica_factory = None
+        if replica_engine is not None:
+            self.replica_factory = async_sessionmaker(
+                replica_engine,
+                class_=AsyncSession,
+                autoflush=False,
+                expire_on_commit=False
+            )
+        self.lag: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.stats = {"replica": 0, "primary": 0, "sticky": 0, "lagging": 0, "unavailable": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica_factory is not None
+
+    async def probe_lag(self) -> float:
+        """Отставание реплики в секундах; у баз без репликации (SQLite) - 0"""
+        async with self.replica_engine.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                lag = (await connection.execute(text(PG_REPLICA_LAG_SQL))).scalar()
+                return float(lag or 0)
+            await connection.execute(text("SELECT 1"))
+            return 0.0
+
+    async def current_lag(self) -> Optional[float]:
+        """Закэшированное отставание; None - реплика не ответила"""
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return self.lag
+        # Метка ставится до замера: параллельные запросы не проверяют реплику повторно
+        self.checked_at = now
+        try:
+            self.lag = await self.probe_lag()
+        except Exception as e:
+            logger.warning(f"Read replica is unavailable, reading from primary: {e}")
+            self.lag = None
+        return self.lag
+
+    async def session_factory_for(self, request: Request) -> async_sessionmaker:
+        if not self.enabled or request.method not in READ_METHODS:
+            self.stats["primary"] += 1
+            return self.primary_factory
+
+        if is_sticky(request):
+            self.stats["sticky"] += 1
+            return self.primary_factory
+
+        lag = await self.current_lag()
+        if lag is None:
+            self.stats["unavailable"] += 1
+            return self.primary_factory
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            self.stats["lagging"] += 1
+            return self.primary_factory
+
+        self.stats["replica"] += 1
+        return self.replica_factory
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": settings.REPLICA_MAX_LAG_SECONDS,
+            "sessions": dict(self.stats),
+        }
+
+def is_sticky(request: Request) -> bool:
+    """Клиент недавно писал - его чтения идут в основную базу"""
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса ставит cookie read_primary_until:
+    следующие READ_YOUR_WRITES_SECONDS чтения клиента идут в основную базу
+    и видят его запись, даже если реплика еще не догнала. Работает и между
+    воркерами, так как состояние хранится у клиента.
+    """
+
+    def __init__(self, app, router: ReplicaRouter):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not self.router.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{READ_PRIMARY_COOKIE}={time.time() + window:.3f}; Max-Age={int(window)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,6 +1,8 @@
 from app.database import SessionLocal, engine
 from app.models.hotels import Hotel, Room, User, Booking
 from app.database import Base
+import app.services.text_search  # noqa: F401 - индексирует city/country/room_type для поиска
+import app.services.booking_stats  # noqa: F401 - ведет hotel_stats/room_stats по бронированиям
 from datetime import datetime, timedelta
 import random
 
@@ -1,8 +1,23 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 import os
 
+from app.config import settings
+from app.core.query_stats import instrument_engine
+from app.core.pool_telemetry import TelemetryQueuePool, TelemetryAsyncQueuePool, instrument_pool
+from app.core.replica import ReplicaRouter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ревизия, соответствующая схеме, которую раньше создавал create_tables()
+BASELINE_REVISION = "0001"
+
+# Ключ advisory-блокировки PostgreSQL: миграции нескольких воркеров выполняются по очереди
+MIGRATIONS_LOCK_ID = 72_100_301
+
 Base = declarative_base()
 
 def get_database_url():
@@ -18,7 +33,32 @@ def get_database_url():
     else:
         return "sqlite:///./hotel_booking.db"
 
+def get_async_database_url(url: str) -> str:
+    """
+    Асинхронный вариант URL: asyncpg для PostgreSQL, aiosqlite для SQLite.
+    Явно указанный драйвер не меняется.
+    """
+    scheme, separator, rest = url.partition("://")
+    if "+" in scheme:
+        return url
+    if scheme in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg{separator}{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite{separator}{rest}"
+    return url
+
+def pool_options() -> dict:
+    """Параметры пула соединений из настроек"""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
 database_url = get_database_url()
+async_database_url = get_async_database_url(database_url)
 
 if database_url.startswith("sqlite"):
     engine = create_engine(
@@ -30,29 +70,101 @@ if database_url.startswith("sqlite"):
 else:
     engine = create_engine(
         database_url,
-        pool_size=10,
-        max_overflow=20,
-        pool_pre_ping=True,
-        pool_recycle=3600,
+        poolclass=TelemetryQueuePool,
+        **pool_options(),
         echo=False
     )
 
+# Синхронный движок остается для миграций, Celery-задач и скриптов
+instrument_engine(engine, "sync")
+instrument_pool(engine, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+def create_async_db_engine(url: str, name: str):
+    """Асинхронный движок основной базы или реплики; name - имя пула в телеметрии"""
+    if url.startswith("sqlite"):
+        async_db_engine = create_async_engine(
+            url,
+            echo=False
+        )
+    else:
+        async_db_engine = create_async_engine(
+            url,
+            poolclass=TelemetryAsyncQueuePool,
+            **pool_options(),
+            echo=False
+        )
+    instrument_engine(async_db_engine.sync_engine, name)
+    instrument_pool(async_db_engine.sync_engine, name)
+    return async_db_engine
+
+async_engine = create_async_db_engine(async_database_url, "primary")
+
+replica_async_engine = None
+if settings.READ_REPLICA_URL:
+    replica_async_engine = create_async_db_engine(get_async_database_url(settings.READ_REPLICA_URL), "replica")
+
+# expire_on_commit=False: ответы сериализуются после коммита, а ленивая
+# подгрузка атрибутов вне greenlet в асинхронной сессии невозможна
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+replica_router = ReplicaRouter(AsyncSessionLocal, replica_async_engine)
+
+async def get_db(request: Request):
     """
-    Dependency для получения сессии базы данных.
+    Dependency для получения асинхронной сессии базы данных.
     Используется в Depends() FastAPI endpoints.
+    GET-запросы получают сессию реплики, если replica_router ее разрешает.
     """
-    db = SessionLocal()
-    try:
+    session_factory = await replica_router.session_factory_for(request)
+    async with session_factory() as db:
         yield db
-    finally:
-        db.close()
 
 def create_tables():
     """
-    Создать все таблицы в базе данных.
-    Вызывается при старте приложения.
+    Создать все таблицы в базе данных напрямую по моделям.
+    Используется в тестах и скриптах; приложение применяет миграции.
+    """
+    Base.metadata.create_all(bind=engine)
+
+def get_alembic_config():
+    """Конфигурация Alembic для текущей базы данных"""
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", database_url.replace("%", "%%"))
+    config.attributes["configure_logger"] = False
+    return config
+
+def run_migrations(target: str = "head", bind=None):
+    """
+    Применить миграции Alembic.
+    Вызывается при старте приложения вместо create_tables().
+    База, созданная до появления миграций, сначала помечается
+    базовой ревизией, чтобы не пересоздавать существующие таблицы.
+    bind - движок целевой базы (по умолчанию основной engine).
+    На PostgreSQL миграции выполняются под pg_advisory_xact_lock:
+    воркеры, стартовавшие одновременно, ждут первого, а затем видят
+    уже актуальную ревизию.
     """
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    from alembic import command
+
+    config = get_alembic_config()
+
+    with (bind or engine).begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATIONS_LOCK_ID})
+
+        config.attributes["connection"] = connection
+        tables = set(inspect(connection).get_table_names())
+
+        if "alembic_version" not in tables and "bookings" in tables:
+            command.stamp(config, BASELINE_REVISION)
+
+        command.upgrade(config, target)
@@ -0,0 +1,38 @@
+import argparse
+
+from app.database import engine, run_migrations
+from app.services.dataset_generator import DatasetGenerator, clear_dataset
+
+def generate(args):
+    """Применить миграции и залить синтетический набор данных в основную базу"""
+    run_migrations()
+    generator = DatasetGenerator(
+        hotels=args.hotels,
+        rooms_per_hotel=args.rooms_per_hotel,
+        bookings=args.bookings,
+        users=args.users,
+        occupancy=args.occupancy,
+        cancellation_rate=args.cancellation_rate,
+        future_days=args.future_days,
+        seed=args.seed,
+    )
+    with engine.connect() as connection:
+        if args.reset:
+            clear_dataset(connection)
+        result = generator.generate(connection, progress=lambda totals: print(f"  {totals}", flush=True))
+    print(f"Generated: {result}")
+    print("Данные записаны в обход API: при запущенном Redis сбросьте кэш (FLUSHDB)")
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных для нагрузочных тестов")
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--rooms-per-hotel", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=None, help="по умолчанию bookings / 10")
+    parser.add_argument("--occupancy", type=float, default=0.7, help="целевая доля занятых ночей")
+    parser.add_argument("--cancellation-rate", type=float, default=0.1)
+    parser.add_argument("--future-days", type=int, default=90, help="на сколько дней вперед есть бронирования")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="удалить существующие отели, комнаты, пользователей и бронирования")
+    generate(parser.parse_args())
@@ -4,9 +4,15 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import create_tables
+from app.database import run_migrations, engine, SessionLocal, async_engine, replica_router
+from app.config import settings
+from app.services.booking_index import booking_index
+from app.services.occupancy_matrix import occupancy_matrix
+from app.services.cache_service import listen_for_invalidations, drain_refreshes
 from app.core.rabbitmq import rabbitmq_manager, RabbitMQManager
 from app.core.redis import redis_manager, RedisManager
+from app.core.query_stats import QueryStatsMiddleware, STATEMENTS_HEADER, TIME_HEADER, DUPLICATES_HEADER, POOL_WAIT_HEADER
+from app.core.replica import ReadYourWritesMiddleware
 from app.routers.hotels import router as hotels_router
 from app.routers.rooms import router as rooms_router
 from app.routers.users import router as users_router
@@ -23,12 +29,32 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     logger.info("Starting Hotel Booking API...")
     
-    try:
-        create_tables()
-        logger.info("Database tables created/verified")
-    except Exception as e:
-        logger.error(f"Database error: {e}")
-        raise
+    # Базы берутся из app.state, чтобы тесты подменяли их своими
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        try:
+            run_migrations(bind=app.state.engine)
+            logger.info("Database migrations applied")
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            raise
+    
+    if settings.BOOKING_INDEX_ENABLED:
+        db = app.state.session_factory()
+        try:
+            booking_index.rebuild(db)
+        except Exception as e:
+            logger.error(f"Booking index error: {e}")
+        finally:
+            db.close()
+    
+    if settings.OCCUPANCY_MATRIX_ENABLED:
+        db = app.state.session_factory()
+        try:
+            occupancy_matrix.rebuild(db)
+        except Exception as e:
+            logger.error(f"Occupancy matrix error: {e}")
+        finally:
+            db.close()
     
     try:
         global rabbitmq_manager
@@ -44,11 +70,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Redis error: {e}")
     
+    invalidation_listener = None
+    if settings.LOCAL_CACHE_ENABLED:
+        invalidation_listener = asyncio.create_task(listen_for_invalidations())
+    
     logger.info("All services initialized")
     yield
     
     logger.info("Shutting down Hotel Booking API...")
     
+    try:
+        await asyncio.wait_for(drain_refreshes(), timeout=5)
+    except asyncio.TimeoutError:
+        logger.warning("Background cache refreshes did not finish in time")
+    
+    if invalidation_listener:
+        invalidation_listener.cancel()
+        try:
+            await invalidation_listener
+        except asyncio.CancelledError:
+            pass
+    
     try:
         if rabbitmq_manager:
             await rabbitmq_manager.close()
@@ -60,6 +102,10 @@ async def lifespan(app: FastAPI):
             await redis_manager.close()
     except Exception as e:
         logger.error(f"Redis shutdown error: {e}")
+    
+    await app.state.async_engine.dispose()
+    if replica_router.replica_engine is not None:
+        await replica_router.replica_engine.dispose()
 
 app = FastAPI(
     title="Hotel Booking API",
@@ -71,12 +117,21 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+app.state.engine = engine
+app.state.session_factory = SessionLocal
+app.state.async_engine = async_engine
+
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Курсор следующей страницы и счетчики SQL (в DEBUG) передаются в заголовках
+    expose_headers=["X-Next-Cursor", "Link", STATEMENTS_HEADER, TIME_HEADER, DUPLICATES_HEADER, POOL_WAIT_HEADER],
 )
 
 app.include_router(hotels_router, prefix="/api/v1")
@@ -1,3 +1,3 @@
-from .hotels import Hotel, Room, User, Booking
+from .hotels import Hotel, Room, User, Booking, SearchTrigram, RoomNight, ArchivedBooking, HotelStats, RoomStats
 
-__all__ = ["Hotel", "Room", "User", "Booking"]
\ No newline at end of file
+__all__ = ["Hotel", "Room", "User", "Booking", "SearchTrigram", "RoomNight", "ArchivedBooking", "HotelStats", "RoomStats"]
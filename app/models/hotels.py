@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Enum, Text
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, ForeignKey, Enum, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -9,6 +9,13 @@ from app.core.enums import RoomStatus, BookingStatus, UserRole
 
 class Hotel(Base):
     __tablename__ = "hotels"
+    __table_args__ = (
+        # get_hotels: фильтры city == ? и/или country == ?
+        Index("ix_hotels_city_country", "city", "country"),
+        Index("ix_hotels_country", "country"),
+        # Keyset-пагинация get_hotels?sort=name: (name, id) > (?, ?)
+        Index("ix_hotels_name_id", "name", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -35,6 +42,14 @@ class Hotel(Base):
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        # get_available_rooms/get_rooms: hotel_id == ? AND status == ? AND price_per_night BETWEEN
+        Index("ix_rooms_hotel_status_price", "hotel_id", "status", "price_per_night"),
+        # create_room/update_room: проверка дубликата номера в отеле
+        Index("ix_rooms_hotel_number", "hotel_id", "room_number"),
+        # Keyset-пагинация get_rooms?sort=price_per_night
+        Index("ix_rooms_price_id", "price_per_night", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     hotel_id = Column(Integer, ForeignKey("hotels.id", ondelete="CASCADE"), nullable=False)
@@ -73,6 +88,16 @@ class User(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        # Проверка пересечений: room_id == ? AND status IN (...) AND check_in_date < ? AND check_out_date > ?
+        Index("ix_bookings_room_status_dates", "room_id", "status", "check_in_date", "check_out_date"),
+        # get_user_bookings: user_id == ?
+        Index("ix_bookings_user_checkin", "user_id", "check_in_date"),
+        # delete_hotel и статистика отеля: hotel_id == ? [AND status ...]
+        Index("ix_bookings_hotel_status", "hotel_id", "status"),
+        # Keyset-пагинация get_bookings?sort=check_in_date
+        Index("ix_bookings_checkin_id", "check_in_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     booking_reference = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
@@ -89,4 +114,104 @@ class Booking(Base):
     
     user = relationship("User", back_populates="bookings")
     hotel = relationship("Hotel", back_populates="bookings")
-    room = relationship("Room", back_populates="bookings")
\ No newline at end of file
+    room = relationship("Room", back_populates="bookings")
+
+class SearchTrigram(Base):
+    """
+    Триграммы значений city, country и room_type для поиска подстрок без
+    pg_trgm (SQLite). Одна строка на (поле, триграмму, значение).
+    """
+    __tablename__ = "search_trigrams"
+    __table_args__ = (
+        # Проверка, проиндексировано ли значение, и перебор значений для коротких запросов
+        Index("ix_search_trigrams_field_value", "field", "value"),
+    )
+    
+    field = Column(String(20), primary_key=True)
+    trigram = Column(String(3), primary_key=True)
+    value = Column(String(100), primary_key=True)
+
+class RoomNight(Base):
+    """
+    Инвентарь занятости: одна строка на каждую ночь активного бронирования.
+    Поддерживается в той же транзакции, что и само бронирование
+    (app/services/room_nights.py); проверка доступности - анти-join
+    по первичному ключу (room_id, night).
+    """
+    __tablename__ = "room_nights"
+    __table_args__ = (
+        # Пересчет ночей при изменении или отмене бронирования
+        Index("ix_room_nights_booking", "booking_id"),
+    )
+    
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    night = Column(Date, primary_key=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), primary_key=True)
+
+class ArchivedBooking(Base):
+    """
+    Архив завершенных и отмененных бронирований старше окна хранения
+    (app/services/booking_archive.py). Горячая таблица bookings остается
+    маленькой, а история доступна отчетам. Внешних ключей нет: архив
+    переживает удаление пользователя, отеля или комнаты.
+    На PostgreSQL таблица секционирована по месяцу заезда (миграция 0007),
+    поэтому ключ секционирования входит в первичный ключ.
+    """
+    __tablename__ = "bookings_archive"
+    __table_args__ = (
+        # История бронирований пользователя
+        Index("ix_bookings_archive_user_checkin", "user_id", "check_in_date"),
+        # Отчеты по отелю за период
+        Index("ix_bookings_archive_hotel_checkin", "hotel_id", "check_in_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    check_in_date = Column(DateTime, primary_key=True)
+    booking_reference = Column(String(36))
+    user_id = Column(Integer)
+    hotel_id = Column(Integer)
+    room_id = Column(Integer)
+    check_out_date = Column(DateTime, nullable=False)
+    number_of_guests = Column(Integer, nullable=False)
+    total_price = Column(Float, nullable=False)
+    status = Column(Enum(BookingStatus))
+    special_requests = Column(Text, nullable=True)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class HotelStats(Base):
+    """
+    Агрегаты бронирований отеля за все время, включая архив: счетчики по
+    статусам, выручка и проданные ночи. Меняются в той же транзакции, что
+    и бронирование (app/services/booking_stats.py), поэтому отчеты читают
+    одну строку вместо агрегации истории.
+    """
+    __tablename__ = "hotel_stats"
+    
+    hotel_id = Column(Integer, ForeignKey("hotels.id", ondelete="CASCADE"), primary_key=True)
+    bookings_count = Column(Integer, nullable=False, default=0)
+    active_bookings = Column(Integer, nullable=False, default=0)
+    completed_bookings = Column(Integer, nullable=False, default=0)
+    cancelled_bookings = Column(Integer, nullable=False, default=0)
+    # Стоимость неотмененных бронирований
+    revenue = Column(Float, nullable=False, default=0.0)
+    nights_sold = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class RoomStats(Base):
+    """Те же агрегаты по комнате (см. HotelStats)"""
+    __tablename__ = "room_stats"
+    __table_args__ = (
+        # Пересчет агрегатов всех комнат отеля
+        Index("ix_room_stats_hotel", "hotel_id"),
+    )
+    
+    room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), primary_key=True)
+    hotel_id = Column(Integer, ForeignKey("hotels.id", ondelete="CASCADE"), nullable=False)
+    bookings_count = Column(Integer, nullable=False, default=0)
+    active_bookings = Column(Integer, nullable=False, default=0)
+    completed_bookings = Column(Integer, nullable=False, default=0)
+    cancelled_bookings = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    nights_sold = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
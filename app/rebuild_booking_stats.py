@@ -0,0 +1,23 @@
+import argparse
+
+from app.database import engine
+from app.services.booking_stats import check_booking_stats, rebuild_booking_stats
+
+def rebuild(check_only: bool = False):
+    """Сверить hotel_stats/room_stats с историей бронирований и перестроить при расхождении"""
+    with engine.begin() as connection:
+        report = check_booking_stats(connection)
+        print(f"Booking stats: {report}")
+        if check_only:
+            return report
+        if report["hotels_mismatched"] or report["rooms_mismatched"]:
+            print(f"Rebuilt: {rebuild_booking_stats(connection)} rows")
+        else:
+            print("Stats are consistent, nothing to rebuild")
+        return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка и перестроение агрегатов hotel_stats и room_stats")
+    parser.add_argument("--check", action="store_true", help="только сравнить с историей бронирований")
+    args = parser.parse_args()
+    rebuild(check_only=args.check)
@@ -0,0 +1,23 @@
+import argparse
+
+from app.database import engine
+from app.services.room_nights import check_room_nights, rebuild_room_nights
+
+def rebuild(check_only: bool = False):
+    """Сверить инвентарь room_nights с бронированиями и перестроить при расхождении"""
+    with engine.begin() as connection:
+        report = check_room_nights(connection)
+        print(f"Room nights: {report}")
+        if check_only:
+            return report
+        if report["missing"] or report["extra"]:
+            print(f"Rebuilt: {rebuild_room_nights(connection)} nights")
+        else:
+            print("Inventory is consistent, nothing to rebuild")
+        return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка и перестроение инвентаря room_nights")
+    parser.add_argument("--check", action="store_true", help="только сравнить с бронированиями")
+    args = parser.parse_args()
+    rebuild(check_only=args.check)
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List
 
 import app.models.hotels as models
 import app.schemas.schemas as schemas
+from app.config import settings
 from app.database import get_db
 from app.services.booking_events import BookingEventService
 from app.services.notification_service import NotificationService
 from app.services.cache_service import CacheService
+from app.services.availability_service import AvailabilityService, BOOKING_OVERLAP_CONSTRAINT, is_lock_timeout
+from app.services.booking_index import booking_index
+from app.services.repository import Repository
 from app.core.dependencies import get_current_user, require_admin, require_user_or_admin
+from app.core.pagination import PageParams, page_params, set_next_cursor
 
 router = APIRouter(prefix="/bookings", tags=["bookings"])
 
+async def _lock_timeout_conflict(db: AsyncSession, error: OperationalError) -> HTTPException:
+    """Откатить транзакцию; истекшее ожидание блокировки комнаты - 409, остальное пробрасывается"""
+    await db.rollback()
+    if not is_lock_timeout(error):
+        raise error
+    return HTTPException(
+        status_code=409,
+        detail="Комната сейчас бронируется другим запросом, повторите попытку",
+        headers={"Retry-After": "1"}
+    )
+
 @router.post("/", response_model=schemas.BookingRead)
 async def create_booking(
     booking: schemas.BookingCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin) 
 ):
     """Создать новое бронирование"""
@@ -25,15 +44,21 @@ async def create_booking(
             detail="Недостаточно прав для создания бронирования для другого пользователя"
         )
     
-    user = db.query(models.User).filter(models.User.id == booking.user_id).first()
+    user = await Repository(db).get_user(booking.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == booking.hotel_id).first()
+    hotel = await Repository(db).get_hotel(booking.hotel_id)
     if not hotel:
         raise HTTPException(status_code=404, detail="Отель не найден")
     
-    room = db.query(models.Room).filter(models.Room.id == booking.room_id).first()
+    availability = AvailabilityService(db)
+    
+    # Блокировка комнаты до коммита: проверка пересечений и вставка атомарны
+    try:
+        room = await availability.lock_room(booking.room_id)
+    except OperationalError as e:
+        raise await _lock_timeout_conflict(db, e)
     if not room:
         raise HTTPException(status_code=404, detail="Комната не найдена")
     
@@ -61,14 +86,14 @@ async def create_booking(
             detail="Дата выезда должна быть позже даты заезда"
         )
     
-    existing_booking = db.query(models.Booking).filter(
-        models.Booking.room_id == booking.room_id,
-        models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.CHECKED_IN]),
-        models.Booking.check_in_date < booking.check_out_date,
-        models.Booking.check_out_date > booking.check_in_date
-    ).first()
+    room_is_free = await availability.is_room_free(
+        booking.room_id,
+        booking.check_in_date,
+        booking.check_out_date,
+        authoritative=True
+    )
     
-    if existing_booking:
+    if not room_is_free:
         raise HTTPException(
             status_code=400,
             detail="Комната уже забронирована на указанные даты"
@@ -85,13 +110,33 @@ async def create_booking(
     room.status = models.RoomStatus.OCCUPIED
     
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if BOOKING_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(
+                status_code=400,
+                detail="Комната уже забронирована на указанные даты"
+            )
+        raise
+    except OperationalError as e:
+        raise await _lock_timeout_conflict(db, e)
+    await db.refresh(db_booking)
+    
+    booking_index.add_booking(db_booking)
+    
+    # Кэш и статистика не должны зависеть от успеха уведомлений
+    try:
+        cache_service = CacheService()
+        await cache_service.invalidate_booking_related(user_id=user.id, hotel_id=hotel.id)
+        await cache_service.track_booking_stats(hotel.id, room.id)
+    except Exception as e:
+        print(f"Failed to update booking cache: {e}")
     
     try:
         event_service = BookingEventService()
         notification_service = NotificationService()
-        cache_service = CacheService()
         
         booking_data = {
             "id": db_booking.id,
@@ -117,54 +162,189 @@ async def create_booking(
             }
         )
         
-        await cache_service.track_booking_stats(hotel.id, room.id)
+    except Exception as e:
+        print(f"Failed to publish booking event: {e}")
+    
+    return db_booking
+
+@router.post("/batch", response_model=schemas.BookingBatchRead)
+async def create_bookings_batch(
+    batch: schemas.BookingBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_user_or_admin)
+):
+    """
+    Групповое бронирование нескольких комнат одного отеля на одни даты.
+    Пользователь и отель проверяются один раз, комнаты блокируются и
+    проверяются на пересечения одним запросом, все бронирования
+    вставляются одним коммитом: либо создается вся группа, либо ничего.
+    Публикуются одно событие и одно уведомление на группу.
+    """
+    if current_user.role != models.UserRole.ADMIN and batch.user_id != current_user.id:
+        raise HTTPException(
+            status_code=403,
+            detail="Недостаточно прав для создания бронирования для другого пользователя"
+        )
+    
+    if len(batch.rooms) > settings.BOOKING_BATCH_MAX_ROOMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"В одном групповом бронировании не больше {settings.BOOKING_BATCH_MAX_ROOMS} комнат"
+        )
+    
+    if batch.check_in_date >= batch.check_out_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Дата выезда должна быть позже даты заезда"
+        )
+    
+    user = await Repository(db).get_user(batch.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    
+    hotel = await Repository(db).get_hotel(batch.hotel_id)
+    if not hotel:
+        raise HTTPException(status_code=404, detail="Отель не найден")
+    
+    availability = AvailabilityService(db)
+    requested = {item.room_id: item for item in batch.rooms}
+    
+    # Все комнаты группы под блокировкой до коммита, в порядке id
+    try:
+        rooms = await availability.lock_rooms(list(requested))
+    except OperationalError as e:
+        raise await _lock_timeout_conflict(db, e)
+    
+    missing = sorted(set(requested) - {room.id for room in rooms})
+    if missing:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=f"Комнаты не найдены: {missing}")
+    
+    errors = []
+    for room in rooms:
+        if room.hotel_id != batch.hotel_id:
+            errors.append(f"комната {room.id} не принадлежит указанному отелю")
+        elif room.status != models.RoomStatus.AVAILABLE:
+            errors.append(f"комната {room.room_number} недоступна для бронирования")
+        elif requested[room.id].number_of_guests > room.capacity:
+            errors.append(f"комната {room.room_number} вмещает максимум {room.capacity} гостей")
+    
+    if not errors:
+        busy = await availability.busy_rooms(list(requested), batch.check_in_date, batch.check_out_date)
+        errors = [
+            f"комната {room.room_number} уже забронирована на указанные даты"
+            for room in rooms if room.id in busy
+        ]
+    
+    if errors:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="; ".join(errors))
+    
+    nights = (batch.check_out_date - batch.check_in_date).days
+    db_bookings = []
+    for room in rooms:
+        db_bookings.append(models.Booking(
+            user_id=batch.user_id,
+            hotel_id=batch.hotel_id,
+            room_id=room.id,
+            check_in_date=batch.check_in_date,
+            check_out_date=batch.check_out_date,
+            number_of_guests=requested[room.id].number_of_guests,
+            special_requests=batch.special_requests,
+            total_price=nights * room.price_per_night
+        ))
+        room.status = models.RoomStatus.OCCUPIED
+    
+    db.add_all(db_bookings)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if BOOKING_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(
+                status_code=400,
+                detail="Одна из комнат уже забронирована на указанные даты"
+            )
+        raise
+    except OperationalError as e:
+        raise await _lock_timeout_conflict(db, e)
+    
+    # expire_on_commit=False и значения по умолчанию на стороне Python: refresh не нужен
+    for db_booking in db_bookings:
+        booking_index.add_booking(db_booking)
+    
+    room_ids = [room.id for room in rooms]
+    total_price = sum(db_booking.total_price for db_booking in db_bookings)
+    
+    try:
+        cache_service = CacheService()
+        await cache_service.invalidate_booking_related(user_id=user.id, hotel_id=hotel.id)
+        await cache_service.track_group_booking_stats(hotel.id, room_ids)
+    except Exception as e:
+        print(f"Failed to update booking cache: {e}")
+    
+    try:
+        event_service = BookingEventService()
+        notification_service = NotificationService()
         
-        await cache_service.invalidate_user_cache(user.id)
-        await cache_service.invalidate_hotel_cache(hotel.id)
+        batch_data = {
+            "booking_ids": [db_booking.id for db_booking in db_bookings],
+            "room_ids": room_ids,
+            "user_id": user.id,
+            "hotel_id": hotel.id,
+            "check_in_date": batch.check_in_date,
+            "check_out_date": batch.check_out_date,
+            "total_price": total_price,
+            "booking_references": [db_booking.booking_reference for db_booking in db_bookings],
+            "number_of_guests": sum(db_booking.number_of_guests for db_booking in db_bookings)
+        }
+        
+        await event_service.publish_booking_batch_created(batch_data)
+        
+        await notification_service.send_group_booking_confirmation(
+            user_email=user.email,
+            user_name=f"{user.first_name} {user.last_name}",
+            batch_data={
+                **batch_data,
+                "hotel_name": hotel.name,
+                "room_numbers": [room.room_number for room in rooms]
+            }
+        )
         
     except Exception as e:
         print(f"Failed to publish booking event: {e}")
     
-    return db_booking
+    return {"bookings": db_bookings, "total_price": total_price}
 
 @router.get("/", response_model=List[schemas.BookingWithDetailsRead])
 async def get_bookings(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params(models.Booking, "check_in_date")),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin),
 ):
-    """Получить список всех бронирований"""
-    bookings = db.query(models.Booking).offset(skip).limit(limit).all()
+    """Получить список всех бронирований; следующая страница - по курсору из X-Next-Cursor"""
+    # Один запрос: связи many-to-one подтягиваются JOIN'ом в ту же страницу.
+    # INNER JOIN сразу отсекает брони без комнаты, пользователя или отеля,
+    # поэтому страница не укорачивается после выборки.
+    result = await db.execute(page.apply(
+        select(models.Booking)
+        .options(
+            joinedload(models.Booking.user, innerjoin=True),
+            joinedload(models.Booking.hotel, innerjoin=True),
+            joinedload(models.Booking.room, innerjoin=True)
+        )
+    ))
+    bookings, next_cursor = page.split(result.scalars().all())
+    set_next_cursor(request, response, next_cursor)
     
-    result = []
-    for booking in bookings:
-        try:
-            if booking.room is None:
-                print(f"Warning: Booking {booking.id} has no room assigned")
-                continue
-                
-            if booking.user is None:
-                print(f"Warning: Booking {booking.id} has no user assigned")
-                continue
-                
-            if booking.hotel is None:
-                print(f"Warning: Booking {booking.id} has no hotel assigned")
-                continue
-                
-            booking_data = schemas.BookingWithDetailsRead.model_validate(booking)
-            result.append(booking_data)
-            
-        except Exception as e:
-            print(f"Error processing booking {booking.id}: {e}")
-            continue
-    
-    return result
+    return [schemas.BookingWithDetailsRead.model_validate(booking) for booking in bookings]
 
 @router.get("/{booking_id}", response_model=schemas.BookingWithDetailsRead)
 async def get_booking(
     booking_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)
     ):
     """Получить бронирование по ID с кэшированием"""
@@ -174,7 +354,7 @@ async def get_booking(
     if cached_booking:
         return cached_booking
     
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await Repository(db).get_booking(booking_id, with_details=True)
     if not booking:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     
@@ -184,70 +364,73 @@ async def get_booking(
 
     booking_data = schemas.BookingWithDetailsRead.model_validate(booking)
     
-    await cache_service.cache_booking_details(booking_id, booking_data.model_dump())
+    await cache_service.cache_booking_details(booking_id, booking_data.model_dump(mode="json"))
     
     return booking_data
 
 @router.get("/user/{user_id}/bookings", response_model=List[schemas.BookingWithDetailsRead])
 async def get_user_bookings(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)
     ):
     """Получить все бронирования пользователя с кэшированием"""
     cache_service = CacheService()
     
-    cached_bookings = await cache_service.get_cached_user_bookings(user_id)
-    if cached_bookings:
-        return cached_bookings
-    
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
-
+    # Права проверяются до кэша: закэшированный ответ не должен их обходить
     if current_user.role != models.UserRole.ADMIN and user_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="Недостаточно прав для просмотра бронирований другого пользователя"
-        )    
-
-    bookings = db.query(models.Booking)\
-        .filter(models.Booking.user_id == user_id)\
-        .options(
-            joinedload(models.Booking.user),
-            joinedload(models.Booking.hotel),
-            joinedload(models.Booking.room)
-        )\
-        .all()
-    
-    result = []
-    for booking in bookings:
-        try:
-            if booking.room is None or booking.hotel is None:
-                print(f"Warning: Booking {booking.id} is missing required relations")
-                continue
-                
-            booking_data = schemas.BookingWithDetailsRead.model_validate(booking)
-            result.append(booking_data)
-            
-        except Exception as e:
-            print(f"Error processing booking {booking.id}: {e}")
-            continue
+        )
     
-    if result:
-        await cache_service.cache_user_bookings(user_id, [booking.model_dump() for booking in result])
+    async def load_user_bookings(session: AsyncSession):
+        user = await Repository(session).get_user(user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="Пользователь не найден")
+        
+        bookings = (await session.execute(
+            select(models.Booking)
+            .where(models.Booking.user_id == user_id)
+            .options(
+                joinedload(models.Booking.user),
+                joinedload(models.Booking.hotel),
+                joinedload(models.Booking.room)
+            )
+        )).unique().scalars().all()
+        
+        result = []
+        for booking in bookings:
+            try:
+                if booking.room is None or booking.hotel is None:
+                    print(f"Warning: Booking {booking.id} is missing required relations")
+                    continue
+                    
+                booking_data = schemas.BookingWithDetailsRead.model_validate(booking)
+                result.append(booking_data.model_dump(mode="json"))
+                
+            except Exception as e:
+                print(f"Error processing booking {booking.id}: {e}")
+                continue
+        
+        return result
     
-    return result
+    return await cache_service.get_or_compute(
+        f"user_bookings:{user_id}",
+        load_user_bookings,
+        family="user_bookings",
+        db=db
+    )
 
 @router.put("/{booking_id}", response_model=schemas.BookingRead)
 async def update_booking(
     booking_id: int,
     booking_update: schemas.BookingUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)
 ):
     """Обновить информацию о бронировании"""
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await Repository(db).get_booking(booking_id, with_room=True)
     if not booking:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     
@@ -264,29 +447,77 @@ async def update_booking(
         )
     
     update_data = booking_update.model_dump(exclude_unset=True)
+    dates_changed = 'check_in_date' in update_data or 'check_out_date' in update_data
+    
+    if dates_changed:
+        check_in = update_data.get('check_in_date') or booking.check_in_date
+        check_out = update_data.get('check_out_date') or booking.check_out_date
+        if check_in >= check_out:
+            raise HTTPException(
+                status_code=400,
+                detail="Дата выезда должна быть позже даты заезда"
+            )
+        
+        # Как при создании: новые даты проверяются под блокировкой комнаты
+        availability = AvailabilityService(db)
+        try:
+            await availability.lock_room(booking.room_id)
+        except OperationalError as e:
+            raise await _lock_timeout_conflict(db, e)
+        
+        room_is_free = await availability.is_room_free(
+            booking.room_id,
+            check_in,
+            check_out,
+            authoritative=True,
+            exclude_booking_id=booking.id
+        )
+        if not room_is_free:
+            await db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail="Комната уже забронирована на указанные даты"
+            )
+    
     for field, value in update_data.items():
         setattr(booking, field, value)
     
-    if 'check_in_date' in update_data or 'check_out_date' in update_data:
+    if dates_changed:
         nights = (booking.check_out_date - booking.check_in_date).days
         booking.total_price = nights * booking.room.price_per_night
     
-    db.commit()
-    db.refresh(booking)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if BOOKING_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(
+                status_code=400,
+                detail="Комната уже забронирована на указанные даты"
+            )
+        raise
+    except OperationalError as e:
+        raise await _lock_timeout_conflict(db, e)
+    await db.refresh(booking)
+    
+    booking_index.add_booking(booking)
 
     cache_service = CacheService()
-    await cache_service.invalidate_booking_cache(booking_id)
-    await cache_service.invalidate_user_cache(booking.user_id)
+    await cache_service.invalidate_booking_related(
+        booking_id=booking_id,
+        user_id=booking.user_id,
+        hotel_id=booking.hotel_id
+    )
     
     return booking
 
 @router.put("/{booking_id}/cancel", response_model=schemas.MessageResponse)
 async def cancel_booking(
     booking_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)):
     """Отменить бронирование"""
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await Repository(db).get_booking(booking_id, with_room=True)
     if not booking:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     
@@ -306,24 +537,30 @@ async def cancel_booking(
     room.status = models.RoomStatus.AVAILABLE
     
     booking.status = models.BookingStatus.CANCELLED
-    db.commit()
+    await db.commit()
+    
+    booking_index.remove(booking_id)
     
     cache_service = CacheService()
-    await cache_service.invalidate_booking_cache(booking_id)
-    await cache_service.invalidate_user_cache(booking.user_id)
-    await cache_service.invalidate_hotel_cache(booking.hotel_id)
+    await cache_service.invalidate_booking_related(
+        booking_id=booking_id,
+        user_id=booking.user_id,
+        hotel_id=booking.hotel_id
+    )
     
     return {"message": "Бронирование успешно отменено"}
 
 @router.put("/{booking_id}/check-in", response_model=schemas.MessageResponse)
-async def check_in_booking(booking_id: int, db: Session = Depends(get_db)):
+async def check_in_booking(booking_id: int, db: AsyncSession = Depends(get_db)):
     """Зарегистрировать заезд гостя"""
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await Repository(db).get_booking(booking_id, with_room=True)
     if not booking:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     
     booking.status = models.BookingStatus.CHECKED_IN
-    db.commit()
+    await db.commit()
+    
+    booking_index.add_booking(booking)
     
     cache_service = CacheService()
     await cache_service.invalidate_booking_cache(booking_id)
@@ -331,9 +568,9 @@ async def check_in_booking(booking_id: int, db: Session = Depends(get_db)):
     return {"message": "Заезд успешно зарегистрирован"}
 
 @router.put("/{booking_id}/check-out", response_model=schemas.MessageResponse)
-async def check_out_booking(booking_id: int, db: Session = Depends(get_db)):
+async def check_out_booking(booking_id: int, db: AsyncSession = Depends(get_db)):
     """Зарегистрировать выезд гостя"""
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+    booking = await Repository(db).get_booking(booking_id, with_room=True)
     if not booking:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
     
@@ -345,19 +582,20 @@ async def check_out_booking(booking_id: int, db: Session = Depends(get_db)):
     room = booking.room
     room.status = models.RoomStatus.CLEANING 
     
-    db.commit()
+    await db.commit()
+    
+    booking_index.remove(booking_id)
     
     cache_service = CacheService()
-    await cache_service.invalidate_booking_cache(booking_id)
-    await cache_service.invalidate_hotel_cache(booking.hotel_id)
+    await cache_service.invalidate_booking_related(booking_id=booking_id, hotel_id=booking.hotel_id)
     
     return {"message": "Выезд успешно зарегистрирован"}
 
 @router.delete("/{booking_id}", response_model=schemas.MessageResponse)
-async def delete_booking(booking_id: int, db: Session = Depends(get_db)):
+async def delete_booking(booking_id: int, db: AsyncSession = Depends(get_db)):
     """Удалить бронирование"""
     try:
-        booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+        booking = await Repository(db).get_booking(booking_id, with_room=True)
         if not booking:
             raise HTTPException(status_code=404, detail="Бронирование не найдено")
         
@@ -366,20 +604,24 @@ async def delete_booking(booking_id: int, db: Session = Depends(get_db)):
             if room:
                 room.status = "available"
         
-        db.delete(booking)
-        db.commit()
+        await db.delete(booking)
+        await db.commit()
+        
+        booking_index.remove(booking_id)
         
         try:
             cache_service = CacheService()
-            await cache_service.invalidate_booking_cache(booking_id)
-            await cache_service.invalidate_user_cache(booking.user_id)
-            await cache_service.invalidate_hotel_cache(booking.hotel_id)
+            await cache_service.invalidate_booking_related(
+                booking_id=booking_id,
+                user_id=booking.user_id,
+                hotel_id=booking.hotel_id
+            )
         except Exception as cache_error:
             print(f"Cache error: {cache_error}")
         
         return {"message": "Бронирование успешно удалено"}
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting booking {booking_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ошибка при удалении бронирования: {str(e)}")
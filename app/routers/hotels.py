@@ -1,67 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List, Optional
 import app.models.hotels as models
 import app.schemas.schemas as schemas
 from app.database import get_db
-from app.services.cache_service import CacheService
+from app.services.cache_service import CacheService, HOTELS_LIST_TAG, hotel_tag, search_key
+from app.services.booking_index import booking_index
+from app.services.repository import Repository
+from app.services.bulk_import import BulkImportService, detect_format, parse_rows
+from app.services.inventory_removal import InventoryRemovalService
+from app.services.booking_stats import BookingStatsService
 from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.pagination import PageParams, page_params, set_next_cursor
 
 router = APIRouter(prefix="/hotels", tags=["hotels"])
 
 @router.get("/", response_model=List[schemas.HotelRead])
 async def get_hotels(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
     city: Optional[str] = None,
     country: Optional[str] = None,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(page_params(models.Hotel, "name")),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Получить список отелей с кэшированием"""
+    """Получить список отелей с кэшированием; следующая страница - по курсору из X-Next-Cursor"""
     cache_service = CacheService()
     
-    cache_key = f"hotels:skip:{skip}:limit:{limit}:city:{city}:country:{country}"
-    cached_result = await cache_service.get_cached_rooms({"cache_key": cache_key})
+    cache_key = f"hotels:{page.cache_key}:city:{city}:country:{country}"
     
-    if cached_result:
-        return cached_result
-    
-    """Получить список отелей с фильтрацией"""
-    print("GET /hotels/ request received")
-    
-    try:
-        query = db.query(models.Hotel)
+    async def load_hotels(session: AsyncSession):
+        """Получить страницу отелей с фильтрацией"""
+        print("GET /hotels/ request received")
+        
+        query = select(models.Hotel)
         
         if city:
-            query = query.filter(models.Hotel.city == city)
+            query = query.where(models.Hotel.city == city)
         if country:
-            query = query.filter(models.Hotel.country == country)
-        
-        hotels = query.offset(skip).limit(limit).all()
-        
-        if not hotels:
-            return []
+            query = query.where(models.Hotel.country == country)
         
-        result = []
-        for hotel in hotels:
-            try:
-                hotel_read = schemas.HotelRead.model_validate(hotel)
-                result.append(hotel_read)
-            except Exception as conv_error:
-                print(f"Error converting hotel {hotel.id}: {conv_error}")
-                print(f"Hotel data: {hotel.__dict__}")
-                raise conv_error
-        
-        hotels_data = [schemas.HotelRead.model_validate(hotel).model_dump() for hotel in hotels]
-        await cache_service.cache_available_rooms(
-            {"cache_key": cache_key}, 
-            hotels_data, 
-            expire=300 
+        result = await session.execute(page.apply(query))
+        hotels, next_cursor = page.split(result.scalars().all())
+        return {
+            "items": [schemas.HotelRead.model_validate(hotel).model_dump(mode="json") for hotel in hotels],
+            "next_cursor": next_cursor,
+        }
+    
+    try:
+        cached_page = await cache_service.get_or_compute(
+            search_key({"cache_key": cache_key}),
+            load_hotels,
+            family="hotels",
+            db=db,
+            tags=[HOTELS_LIST_TAG],
+            local=True
         )
-        
-        return result
+        set_next_cursor(request, response, cached_page["next_cursor"])
+        return cached_page["items"]
         
     except Exception as e:
         print(f"CRITICAL ERROR in get_hotels: {str(e)}")
@@ -71,28 +69,55 @@ async def get_hotels(
         raise HTTPException(status_code=500, detail=f"Ошибка при получении отелей: {str(e)}")
 
 @router.get("/{hotel_id}", response_model=schemas.HotelRead)
-async def get_hotel(hotel_id: int, db: Session = Depends(get_db)):
+async def get_hotel(hotel_id: int, db: AsyncSession = Depends(get_db)):
     """Получить отель по ID с кэшированием"""
     cache_service = CacheService()
     
-    cached_hotel = await cache_service.get_cached_hotel(hotel_id)
-    if cached_hotel:
-        return cached_hotel
+    async def load_hotel(session: AsyncSession):
+        hotel = await Repository(session).get_hotel(hotel_id)
+        if not hotel:
+            raise HTTPException(status_code=404, detail="Отель не найден")
+        return schemas.HotelRead.model_validate(hotel).model_dump(mode="json")
     
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == hotel_id).first()
+    return await cache_service.get_or_compute(
+        f"hotel:{hotel_id}",
+        load_hotel,
+        family="hotels",
+        db=db,
+        tags=[hotel_tag(hotel_id)],
+        local=True
+    )
+
+@router.get("/{hotel_id}/stats", response_model=schemas.HotelStatsRead)
+async def get_hotel_stats(
+    hotel_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_admin)):
+    """Бронирования, выручка и проданные ночи отеля за всю историю: одна строка hotel_stats"""
+    hotel = await Repository(db).get_hotel(hotel_id)
     if not hotel:
         raise HTTPException(status_code=404, detail="Отель не найден")
-    
-    hotel_data = schemas.HotelRead.model_validate(hotel)
-    
-    await cache_service.cache_hotel(hotel_id, hotel_data.model_dump())
-    
-    return hotel_data
+    return await BookingStatsService(db).hotel_stats(hotel_id)
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_hotels(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="По умолчанию - по Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_admin)):
+    """
+    Массовый импорт отелей из потока NDJSON (application/x-ndjson) или CSV
+    (text/csv, первая строка - заголовок). Поля - как у POST /hotels/.
+    Тело читается потоком, строки проверяются и вставляются пачками;
+    ошибочные строки отклоняются с номером строки в ответе.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    return await BulkImportService(db).import_hotels(parse_rows(request.stream(), fmt))
 
 @router.post("/", response_model=schemas.HotelRead)
 async def create_hotel(
     hotel: schemas.HotelCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)):
     """Создать новый отель"""
     print(f"Received hotel data: {hotel.model_dump()}")
@@ -100,8 +125,8 @@ async def create_hotel(
     try:
         db_hotel = models.Hotel(**hotel.model_dump())
         db.add(db_hotel)
-        db.commit()
-        db.refresh(db_hotel)
+        await db.commit()
+        await db.refresh(db_hotel)
         print(f"Hotel created successfully: {db_hotel.id}")
         
         cache_service = CacheService()
@@ -109,7 +134,7 @@ async def create_hotel(
         
         return db_hotel
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error creating hotel: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Ошибка при создании отеля: {str(e)}")
 
@@ -117,11 +142,11 @@ async def create_hotel(
 async def update_hotel(
     hotel_id: int, 
     hotel_update: schemas.HotelUpdate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
     """Обновить информацию об отеле"""
-    db_hotel = db.query(models.Hotel).filter(models.Hotel.id == hotel_id).first()
+    db_hotel = await Repository(db).get_hotel(hotel_id)
     if not db_hotel:
         raise HTTPException(status_code=404, detail="Отель не найден")
     
@@ -129,52 +154,48 @@ async def update_hotel(
     for field, value in update_data.items():
         setattr(db_hotel, field, value)
     
-    db.commit()
-    db.refresh(db_hotel)
+    await db.commit()
+    await db.refresh(db_hotel)
     
     cache_service = CacheService()
     await cache_service.invalidate_hotel_cache(hotel_id)
     
     return db_hotel
 
-@router.delete("/{hotel_id}", response_model=schemas.MessageResponse)
+@router.delete("/{hotel_id}", response_model=schemas.HotelDeleteResponse)
 async def delete_hotel(
     hotel_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)):
-    """Удалить отель и все связанные данные"""
+    """
+    Удалить отель и все связанные данные. Бронирования удаляются
+    пачками set-based запросами, кэш инвалидируется одним проходом в конце.
+    """
     try:
-        db_hotel = db.query(models.Hotel).filter(models.Hotel.id == hotel_id).first()
+        db_hotel = await Repository(db).get_hotel(hotel_id)
         if not db_hotel:
             raise HTTPException(status_code=404, detail="Отель не найден")
         
-        bookings_deleted = db.query(models.Booking).filter(
-            models.Booking.hotel_id == hotel_id
-        ).delete()
-        
-        rooms_deleted = db.query(models.Room).filter(
-            models.Room.hotel_id == hotel_id
-        ).delete()
-        
         hotel_name = db_hotel.name
-        db.delete(db_hotel)
-        db.commit()
+        removed = await InventoryRemovalService(db).remove_hotel(db_hotel)
+        
+        booking_index.remove_rooms(removed["room_ids"])
         
         try:
             cache_service = CacheService()
-            await cache_service.invalidate_hotel_cache(hotel_id)
+            await cache_service.invalidate_removed_inventory(hotel_id, removed["booking_ids"], removed["user_ids"])
         except Exception as cache_error:
             print(f"Cache error: {cache_error}")
         
         return {
             "message": f"Отель '{hotel_name}' и все связанные данные успешно удалены",
             "hotel_id": hotel_id,
-            "bookings_deleted": bookings_deleted,
-            "rooms_deleted": rooms_deleted
+            "bookings_deleted": len(removed["booking_ids"]),
+            "rooms_deleted": removed["rooms_deleted"]
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting hotel {hotel_id}: {str(e)}")
         import traceback
         traceback.print_exc()
@@ -1,48 +1,73 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, datetime
 import app.models.hotels as models
 import app.schemas.schemas as schemas
 import app.core.enums as enums
 from app.database import get_db
-from app.services.cache_service import CacheService
+from app.services.cache_service import (
+    CacheService,
+    ROOMS_LIST_TAG,
+    AVAILABILITY_TAG,
+    hotel_tag,
+    availability_tag,
+    search_key,
+    search_tags,
+)
+from app.services.availability_service import AvailabilityService
+from app.services.booking_index import booking_index
+from app.services.repository import Repository
+from app.services.bulk_import import BulkImportService, detect_format, parse_rows
+from app.services.inventory_removal import InventoryRemovalService
+from app.services.booking_stats import BookingStatsService
 from app.core.dependencies import require_admin
+from app.core.pagination import PageParams, page_params, set_next_cursor
 
 router = APIRouter(prefix="/rooms", tags=["rooms"])
 
 @router.get("/", response_model=List[schemas.RoomRead])
 async def get_rooms(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    response: Response,
     hotel_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    page: PageParams = Depends(page_params(models.Room, "price_per_night")),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Получить список комнат с кэшированием"""
+    """Получить список комнат с кэшированием; следующая страница - по курсору из X-Next-Cursor"""
     cache_service = CacheService()
     
-    cache_key = f"rooms:skip:{skip}:limit:{limit}:hotel_id:{hotel_id}"
-    cached_result = await cache_service.get_cached_rooms({"cache_key": cache_key})
-    
-    if cached_result:
-        return cached_result
-    
-    query = db.query(models.Room)
-    
+    cache_key = f"rooms:{page.cache_key}:hotel_id:{hotel_id}"
+    # Статусы комнат меняются бронированиями - выборка помечена и тегом доступности
     if hotel_id:
-        query = query.filter(models.Room.hotel_id == hotel_id)
+        cache_tags = [hotel_tag(hotel_id), availability_tag(hotel_id)]
+    else:
+        cache_tags = [ROOMS_LIST_TAG, AVAILABILITY_TAG]
     
-    rooms = query.offset(skip).limit(limit).all()
-    
-    rooms_data = [schemas.RoomRead.model_validate(room).model_dump() for room in rooms]
+    async def load_rooms(session: AsyncSession):
+        query = select(models.Room)
+        
+        if hotel_id:
+            query = query.where(models.Room.hotel_id == hotel_id)
+        
+        result = await session.execute(page.apply(query))
+        rooms, next_cursor = page.split(result.scalars().all())
+        return {
+            "items": [schemas.RoomRead.model_validate(room).model_dump(mode="json") for room in rooms],
+            "next_cursor": next_cursor,
+        }
     
-    await cache_service.cache_available_rooms(
-        {"cache_key": cache_key}, 
-        rooms_data, 
-        expire=300
+    cached_page = await cache_service.get_or_compute(
+        search_key({"cache_key": cache_key}),
+        load_rooms,
+        family="rooms",
+        db=db,
+        tags=cache_tags,
+        local=True
     )
-    
-    return rooms
+    set_next_cursor(request, response, cached_page["next_cursor"])
+    return cached_page["items"]
 
 @router.get("/available", response_model=List[schemas.RoomRead])
 async def get_available_rooms(
@@ -51,7 +76,7 @@ async def get_available_rooms(
     check_out_date: date,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Найти доступные комнаты в отеле на указанные даты с кэшированием"""
     cache_service = CacheService()
@@ -64,10 +89,6 @@ async def get_available_rooms(
         "max_price": max_price
     }
     
-    cached_rooms = await cache_service.get_cached_rooms(search_params)
-    if cached_rooms:
-        return cached_rooms
-    
     if check_in_date >= check_out_date:
         raise HTTPException(
             status_code=400,
@@ -80,39 +101,28 @@ async def get_available_rooms(
             detail="Дата заезда не может быть в прошлом"
         )
     
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == hotel_id).first()
-    if not hotel:
-        raise HTTPException(status_code=404, detail="Отель не найден")
-    
-    query = db.query(models.Room).filter(
-        models.Room.hotel_id == hotel_id,
-        models.Room.status == models.RoomStatus.AVAILABLE
-    )
-    
-    if min_price is not None:
-        query = query.filter(models.Room.price_per_night >= min_price)
-    if max_price is not None:
-        query = query.filter(models.Room.price_per_night <= max_price)
-    
-    all_rooms = query.all()
-    
-    available_rooms = []
-    for room in all_rooms:
-        conflicting_booking = db.query(models.Booking).filter(
-            models.Booking.room_id == room.id,
-            models.Booking.status.in_([models.BookingStatus.CONFIRMED, models.BookingStatus.CHECKED_IN]),
-            models.Booking.check_in_date < check_out_date,
-            models.Booking.check_out_date > check_in_date
-        ).first()
+    async def load_available_rooms(session: AsyncSession):
+        hotel = await Repository(session).get_hotel(hotel_id)
+        if not hotel:
+            raise HTTPException(status_code=404, detail="Отель не найден")
         
-        if not conflicting_booking:
-            available_rooms.append(room)
-    
-    rooms_data = [schemas.RoomRead.model_validate(room).model_dump() for room in available_rooms]
-    
-    await cache_service.cache_available_rooms(search_params, rooms_data)
-    
-    return available_rooms
+        available_rooms = await AvailabilityService(session).get_available_rooms(
+            hotel_id,
+            check_in_date,
+            check_out_date,
+            min_price=min_price,
+            max_price=max_price
+        )
+        return [schemas.RoomRead.model_validate(room).model_dump(mode="json") for room in available_rooms]
+    
+    # После инвалидации популярного отеля поиск пересчитывает один запрос, остальные ждут
+    return await cache_service.get_or_compute(
+        search_key(search_params),
+        load_available_rooms,
+        family="rooms_search",
+        db=db,
+        tags=search_tags(search_params)
+    )
 
 @router.get("/search/available", response_model=List[schemas.RoomWithHotelRead])
 async def search_available_rooms(
@@ -124,46 +134,28 @@ async def search_available_rooms(
     guests: Optional[int] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Поиск доступных комнат с фильтрами"""
     try:
         print(f"🔍 Поиск комнат: city={city}, check_in={check_in}, check_out={check_out}")
         
-        query = db.query(models.Room).join(models.Hotel)
-        
-        if city:
-            query = query.filter(models.Hotel.city.ilike(f"%{city}%"))
-        if country:
-            query = query.filter(models.Hotel.country.ilike(f"%{country}%"))
-        
-        if room_type:
-            query = query.filter(models.Room.room_type.ilike(f"%{room_type}%"))
-        if guests:
-            query = query.filter(models.Room.capacity >= guests)
-        if min_price is not None:
-            query = query.filter(models.Room.price_per_night >= min_price)
-        if max_price is not None:
-            query = query.filter(models.Room.price_per_night <= max_price)
-        
-        query = query.filter(models.Room.status == "available")
-        
-        if check_in and check_out:
-            if check_in >= check_out:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Дата выезда должна быть позже даты заезда"
-                )
-            
-            booked_rooms_subquery = db.query(models.Booking.room_id).filter(
-                models.Booking.status.in_(["confirmed", "checked_in"]),
-                models.Booking.check_in_date < check_out,
-                models.Booking.check_out_date > check_in
-            ).subquery()
-            
-            query = query.filter(~models.Room.id.in_(booked_rooms_subquery))
+        if check_in and check_out and check_in >= check_out:
+            raise HTTPException(
+                status_code=400,
+                detail="Дата выезда должна быть позже даты заезда"
+            )
         
-        available_rooms = query.all()
+        available_rooms = await AvailabilityService(db).search_available_rooms(
+            city=city,
+            country=country,
+            room_type=room_type,
+            check_in=check_in,
+            check_out=check_out,
+            guests=guests,
+            min_price=min_price,
+            max_price=max_price
+        )
         
         print(f"Найдено {len(available_rooms)} доступных комнат")
         
@@ -181,27 +173,54 @@ async def search_available_rooms(
         )
 
 @router.get("/{room_id}", response_model=schemas.RoomWithHotelRead)
-async def get_room(room_id: int, db: Session = Depends(get_db)):
+async def get_room(room_id: int, db: AsyncSession = Depends(get_db)):
     """Получить комнату по ID"""
-    room = db.query(models.Room).filter(models.Room.id == room_id).first()
+    room = await Repository(db).get_room(room_id, with_hotel=True)
     if not room:
         raise HTTPException(status_code=404, detail="Комната не найдена")
     return room
 
+@router.get("/{room_id}/stats", response_model=schemas.RoomStatsRead)
+async def get_room_stats(
+    room_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_admin)
+):
+    """Бронирования, выручка и проданные ночи комнаты за всю историю: одна строка room_stats"""
+    room = await Repository(db).get_room(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Комната не найдена")
+    return await BookingStatsService(db).room_stats(room)
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_rooms(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="По умолчанию - по Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_admin)):
+    """
+    Массовый импорт комнат из потока NDJSON (application/x-ndjson) или CSV
+    (text/csv, первая строка - заголовок). Поля - как у POST /rooms/; номер, уже занятый в отеле, отклоняется.
+    Тело читается потоком, строки проверяются и вставляются пачками;
+    ошибочные строки отклоняются с номером строки в ответе.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    return await BulkImportService(db).import_rooms(parse_rows(request.stream(), fmt))
+
 @router.post("/", response_model=schemas.RoomRead)
 async def create_room(
     room: schemas.RoomCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)):
     """Создать новую комнату"""
-    hotel = db.query(models.Hotel).filter(models.Hotel.id == room.hotel_id).first()
+    hotel = await Repository(db).get_hotel(room.hotel_id)
     if not hotel:
         raise HTTPException(status_code=404, detail="Отель не найден")
     
-    existing_room = db.query(models.Room).filter(
+    existing_room = (await db.execute(select(models.Room).where(
         models.Room.hotel_id == room.hotel_id,
         models.Room.room_number == room.room_number
-    ).first()
+    ))).scalars().first()
     
     if existing_room:
         raise HTTPException(
@@ -211,8 +230,8 @@ async def create_room(
     
     db_room = models.Room(**room.model_dump())
     db.add(db_room)
-    db.commit()
-    db.refresh(db_room)
+    await db.commit()
+    await db.refresh(db_room)
     
     cache_service = CacheService()
     await cache_service.invalidate_hotel_cache(room.hotel_id)
@@ -223,19 +242,19 @@ async def create_room(
 async def update_room(
     room_id: int,
     room_update: schemas.RoomUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
     """Обновить информацию о комнате"""
-    room = db.query(models.Room).filter(models.Room.id == room_id).first()
+    room = await Repository(db).get_room(room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Комната не найдена")
     
     if room_update.room_number and room_update.room_number != room.room_number:
-        existing_room = db.query(models.Room).filter(
+        existing_room = (await db.execute(select(models.Room).where(
             models.Room.hotel_id == room.hotel_id,
             models.Room.room_number == room_update.room_number
-        ).first()
+        ))).scalars().first()
         if existing_room:
             raise HTTPException(
                 status_code=400,
@@ -246,8 +265,8 @@ async def update_room(
     for field, value in update_data.items():
         setattr(room, field, value)
     
-    db.commit()
-    db.refresh(room)
+    await db.commit()
+    await db.refresh(room)
     
     cache_service = CacheService()
     await cache_service.invalidate_hotel_cache(room.hotel_id)
@@ -258,11 +277,11 @@ async def update_room(
 async def update_room_status(
     room_id: int,
     status: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)
 ):
     """Обновить статус комнаты"""
-    room = db.query(models.Room).filter(models.Room.id == room_id).first()
+    room = await Repository(db).get_room(room_id)
     if not room:
         raise HTTPException(status_code=404, detail="Комната не найдена")
     
@@ -274,51 +293,41 @@ async def update_room_status(
         )
     
     room.status = status
-    db.commit()
+    await db.commit()
+    
+    cache_service = CacheService()
+    await cache_service.invalidate_hotel_cache(room.hotel_id)
     
     return {"message": f"Статус комнаты обновлен на {status}"}
 
 
-@router.delete("/{room_id}", response_model=schemas.MessageResponse)
-def delete_room(
+@router.delete("/{room_id}", response_model=schemas.RoomDeleteResponse)
+async def delete_room(
     room_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)):
-    """Удалить комнату с обработкой активных бронирований"""
+    """
+    Удалить комнату: активные бронирования отменяются, история
+    остается без привязки к комнате. Бронирования меняются пачками
+    set-based запросами, кэш инвалидируется одним проходом в конце.
+    """
     try:
-        db_room = db.query(models.Room).filter(models.Room.id == room_id).first()
+        db_room = await Repository(db).get_room(room_id)
         if not db_room:
             raise HTTPException(status_code=404, detail="Комната не найдена")
         
         room_number = db_room.room_number
         hotel_id = db_room.hotel_id
         
-        all_bookings = db.query(models.Booking).filter(
-            models.Booking.room_id == room_id
-        ).all()
-        
-        current_time = datetime.now()
-        active_bookings = []
-        
-        for booking in all_bookings:
-            if booking.status in ["confirmed", "checked_in"]:
-                booking.status = "cancelled"
-                booking.cancellation_reason = f"Комната #{room_number} удалена из системы"
-                booking.cancelled_at = current_time
-                active_bookings.append(booking)
-                print(f"Cancelled booking {booking.id}")
-        
-        print(f"Cancelled {len(active_bookings)} active bookings for room {room_id}")
+        removed = await InventoryRemovalService(db).remove_room(db_room)
+        cancelled_ids = removed["cancelled_booking_ids"]
+        print(f"Cancelled {len(cancelled_ids)} active bookings for room {room_id}")
         
-        db.delete(db_room)
-        db.commit()
+        booking_index.remove_rooms([room_id])
         
         try:
             cache_service = CacheService()
-            cache_service.invalidate_room_cache(room_id)
-            cache_service.invalidate_hotel_cache(hotel_id)
-            cache_service.invalidate_pattern("rooms_search:*")
-            cache_service.invalidate_pattern(f"hotel_rooms:{hotel_id}:*")
+            await cache_service.invalidate_removed_inventory(hotel_id, removed["booking_ids"], removed["user_ids"])
         except Exception as cache_error:
             print(f"Cache error: {cache_error}")
         
@@ -326,14 +335,14 @@ def delete_room(
             "message": f"Комната {room_number} успешно удалена",
             "details": {
                 "room_id": room_id,
-                "cancelled_active_bookings": len(active_bookings),
-                "preserved_completed_bookings": len(all_bookings) - len(active_bookings),
-                "cancelled_booking_ids": [b.id for b in active_bookings]
+                "cancelled_active_bookings": len(cancelled_ids),
+                "preserved_completed_bookings": removed["preserved_bookings"],
+                "cancelled_booking_ids": cancelled_ids
             }
         }
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error deleting room {room_id}: {str(e)}")
         import traceback
         traceback.print_exc()
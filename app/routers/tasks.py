@@ -1,24 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, replica_router
 from app.services.cache_service import CacheService
+from app.services.booking_index import booking_index
+from app.services.occupancy_matrix import occupancy_matrix
 from app.tasks.email_tasks import send_booking_confirmation_email
-from app.tasks.report_tasks import generate_hotel_report
+from app.tasks.report_tasks import generate_hotel_report, cleanup_old_data
 from app.tasks.analytics_tasks import analyze_booking_trends
 from app.core.celery import celery_app
 import app.schemas.schemas as schemas
 from app.core.enums import UserRole
 from app.core.security import get_password_hash 
+from app.core.query_stats import compiled_cache_stats, query_metrics
+from app.core.pool_telemetry import pool_info
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 @router.post("/init-mock-data", response_model=schemas.MessageResponse)
-async def init_mock_data():
-    """Инициализировать моковые данные (для разработки)"""
+def init_mock_data():
+    """
+    Инициализировать моковые данные (для разработки).
+    Обычный def: синхронная сессия и хеширование паролей выполняются
+    в пуле потоков FastAPI и не блокируют цикл событий.
+    """
     try:
         from app.database import SessionLocal, engine
-        from app.models.hotels import Hotel, Room, User, Booking
+        from app.models.hotels import Hotel, Room, User, Booking, RoomNight, ArchivedBooking, HotelStats, RoomStats
         from app.database import Base
         from datetime import datetime, timedelta
         from app.core.security import get_password_hash 
@@ -28,6 +37,10 @@ async def init_mock_data():
         db = SessionLocal()
         
         try:
+            db.query(RoomNight).delete()
+            db.query(RoomStats).delete()
+            db.query(HotelStats).delete()
+            db.query(ArchivedBooking).delete()
             db.query(Booking).delete()
             db.query(Room).delete()
             db.query(Hotel).delete()
@@ -458,6 +471,12 @@ async def init_mock_data():
             
             db.commit()
             
+            # Бронирования удалены и созданы заново в обход роутеров
+            if settings.BOOKING_INDEX_ENABLED:
+                booking_index.rebuild(db)
+            if settings.OCCUPANCY_MATRIX_ENABLED:
+                occupancy_matrix.rebuild(db)
+            
             admin_count = len([u for u in users if u.role == UserRole.ADMIN])
             user_count = len([u for u in users if u.role == UserRole.USER])
             
@@ -502,7 +521,7 @@ def get_room_amenities(room_type: str) -> str:
     return amenities_by_type.get(room_type, base_amenities)
 
 @router.post("/send-booking-confirmation", response_model=schemas.TaskResponse)
-async def send_booking_confirmation_task(
+def send_booking_confirmation_task(
     task_data: schemas.EmailTaskData,
     background_tasks: BackgroundTasks
 ):
@@ -523,7 +542,7 @@ async def send_booking_confirmation_task(
         raise HTTPException(status_code=500, detail=f"Failed to queue email task: {str(e)}")
 
 @router.post("/generate-report", response_model=schemas.TaskResponse)
-async def generate_hotel_report_task(
+def generate_hotel_report_task(
     report_data: schemas.ReportTaskData,
     background_tasks: BackgroundTasks
 ):
@@ -545,7 +564,7 @@ async def generate_hotel_report_task(
         raise HTTPException(status_code=500, detail=f"Failed to queue report task: {str(e)}")
 
 @router.post("/analyze-bookings", response_model=schemas.TaskResponse)
-async def analyze_bookings_task(
+def analyze_bookings_task(
     analytics_data: schemas.AnalyticsTaskData,
     background_tasks: BackgroundTasks
 ):
@@ -564,9 +583,26 @@ async def analyze_bookings_task(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to queue analytics task: {str(e)}")
 
+@router.post("/cleanup-old-data", response_model=schemas.TaskResponse)
+def cleanup_old_data_task(cleanup_data: schemas.CleanupTaskData):
+    """Запустить перенос старых завершенных и отмененных бронирований в архив"""
+    try:
+        task = cleanup_old_data.delay(
+            retention_days=cleanup_data.retention_days,
+            batch_size=cleanup_data.batch_size
+        )
+        
+        return {
+            "task_id": task.id,
+            "status": "queued",
+            "message": "Cleanup task queued successfully"
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue cleanup task: {str(e)}")
+
 @router.get("/status/{task_id}", response_model=schemas.TaskStatusResponse)
-async def get_task_status(task_id: str):
-    """Получить статус задачи Celery"""
+def get_task_status(task_id: str):
+    """Получить статус задачи Celery (обращение к backend блокирующее - выполняется в пуле потоков)"""
     try:
         task_result = celery_app.AsyncResult(task_id)
         
@@ -581,6 +617,9 @@ async def get_task_status(task_id: str):
                 response_data["result"] = task_result.result
             else:
                 response_data["error"] = str(task_result.result)
+        elif task_result.status == "PROGRESS":
+            # Промежуточный прогресс, который задача сообщает через update_state
+            response_data["result"] = task_result.info
         
         return response_data
     except Exception as e:
@@ -592,10 +631,26 @@ async def get_cache_stats():
     try:
         cache_service = CacheService()
         stats = await cache_service.get_booking_stats()
+        stats["tiers"] = cache_service.get_tier_stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get cache stats: {str(e)}")
 
+@router.get("/db/stats", response_model=Dict[str, Any])
+async def get_db_stats():
+    """
+    Статистика SQL по эндпоинтам (запросы, время в БД, повторы форм, ожидание пула),
+    пулы соединений и кэш скомпилированных запросов
+    """
+    return {
+        "n_plus_one_threshold": settings.QUERY_STATS_N_PLUS_ONE_THRESHOLD,
+        "routes": query_metrics.info(),
+        "read_replica": replica_router.info(),
+        "pools": pool_info(),
+        "compiled_cache": compiled_cache_stats.info(),
+        "occupancy_matrix": occupancy_matrix.info(),
+    }
+
 @router.post("/cache/clear", response_model=schemas.MessageResponse)
 async def clear_cache(pattern: str = "*"):
     """Очистить кэш по шаблону"""
@@ -603,10 +658,8 @@ async def clear_cache(pattern: str = "*"):
         cache_service = CacheService()
         manager = await cache_service._get_manager()
         
-        keys = await manager.keys(pattern)
-        for key in keys:
-            await manager.delete_key(key)
+        deleted = await manager.delete_pattern(pattern)
         
-        return {"message": f"Cache cleared for pattern: {pattern}, deleted {len(keys)} keys"}
+        return {"message": f"Cache cleared for pattern: {pattern}, deleted {deleted} keys"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear cache: {str(e)}")
\ No newline at end of file
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import app.models.hotels as models
 import app.schemas.schemas as schemas
 from app.database import get_db
 from app.services.cache_service import CacheService
+from app.services.repository import Repository
+from app.services.bulk_import import BulkImportService, detect_format, parse_rows
 from app.core.dependencies import get_current_user_jwt as get_current_user, require_admin_jwt as require_admin, require_user_jwt as require_user, require_user_or_admin_jwt as require_user_or_admin
 from app.core.enums import UserRole
+from app.core.pagination import PageParams, page_params, set_next_cursor
 from app.core.security import get_password_hash, verify_password, create_access_token
 from datetime import timedelta
 from app.config import settings
@@ -14,9 +18,9 @@ from app.config import settings
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/debug/users")
-async def debug_users(db: Session = Depends(get_db)):
+async def debug_users(db: AsyncSession = Depends(get_db)):
     """Отладочный endpoint для проверки пользователей"""
-    users = db.query(models.User).all()
+    users = (await db.execute(select(models.User))).scalars().all()
     result = []
     for user in users:
         result.append({
@@ -28,13 +32,29 @@ async def debug_users(db: Session = Depends(get_db)):
         })
     return result
 
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$", description="По умолчанию - по Content-Type"),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_admin)):
+    """
+    Массовый импорт пользователей из потока NDJSON (application/x-ndjson) или CSV
+    (text/csv, первая строка - заголовок). Поля - как у POST /users/, но вместо
+    password можно передать готовый hashed_password.
+    Тело читается потоком, строки проверяются и вставляются пачками;
+    ошибочные строки отклоняются с номером строки в ответе.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    return await BulkImportService(db).import_users(parse_rows(request.stream(), fmt))
+
 @router.post("/", response_model=schemas.UserRead)
 async def create_user(
     user: schemas.UserCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin)):
     """Создать нового пользователя"""
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = (await db.execute(select(models.User).where(models.User.email == user.email))).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=400,
@@ -50,14 +70,14 @@ async def create_user(
 
     db_user = models.User(**user_data, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/register", response_model=schemas.UserRead)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     """Регистрация нового пользователя (публичный эндпоинт)"""
-    existing_user = db.query(models.User).filter(models.User.email == user.email).first()
+    existing_user = (await db.execute(select(models.User).where(models.User.email == user.email))).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=400,
@@ -70,14 +90,14 @@ async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db))
     
     db_user = models.User(**user_data, hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 @router.post("/login", response_model=schemas.Token)
-async def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: schemas.UserLogin, db: AsyncSession = Depends(get_db)):
     """Аутентификация пользователя"""
-    user = db.query(models.User).filter(models.User.email == user_data.email).first()
+    user = (await db.execute(select(models.User).where(models.User.email == user_data.email))).scalars().first()
     if not user:
         raise HTTPException(
             status_code=401,
@@ -112,12 +132,16 @@ async def login(user_data: schemas.UserLogin, db: Session = Depends(get_db)):
 
 @router.get("/", response_model=List[schemas.UserRead])
 async def get_users(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(page_params(models.User)),
+    db: AsyncSession = Depends(get_db),
 ):
-    """Получить список всех пользователей"""
-    return db.query(models.User).offset(skip).limit(limit).all()
+    """Получить список всех пользователей; следующая страница - по курсору из X-Next-Cursor"""
+    result = await db.execute(page.apply(select(models.User)))
+    users, next_cursor = page.split(result.scalars().all())
+    set_next_cursor(request, response, next_cursor)
+    return users
 
 @router.get("/me", response_model=schemas.UserRead)
 async def get_current_user_info(
@@ -129,7 +153,7 @@ async def get_current_user_info(
 @router.get("/{user_id}", response_model=schemas.UserRead)
 async def get_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)
 ):
     """Получить пользователя по ID"""
@@ -139,7 +163,7 @@ async def get_user(
             detail="Недостаточно прав для просмотра информации этого пользователя"
         )
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await Repository(db).get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     return user
@@ -148,7 +172,7 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_update: schemas.UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_user_or_admin)
 ):
     """Обновить информацию о пользователе"""
@@ -158,7 +182,7 @@ async def update_user(
             detail="Недостаточно прав для обновления информации этого пользователя"
         )
     
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await Repository(db).get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
@@ -169,7 +193,7 @@ async def update_user(
         )
     
     if user_update.email and user_update.email != user.email:
-        existing_user = db.query(models.User).filter(models.User.email == user_update.email).first()
+        existing_user = (await db.execute(select(models.User).where(models.User.email == user_update.email))).scalars().first()
         if existing_user:
             raise HTTPException(
                 status_code=400,
@@ -184,8 +208,8 @@ async def update_user(
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     cache_service = CacheService()
     await cache_service.invalidate_user_cache(user_id)
@@ -195,16 +219,16 @@ async def update_user(
 @router.delete("/{user_id}", response_model=schemas.MessageResponse)
 async def delete_user(
     user_id: int, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(require_admin) 
 ):
     """Удалить пользователя (только для администраторов)"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await Repository(db).get_user(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
     
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     
     cache_service = CacheService()
     await cache_service.invalidate_user_cache(user_id)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class BookingEventType(str, Enum):
@@ -9,6 +9,7 @@ class BookingEventType(str, Enum):
     CANCELLED = "booking.cancelled"
     CHECKED_IN = "booking.checked_in"
     CHECKED_OUT = "booking.checked_out"
+    BATCH_CREATED = "booking.batch_created"
 
 class NotificationType(str, Enum):
     EMAIL = "email"
@@ -27,6 +28,19 @@ class BookingEvent(BaseModel):
     timestamp: datetime = datetime.utcnow()
     metadata: Optional[dict] = None
 
+class BookingBatchEvent(BaseModel):
+    """Одно событие на групповое бронирование вместо события на каждую комнату"""
+    event_type: BookingEventType = BookingEventType.BATCH_CREATED
+    booking_ids: List[int]
+    room_ids: List[int]
+    user_id: int
+    hotel_id: int
+    check_in_date: datetime
+    check_out_date: datetime
+    total_price: float
+    timestamp: datetime = datetime.utcnow()
+    metadata: Optional[dict] = None
+
 class NotificationMessage(BaseModel):
     notification_type: NotificationType
     recipient: str
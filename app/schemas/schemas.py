@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator, ConfigDict, EmailStr
+from pydantic import BaseModel, field_validator, model_validator, ConfigDict, EmailStr
 from typing import Any, Optional, List, TypeVar, Generic, Dict, Any
 from decimal import Decimal
 from datetime import date, datetime
@@ -32,6 +32,11 @@ class AnalyticsTaskData(BaseModel):
     hotel_id: Optional[int] = None
     period: str
 
+class CleanupTaskData(BaseModel):
+    # None - значения BOOKING_RETENTION_DAYS и BOOKING_ARCHIVE_BATCH_SIZE из настроек
+    retention_days: Optional[int] = None
+    batch_size: Optional[int] = None
+
 class HotelBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -112,6 +117,19 @@ class UserCreate(UserBase):
             raise ValueError('Пароль должен содержать минимум 6 символов')
         return v
 
+class UserImport(UserBase):
+    # Массовый импорт: пароль открытым текстом или готовый хеш из другой системы
+    password: Optional[str] = None
+    hashed_password: Optional[str] = None
+
+    @model_validator(mode='after')
+    def validate_credentials(self):
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError('Нужен ровно один из password и hashed_password')
+        if self.password is not None and len(self.password) < 6:
+            raise ValueError('Пароль должен содержать минимум 6 символов')
+        return self
+
 class UserUpdate(BaseModel):
     email: Optional[str] = None
     first_name: Optional[str] = None
@@ -159,6 +177,31 @@ class BookingRead(BookingBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class BookingBatchRoom(BaseModel):
+    room_id: int
+    number_of_guests: int
+
+class BookingBatchCreate(BaseModel):
+    """Групповое бронирование: несколько комнат одного отеля на одни даты"""
+    user_id: int
+    hotel_id: int
+    check_in_date: datetime
+    check_out_date: datetime
+    rooms: List[BookingBatchRoom]
+    special_requests: Optional[str] = None
+
+    @field_validator('rooms')
+    def validate_rooms(cls, v):
+        if not v:
+            raise ValueError('Нужна хотя бы одна комната')
+        if len({room.room_id for room in v}) != len(v):
+            raise ValueError('Комнаты в групповом бронировании не должны повторяться')
+        return v
+
+class BookingBatchRead(BaseModel):
+    bookings: List[BookingRead]
+    total_price: float
+
 class RoomWithHotelRead(RoomRead):
     hotel: HotelRead
 
@@ -168,9 +211,47 @@ class BookingWithDetailsRead(BookingRead):
     room: RoomRead
     model_config = ConfigDict(from_attributes=True)
 
+class BookingStatsRead(BaseModel):
+    bookings_count: int
+    active_bookings: int
+    completed_bookings: int
+    cancelled_bookings: int
+    revenue: float
+    nights_sold: int
+    average_booking_value: float
+    updated_at: Optional[datetime] = None
+
+class HotelStatsRead(BookingStatsRead):
+    hotel_id: int
+
+class RoomStatsRead(BookingStatsRead):
+    room_id: int
+    hotel_id: int
+
 class MessageResponse(BaseModel):
     message: str
 
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+class ImportResult(BaseModel):
+    inserted: int
+    rejected: int
+    # Первые IMPORT_MAX_ERRORS ошибок; rejected - полное число
+    errors: List[ImportRowError]
+    elapsed_ms: float
+    rows_per_second: float
+
+class RoomDeleteResponse(MessageResponse):
+    # room_id, cancelled_active_bookings, preserved_completed_bookings, cancelled_booking_ids
+    details: Dict[str, Any]
+
+class HotelDeleteResponse(MessageResponse):
+    hotel_id: int
+    bookings_deleted: int
+    rooms_deleted: int
+
 class AvailabilitySearch(BaseModel):
     city: Optional[str] = None
     country: Optional[str] = None
@@ -0,0 +1,254 @@
+from datetime import date, datetime, time
+from typing import List, Optional, Set, Union
+
+from sqlalchemy import and_, exists, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import RoomStatus, ACTIVE_BOOKING_STATUSES
+from app.services.booking_index import booking_index
+from app.services.occupancy_matrix import occupancy_matrix
+from app.services.repository import Repository
+from app.services.room_nights import busy_condition
+from app.services.text_search import TextSearch
+
+DateLike = Union[date, datetime]
+
+# Имя EXCLUDE-ограничения из миграции 0003 (только PostgreSQL)
+BOOKING_OVERLAP_CONSTRAINT = "ex_bookings_room_no_overlap"
+
+# Свободные комнаты после проверки по матрице загружаются пачками id:
+# у драйверов есть предел числа параметров в одном запросе
+MATRIX_LOAD_CHUNK = 5000
+
+# Признаки истекшего ожидания блокировки: SQLite (busy timeout) и PostgreSQL (lock_timeout)
+LOCK_TIMEOUT_MESSAGES = ("database is locked", "lock timeout")
+
+def is_lock_timeout(error: OperationalError) -> bool:
+    """Ошибка вызвана тем, что блокировку не удалось получить вовремя"""
+    message = str(error.orig).lower()
+    return any(marker in message for marker in LOCK_TIMEOUT_MESSAGES)
+
+def _as_datetime(value: DateLike) -> datetime:
+    """Привести дату к началу суток, чтобы сравнивать с DateTime-колонками"""
+    if isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+class AvailabilityService:
+    """
+    Движок доступности комнат.
+    Отвечает на вопрос "какие комнаты свободны в [check_in, check_out)"
+    одним запросом с анти-join по занятым ночам из room_nights (или по
+    пересекающимся бронированиям) вместо отдельного запроса на каждую комнату.
+    Окончательная проверка перед записью (authoritative) всегда идет
+    по самим бронированиям.
+    Если прогрета внутрипроцессная матрица занятости или индекс
+    занятости, ночи проверяются по ним и таблица бронирований не
+    читается вовсе.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @staticmethod
+    def use_index() -> bool:
+        return settings.BOOKING_INDEX_ENABLED and booking_index.ready
+
+    @staticmethod
+    def use_matrix(check_in: DateLike, check_out: DateLike) -> bool:
+        return settings.OCCUPANCY_MATRIX_ENABLED and occupancy_matrix.covers(check_in, check_out)
+
+    async def _filter_by_matrix(self, query, check_in: DateLike, check_out: DateLike) -> Optional[List[models.Room]]:
+        """
+        Сначала только id подходящих комнат, занятость - по матрице, затем
+        загрузка свободных: занятые комнаты не превращаются в ORM-объекты
+        """
+        candidate_ids = (await self.db.execute(query.with_only_columns(models.Room.id))).scalars().all()
+        free_ids = occupancy_matrix.free_rooms(candidate_ids, check_in, check_out)
+        if free_ids is None:
+            return None
+
+        free_ids = sorted(free_ids)
+        rooms = []
+        for offset in range(0, len(free_ids), MATRIX_LOAD_CHUNK):
+            chunk = free_ids[offset:offset + MATRIX_LOAD_CHUNK]
+            rooms.extend(await self._fetch_rooms(query.where(models.Room.id.in_(chunk))))
+        return rooms
+
+    @staticmethod
+    def _filter_by_index(rooms: List[models.Room], check_in: DateLike, check_out: DateLike) -> List[models.Room]:
+        free_ids = set(booking_index.free_rooms(
+            (room.id for room in rooms),
+            _as_datetime(check_in),
+            _as_datetime(check_out),
+        ))
+        return [room for room in rooms if room.id in free_ids]
+
+    async def _fetch_rooms(self, query) -> List[models.Room]:
+        result = await self.db.execute(query.order_by(models.Room.id))
+        return list(result.scalars().all())
+
+    @staticmethod
+    def overlap_condition(check_in: DateLike, check_out: DateLike):
+        """Условие пересечения активного бронирования с интервалом [check_in, check_out)"""
+        return and_(
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.check_in_date < _as_datetime(check_out),
+            models.Booking.check_out_date > _as_datetime(check_in),
+        )
+
+    async def is_room_free(
+        self,
+        room_id: int,
+        check_in: DateLike,
+        check_out: DateLike,
+        authoritative: bool = False,
+        exclude_booking_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Свободна ли комната на даты.
+        С authoritative=True решает только БД: индекс локален для процесса
+        и может отставать как в сторону "свободна", так и "занята".
+        exclude_booking_id - не считать пересечением само изменяемое бронирование.
+        """
+        if self.use_index() and not authoritative and exclude_booking_id is None:
+            return booking_index.is_free(room_id, _as_datetime(check_in), _as_datetime(check_out))
+
+        return not await Repository(self.db).booking_overlaps(
+            room_id,
+            _as_datetime(check_in),
+            _as_datetime(check_out),
+            exclude_booking_id=exclude_booking_id,
+        )
+
+    async def lock_room(self, room_id: int) -> Optional[models.Room]:
+        """
+        Загрузить комнату, заблокировав её до конца транзакции.
+        Конкурентные бронирования одной комнаты выстраиваются в очередь.
+        На PostgreSQL блокируется строка комнаты, ожидание ограничено
+        BOOKING_LOCK_TIMEOUT_MS. SQLite строк не блокирует: холостой UPDATE
+        сразу берет блокировку записи всей базы (как BEGIN IMMEDIATE).
+        Если сначала читать, а писать только при вставке, две транзакции
+        одновременно повышают блокировку и одна сразу получает SQLITE_BUSY,
+        не дожидаясь busy timeout.
+        Истекшее ожидание - OperationalError, см. is_lock_timeout().
+        """
+        await self._prepare_lock(models.Room.id == room_id)
+        return await Repository(self.db).lock_room(room_id)
+
+    async def lock_rooms(self, room_ids: List[int]) -> List[models.Room]:
+        """
+        Заблокировать несколько комнат одним запросом (групповое бронирование).
+        Порядок и таймаут - как у lock_room; комнаты возвращаются по возрастанию id.
+        """
+        await self._prepare_lock(models.Room.id.in_(room_ids))
+        return await Repository(self.db).lock_rooms(room_ids)
+
+    async def _prepare_lock(self, condition):
+        """lock_timeout на PostgreSQL, блокировка записи базы на SQLite"""
+        dialect = self.db.bind.dialect.name
+        if dialect == "postgresql":
+            await self.db.execute(text(f"SET LOCAL lock_timeout = {int(settings.BOOKING_LOCK_TIMEOUT_MS)}"))
+        elif dialect == "sqlite":
+            await self.db.execute(
+                update(models.Room)
+                .where(condition)
+                .values(id=models.Room.id)
+                .execution_options(synchronize_session=False)
+            )
+
+    async def busy_rooms(self, room_ids: List[int], check_in: DateLike, check_out: DateLike) -> Set[int]:
+        """Какие из комнат заняты на даты: одна проверка по бронированиям для всей группы"""
+        return await Repository(self.db).overlapping_rooms(room_ids, _as_datetime(check_in), _as_datetime(check_out))
+
+    def room_is_free_condition(self, check_in: DateLike, check_out: DateLike):
+        """
+        NOT EXISTS по занятым ночам (room_nights) или, если инвентарь
+        выключен, по пересекающимся бронированиям для текущей комнаты
+        """
+        if settings.ROOM_NIGHTS_ENABLED:
+            return ~busy_condition(check_in, check_out)
+        return ~exists().where(
+            models.Booking.room_id == models.Room.id,
+            self.overlap_condition(check_in, check_out),
+        )
+
+    async def get_available_rooms(
+        self,
+        hotel_id: int,
+        check_in: DateLike,
+        check_out: DateLike,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[models.Room]:
+        """Свободные комнаты отеля на даты одним запросом"""
+        query = select(models.Room).where(
+            models.Room.hotel_id == hotel_id,
+            models.Room.status == RoomStatus.AVAILABLE,
+        )
+
+        if min_price is not None:
+            query = query.where(models.Room.price_per_night >= min_price)
+        if max_price is not None:
+            query = query.where(models.Room.price_per_night <= max_price)
+
+        return await self._filter_available(query, check_in, check_out)
+
+    async def _filter_available(self, query, check_in: DateLike, check_out: DateLike) -> List[models.Room]:
+        """Оставить свободные на даты комнаты: матрица, индекс или анти-join в SQL"""
+        if self.use_matrix(check_in, check_out):
+            rooms = await self._filter_by_matrix(query, check_in, check_out)
+            # None - горизонт матрицы сдвинулся между проверкой и поиском
+            if rooms is not None:
+                return rooms
+
+        if self.use_index():
+            rooms = await self._fetch_rooms(query)
+            return self._filter_by_index(rooms, check_in, check_out)
+
+        query = query.where(self.room_is_free_condition(check_in, check_out))
+
+        return await self._fetch_rooms(query)
+
+    async def search_available_rooms(
+        self,
+        city: Optional[str] = None,
+        country: Optional[str] = None,
+        room_type: Optional[str] = None,
+        check_in: Optional[DateLike] = None,
+        check_out: Optional[DateLike] = None,
+        guests: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[models.Room]:
+        """Поиск свободных комнат по всем отелям с фильтрами одним запросом (плюс поиск значений по триграммам на SQLite)"""
+        query = select(models.Room)\
+            .join(models.Room.hotel)\
+            .options(contains_eager(models.Room.hotel))
+
+        # Подстрока и опечатки: pg_trgm на PostgreSQL, таблица триграмм на SQLite
+        search = TextSearch(self.db)
+        if city:
+            query = query.where(await search.condition("city", city))
+        if country:
+            query = query.where(await search.condition("country", country))
+
+        if room_type:
+            query = query.where(await search.condition("room_type", room_type))
+        if guests:
+            query = query.where(models.Room.capacity >= guests)
+        if min_price is not None:
+            query = query.where(models.Room.price_per_night >= min_price)
+        if max_price is not None:
+            query = query.where(models.Room.price_per_night <= max_price)
+
+        query = query.where(models.Room.status == RoomStatus.AVAILABLE)
+
+        if not (check_in and check_out):
+            return await self._fetch_rooms(query)
+
+        return await self._filter_available(query, check_in, check_out)
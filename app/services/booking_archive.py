@@ -0,0 +1,137 @@
+import logging
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, text
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import ARCHIVABLE_BOOKING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Колонки, которые переносятся из bookings в bookings_archive как есть
+ARCHIVED_COLUMNS = (
+    "id",
+    "booking_reference",
+    "user_id",
+    "hotel_id",
+    "room_id",
+    "check_in_date",
+    "check_out_date",
+    "number_of_guests",
+    "total_price",
+    "status",
+    "special_requests",
+    "created_at",
+)
+
+# (архивировано, всего к архивации) после каждой пачки
+ProgressCallback = Callable[[int, int], None]
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+def next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"bookings_archive_y{month.year}m{month.month:02d}"
+
+def ensure_archive_partitions(connection, months: Iterable[date]):
+    """
+    PostgreSQL: создать месячные секции bookings_archive, если их еще нет.
+    Секция создается до вставки, поэтому DEFAULT-секция остается пустой
+    и не мешает создавать новые.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for month in sorted(set(months)):
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF bookings_archive "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+        ))
+
+def archive_cutoff(retention_days: Optional[int] = None) -> datetime:
+    """Бронирования с выездом раньше этого момента уже можно архивировать"""
+    days = settings.BOOKING_RETENTION_DAYS if retention_days is None else retention_days
+    return datetime.utcnow() - timedelta(days=days)
+
+def _archivable(cutoff: datetime):
+    return (
+        models.Booking.status.in_(ARCHIVABLE_BOOKING_STATUSES),
+        models.Booking.check_out_date < cutoff,
+    )
+
+def count_archivable(connection, cutoff: datetime) -> int:
+    return connection.execute(
+        select(func.count()).select_from(models.Booking).where(*_archivable(cutoff))
+    ).scalar_one()
+
+def archive_batch(connection, cutoff: datetime, batch_size: int) -> int:
+    """
+    Перенести одну пачку бронирований в архив: INSERT ... SELECT и DELETE
+    по списку id. Вызывать внутри транзакции; возвращает размер пачки.
+    """
+    booking = models.Booking
+    rows = connection.execute(
+        select(booking.id, booking.check_in_date)
+        .where(*_archivable(cutoff))
+        .order_by(booking.id)
+        .limit(batch_size)
+        # Строки, которые сейчас меняет приложение, достанутся следующему запуску
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return 0
+
+    ids: List[int] = [row.id for row in rows]
+    ensure_archive_partitions(connection, (month_start(row.check_in_date) for row in rows))
+
+    archive = models.ArchivedBooking.__table__
+    columns = [getattr(booking, name) for name in ARCHIVED_COLUMNS]
+    connection.execute(
+        insert(archive).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at"],
+            select(*columns, literal(datetime.utcnow(), archive.c.archived_at.type)).where(booking.id.in_(ids)),
+        )
+    )
+    # У завершенных броней ночей нет; удаляем на случай рассинхронизации инвентаря
+    connection.execute(delete(models.RoomNight).where(models.RoomNight.booking_id.in_(ids)))
+    connection.execute(delete(booking).where(booking.id.in_(ids)))
+    return len(ids)
+
+def archive_bookings(
+    engine,
+    retention_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    max_batches: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Перенести в bookings_archive завершенные и отмененные бронирования
+    старше окна хранения. Каждая пачка - отдельная короткая транзакция:
+    блокировки не копятся, а прерванный запуск продолжается со следующей пачки.
+    """
+    cutoff = archive_cutoff(retention_days)
+    batch_size = batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE
+
+    with engine.connect() as connection:
+        total = count_archivable(connection, cutoff)
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with engine.begin() as connection:
+            moved = archive_batch(connection, cutoff, batch_size)
+        if not moved:
+            break
+        archived += moved
+        batches += 1
+        if progress is not None:
+            progress(archived, max(total, archived))
+        if moved < batch_size:
+            break
+
+    logger.info(f"Archived {archived} bookings in {batches} batches (check-out before {cutoff:%Y-%m-%d})")
+    return {"archived_bookings": archived, "batches": batches, "archivable_bookings": total}
@@ -1,5 +1,5 @@
 import logging
-from app.schemas.messages import BookingEvent, BookingEventType
+from app.schemas.messages import BookingBatchEvent, BookingEvent, BookingEventType
 from app.core.rabbitmq import get_rabbitmq_manager
 from datetime import datetime
 
@@ -39,6 +39,30 @@ class BookingEventService:
         )
         logger.info(f"Booking created event published for booking {booking_data['id']}")
     
+    async def publish_booking_batch_created(self, batch_data: dict):
+        """Опубликовать одно событие группового бронирования"""
+        event = BookingBatchEvent(
+            booking_ids=batch_data["booking_ids"],
+            room_ids=batch_data["room_ids"],
+            user_id=batch_data["user_id"],
+            hotel_id=batch_data["hotel_id"],
+            check_in_date=batch_data["check_in_date"],
+            check_out_date=batch_data["check_out_date"],
+            total_price=batch_data["total_price"],
+            metadata={
+                "booking_references": batch_data.get("booking_references"),
+                "number_of_guests": batch_data.get("number_of_guests")
+            }
+        )
+        
+        manager = await self._get_manager()
+        await manager.publish_message(
+            exchange="booking_events",
+            routing_key="booking.batch_created",
+            message=event.dict()
+        )
+        logger.info(f"Booking batch created event published for bookings {batch_data['booking_ids']}")
+    
     async def publish_booking_cancelled(self, booking_data: dict):
         """Опубликовать событие отмены бронирования"""
         event = BookingEvent(
@@ -0,0 +1,175 @@
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+class RoomIntervals:
+    """
+    Интервалы активных бронирований одной комнаты.
+    Хранятся отсортированными по дате заезда вместе с префиксным максимумом
+    дат выезда, поэтому проверка пересечения с [start, end) - это один
+    бинарный поиск: O(log n) даже если в БД оказались пересекающиеся брони.
+    """
+
+    __slots__ = ("starts", "ends", "booking_ids", "max_ends")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        self.booking_ids: List[int] = []
+        self.max_ends: List[datetime] = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _rebuild_max_ends(self, position: int):
+        current = self.max_ends[position - 1] if position > 0 else None
+        del self.max_ends[position:]
+        for end in self.ends[position:]:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+    def add(self, booking_id: int, start: datetime, end: datetime):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.booking_ids.insert(position, booking_id)
+        self._rebuild_max_ends(position)
+
+    def remove(self, booking_id: int) -> bool:
+        try:
+            position = self.booking_ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position]
+        del self.ends[position]
+        del self.booking_ids[position]
+        self._rebuild_max_ends(position)
+        return True
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        # Кандидаты на пересечение - все брони с заездом раньше end
+        position = bisect_left(self.starts, end)
+        if position == 0:
+            return True
+        return self.max_ends[position - 1] <= start
+
+class BookingIntervalIndex:
+    """
+    Внутрипроцессный индекс занятости комнат.
+    Строится из CONFIRMED/CHECKED_IN бронирований при старте приложения
+    и поддерживается роутерами бронирований при создании, отмене и выезде.
+    Индекс локален для процесса, поэтому окончательная проверка при создании
+    бронирования по-прежнему выполняется в БД.
+    """
+
+    def __init__(self):
+        self._rooms: Dict[int, RoomIntervals] = {}
+        self._bookings: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def clear(self):
+        """Сбросить индекс (например, между тестами)"""
+        with self._lock:
+            self._rooms.clear()
+            self._bookings.clear()
+            self.ready = False
+
+    def rebuild(self, db: Session) -> int:
+        """Перестроить индекс из БД (холодный старт)"""
+        rows = db.query(
+            models.Booking.id,
+            models.Booking.room_id,
+            models.Booking.check_in_date,
+            models.Booking.check_out_date,
+        ).filter(
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.room_id.isnot(None),
+        ).order_by(models.Booking.room_id, models.Booking.check_in_date).all()
+
+        rooms: Dict[int, RoomIntervals] = {}
+        bookings: Dict[int, int] = {}
+        for booking_id, room_id, check_in, check_out in rows:
+            intervals = rooms.get(room_id)
+            if intervals is None:
+                intervals = rooms[room_id] = RoomIntervals()
+            intervals.add(booking_id, check_in, check_out)
+            bookings[booking_id] = room_id
+
+        with self._lock:
+            self._rooms = rooms
+            self._bookings = bookings
+            self.ready = True
+
+        logger.info(f"Booking index rebuilt: {len(bookings)} bookings in {len(rooms)} rooms")
+        return len(bookings)
+
+    def add(self, booking_id: int, room_id: Optional[int], check_in: datetime, check_out: datetime):
+        """Учесть активное бронирование (повторный вызов обновляет даты)"""
+        if room_id is None:
+            return
+        with self._lock:
+            self._remove_locked(booking_id)
+            intervals = self._rooms.get(room_id)
+            if intervals is None:
+                intervals = self._rooms[room_id] = RoomIntervals()
+            intervals.add(booking_id, check_in, check_out)
+            self._bookings[booking_id] = room_id
+
+    def add_booking(self, booking: models.Booking):
+        """Синхронизировать индекс с состоянием бронирования после коммита"""
+        if booking.status in ACTIVE_BOOKING_STATUSES:
+            self.add(booking.id, booking.room_id, booking.check_in_date, booking.check_out_date)
+        else:
+            self.remove(booking.id)
+
+    def remove(self, booking_id: int):
+        """Убрать бронирование из индекса (отмена, выезд, удаление)"""
+        with self._lock:
+            self._remove_locked(booking_id)
+
+    def _remove_locked(self, booking_id: int):
+        room_id = self._bookings.pop(booking_id, None)
+        if room_id is None:
+            return
+        intervals = self._rooms.get(room_id)
+        if intervals is not None:
+            intervals.remove(booking_id)
+            if not intervals:
+                del self._rooms[room_id]
+
+    def remove_rooms(self, room_ids: Iterable[int]):
+        """Забыть комнаты целиком (удаление комнаты или отеля)"""
+        with self._lock:
+            for room_id in room_ids:
+                intervals = self._rooms.pop(room_id, None)
+                if intervals is None:
+                    continue
+                for booking_id in intervals.booking_ids:
+                    self._bookings.pop(booking_id, None)
+
+    def is_free(self, room_id: int, check_in: datetime, check_out: datetime) -> bool:
+        """Свободна ли комната в [check_in, check_out)"""
+        intervals = self._rooms.get(room_id)
+        return intervals is None or intervals.is_free(check_in, check_out)
+
+    def free_rooms(self, room_ids: Iterable[int], check_in: datetime, check_out: datetime) -> List[int]:
+        """Какие из комнат свободны в [check_in, check_out)"""
+        rooms = self._rooms
+        result = []
+        for room_id in room_ids:
+            intervals = rooms.get(room_id)
+            if intervals is None or intervals.is_free(check_in, check_out):
+                result.append(room_id)
+        return result
+
+booking_index = BookingIntervalIndex()
@@ -0,0 +1,316 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, inspect, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES, COMPLETED_BOOKING_STATUSES, BookingStatus
+from app.services.room_nights import night_range
+
+logger = logging.getLogger(__name__)
+
+# Счетчики hotel_stats и room_stats
+COUNTERS = (
+    "bookings_count",
+    "active_bookings",
+    "completed_bookings",
+    "cancelled_bookings",
+    "revenue",
+    "nights_sold",
+)
+
+# Поля бронирования, от которых зависит его вклад в агрегаты
+_TRACKED_FIELDS = ("status", "hotel_id", "room_id", "total_price", "check_in_date", "check_out_date")
+
+BATCH_SIZE = 10000
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+def contribution(status, total_price, check_in, check_out) -> Dict[str, float]:
+    """Вклад одного бронирования: отмененное учитывается только в счетчиках"""
+    cancelled = status == BookingStatus.CANCELLED
+    first, end = night_range(check_in, check_out)
+    return {
+        "bookings_count": 1,
+        "active_bookings": int(status in ACTIVE_BOOKING_STATUSES),
+        "completed_bookings": int(status in COMPLETED_BOOKING_STATUSES),
+        "cancelled_bookings": int(cancelled),
+        "revenue": 0.0 if cancelled else float(total_price or 0.0),
+        "nights_sold": 0 if cancelled else (end - first).days,
+    }
+
+def _zero() -> Dict[str, float]:
+    return dict.fromkeys(COUNTERS, 0)
+
+class StatsDelta:
+    """Изменения агрегатов по отелям и комнатам (или сами агрегаты при пересчете)"""
+
+    def __init__(self):
+        self.hotels: Dict[int, Dict[str, float]] = defaultdict(_zero)
+        self.rooms: Dict[int, Dict[str, float]] = defaultdict(_zero)
+        self.room_hotels: Dict[int, int] = {}
+
+    def add(self, hotel_id: Optional[int], room_id: Optional[int], values: Dict[str, float], sign: int = 1):
+        if hotel_id is None:
+            return
+        for target in (self.hotels[hotel_id], self.rooms[room_id] if room_id is not None else None):
+            if target is None:
+                continue
+            for column in COUNTERS:
+                target[column] += sign * values[column]
+        if room_id is not None:
+            self.room_hotels[room_id] = hotel_id
+
+    def rows(self, table: str):
+        """Непустые изменения по возрастанию ключа: блокировки строк берутся в одном порядке"""
+        if table == "hotels":
+            items, key = self.hotels, "hotel_id"
+        else:
+            items, key = self.rooms, "room_id"
+        for ident in sorted(items):
+            values = items[ident]
+            if not any(values.values()):
+                continue
+            row = {key: ident, **values}
+            if table == "rooms":
+                row["hotel_id"] = self.room_hotels[ident]
+            yield row
+
+def _booking_values(booking: models.Booking) -> Tuple[Optional[int], Optional[int], Dict[str, float]]:
+    return booking.hotel_id, booking.room_id, contribution(
+        booking.status, booking.total_price, booking.check_in_date, booking.check_out_date
+    )
+
+def _previous_values(booking: models.Booking):
+    """
+    Вклад бронирования до этого flush. None - прежнее значение одного из
+    полей неизвестно (поле было expired и перезаписано без загрузки).
+    """
+    state = inspect(booking)
+    previous = {}
+    for field in _TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            previous[field] = history.deleted[0]
+        elif history.unchanged:
+            previous[field] = history.unchanged[0]
+        else:
+            return None
+    return previous["hotel_id"], previous["room_id"], contribution(
+        previous["status"], previous["total_price"], previous["check_in_date"], previous["check_out_date"]
+    )
+
+def _upsert(connection, table, key: str, rows):
+    """Прибавить изменения к строкам агрегатов, создавая недостающие"""
+    rows = list(rows)
+    if not rows:
+        return
+    now = datetime.utcnow()
+    rows = [{**row, "updated_at": now} for row in rows]
+    make_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    if make_insert is not None:
+        statement = make_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[key],
+            set_={
+                **{column: table.c[column] + statement.excluded[column] for column in COUNTERS},
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        connection.execute(statement, rows)
+        return
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c[key] == row[key])
+            .values({column: table.c[column] + row[column] for column in COUNTERS}, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table), row)
+
+def apply_delta(connection, delta: StatsDelta):
+    _upsert(connection, models.HotelStats.__table__, "hotel_id", delta.rows("hotels"))
+    _upsert(connection, models.RoomStats.__table__, "room_id", delta.rows("rooms"))
+
+def _history_rows(connection, hotel_ids: Optional[Iterable[int]] = None):
+    """(hotel_id, room_id, status, total_price, check_in, check_out) бронирований и архива"""
+    for model in (models.Booking, models.ArchivedBooking):
+        table = model.__table__
+        query = select(
+            table.c.hotel_id,
+            table.c.room_id,
+            table.c.status,
+            table.c.total_price,
+            table.c.check_in_date,
+            table.c.check_out_date,
+        )
+        if hotel_ids is not None:
+            query = query.where(table.c.hotel_id.in_(hotel_ids))
+        yield from connection.execute(query.execution_options(yield_per=BATCH_SIZE))
+
+def expected_stats(connection, hotel_ids: Optional[Iterable[int]] = None) -> StatsDelta:
+    """
+    Агрегаты по всей истории: бронирования и архив. Учитываются только
+    существующие отели и комнаты; комната - в своем текущем отеле.
+    """
+    hotel_ids = list(hotel_ids) if hotel_ids is not None else None
+    hotels_query = select(models.Hotel.id)
+    rooms_query = select(models.Room.id, models.Room.hotel_id)
+    if hotel_ids is not None:
+        hotels_query = hotels_query.where(models.Hotel.id.in_(hotel_ids))
+        rooms_query = rooms_query.where(models.Room.hotel_id.in_(hotel_ids))
+    hotels = set(connection.execute(hotels_query).scalars())
+    rooms = dict(connection.execute(rooms_query).tuples().all())
+
+    stats = StatsDelta()
+    for hotel_id, room_id, status, total_price, check_in, check_out in _history_rows(connection, hotel_ids):
+        if hotel_id not in hotels:
+            continue
+        if room_id not in rooms or rooms[room_id] != hotel_id:
+            room_id = None
+        stats.add(hotel_id, room_id, contribution(status, total_price, check_in, check_out))
+    return stats
+
+def _insert_stats(connection, stats: StatsDelta) -> int:
+    now = datetime.utcnow()
+    total = 0
+    for table, rows in (
+        (models.HotelStats.__table__, stats.rows("hotels")),
+        (models.RoomStats.__table__, stats.rows("rooms")),
+    ):
+        batch = []
+        for row in rows:
+            batch.append({**row, "updated_at": now})
+            if len(batch) >= BATCH_SIZE:
+                connection.execute(insert(table), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            connection.execute(insert(table), batch)
+            total += len(batch)
+    return total
+
+def rebuild_booking_stats(connection) -> int:
+    """Заполнить hotel_stats и room_stats заново по истории (бэкфилл или починка)"""
+    connection.execute(delete(models.RoomStats.__table__))
+    connection.execute(delete(models.HotelStats.__table__))
+    total = _insert_stats(connection, expected_stats(connection))
+    logger.info(f"Booking stats rebuilt: {total} rows")
+    return total
+
+def recompute_hotel_stats(connection, hotel_ids: Iterable[int]):
+    """
+    Пересчитать агрегаты отелей и всех их комнат по истории. Нужен после
+    массовых UPDATE/DELETE бронирований, которые слушатель сессии не видит.
+    Строки удаленных отелей и комнат просто исчезают.
+    """
+    hotel_ids = sorted(set(hotel_ids))
+    if not hotel_ids:
+        return
+    connection.execute(delete(models.RoomStats.__table__).where(models.RoomStats.hotel_id.in_(hotel_ids)))
+    connection.execute(delete(models.HotelStats.__table__).where(models.HotelStats.hotel_id.in_(hotel_ids)))
+    _insert_stats(connection, expected_stats(connection, hotel_ids))
+
+def check_booking_stats(connection) -> Dict[str, int]:
+    """Сравнить агрегаты с историей: сколько строк отелей и комнат расходится"""
+    expected = expected_stats(connection)
+    report = {}
+    for name, model, key in (("hotels", models.HotelStats, "hotel_id"), ("rooms", models.RoomStats, "room_id")):
+        table = model.__table__
+        stored = {
+            row[key]: row
+            for row in connection.execute(select(table)).mappings()
+        }
+        wanted = {row[key]: row for row in expected.rows(name)}
+        mismatched = 0
+        for ident in set(stored) | set(wanted):
+            left, right = stored.get(ident), wanted.get(ident)
+            left_values = [left[column] if left else 0 for column in COUNTERS]
+            right_values = [right[column] if right else 0 for column in COUNTERS]
+            if any(abs(a - b) > 1e-6 for a, b in zip(left_values, right_values)):
+                mismatched += 1
+        report[name] = len(wanted)
+        report[f"{name}_mismatched"] = mismatched
+    return report
+
+def read_hotel_stats(connection, hotel_id: int) -> Dict[str, object]:
+    """Агрегаты отеля из синхронного кода (задачи Celery)"""
+    row = connection.execute(
+        select(models.HotelStats.__table__).where(models.HotelStats.hotel_id == hotel_id)
+    ).first()
+    return _as_dict(row, hotel_id=hotel_id)
+
+class BookingStatsService:
+    """Чтение агрегатов и их пересчет из асинхронных роутеров"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def hotel_stats(self, hotel_id: int) -> Dict[str, object]:
+        row = await self.db.get(models.HotelStats, hotel_id)
+        return _as_dict(row, hotel_id=hotel_id)
+
+    async def room_stats(self, room: models.Room) -> Dict[str, object]:
+        row = await self.db.get(models.RoomStats, room.id)
+        return _as_dict(row, room_id=room.id, hotel_id=room.hotel_id)
+
+    async def recompute_hotels(self, hotel_ids: Iterable[int]):
+        hotel_ids = list(hotel_ids)
+        await self.db.run_sync(lambda session: recompute_hotel_stats(session.connection(), hotel_ids))
+
+def _as_dict(row, **keys) -> Dict[str, object]:
+    """Строка агрегатов как словарь; отель или комната без бронирований - нули"""
+    values = {column: getattr(row, column) if row is not None else 0 for column in COUNTERS}
+    sold = values["bookings_count"] - values["cancelled_bookings"]
+    return {
+        **keys,
+        **values,
+        "average_booking_value": round(values["revenue"] / sold, 2) if sold else 0.0,
+        "updated_at": row.updated_at if row is not None else None,
+    }
+
+@event.listens_for(Session, "after_flush")
+def _update_booking_stats(session, flush_context):
+    """
+    Агрегаты меняются в той же транзакции, что и бронирование: создание,
+    отмена, заезд, выезд, изменение дат и удаление. Изменение - разница
+    вкладов до и после flush; если прежнее значение неизвестно, отель
+    пересчитывается по истории.
+    """
+    delta = StatsDelta()
+    recompute: Set[int] = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, models.Booking):
+            continue
+        if obj in session.new:
+            delta.add(*_booking_values(obj))
+            continue
+
+        state = inspect(obj)
+        deleted = obj in session.deleted
+        if not deleted and not any(state.attrs[field].history.has_changes() for field in _TRACKED_FIELDS):
+            continue
+
+        previous = _previous_values(obj)
+        if previous is None:
+            hotel_id = state.dict.get("hotel_id")
+            if hotel_id is not None:
+                recompute.add(hotel_id)
+            else:
+                logger.warning(f"Booking {state.identity} changed with unknown hotel, stats not updated")
+            continue
+        delta.add(*previous, sign=-1)
+        if not deleted:
+            delta.add(*_booking_values(obj))
+
+    if delta.hotels or recompute:
+        connection = session.connection()
+        apply_delta(connection, delta)
+        recompute_hotel_stats(connection, recompute)
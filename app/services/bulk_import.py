@@ -0,0 +1,262 @@
+import asyncio
+import csv
+import enum
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.models.hotels as models
+import app.schemas.schemas as schemas
+from app.config import settings
+from app.core.security import get_password_hash
+from app.services.cache_service import CacheService
+from app.services.text_search import index_values
+
+# (номер строки во входном потоке, поля строки)
+ImportRow = Tuple[int, Dict[str, Any]]
+
+def detect_format(content_type: Optional[str], requested: Optional[str] = None) -> str:
+    """Формат потока: явный параметр, иначе по Content-Type (по умолчанию NDJSON)"""
+    if requested:
+        return requested
+    if content_type and "csv" in content_type:
+        return "csv"
+    return "ndjson"
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Строки потока по мере поступления байтов, с номерами с единицы"""
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            number += 1
+            yield number, line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield number + 1, buffer.decode("utf-8").rstrip("\r")
+
+async def parse_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[ImportRow]:
+    """
+    Разбор NDJSON или CSV (первая строка - заголовок) без чтения тела
+    целиком. Пустые поля CSV становятся None. Переводы строк внутри
+    кавычек CSV не поддерживаются: одна запись - одна строка.
+    Нераспознанная строка отдается как {"__error__": текст ошибки}.
+    """
+    header: Optional[List[str]] = None
+    async for number, line in _lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            if len(values) != len(header):
+                yield number, {"__error__": f"expected {len(header)} columns, got {len(values)}"}
+                continue
+            yield number, {name: (value if value != "" else None) for name, value in zip(header, values)}
+        else:
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, {"__error__": f"invalid JSON: {e}"}
+                continue
+            if not isinstance(row, dict):
+                yield number, {"__error__": "expected a JSON object"}
+                continue
+            yield number, row
+
+class ImportReport:
+    """Итог импорта: сколько строк вставлено и отклонено, первые ошибки и скорость"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def result(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "rows_per_second": round(self.inserted / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+class BulkImportService:
+    """
+    Массовый импорт отелей, комнат и пользователей из потока NDJSON/CSV.
+    Строки проверяются схемами пачками по IMPORT_CHUNK_SIZE; пачка -
+    одна транзакция: конфликты ищутся одним запросом на пачку, вставка -
+    executemany (на PostgreSQL с asyncpg - COPY), кэш инвалидируется один
+    раз на пачку. Ошибочные строки отклоняются, остальные вставляются.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.report = ImportReport()
+        self.cache_service = CacheService()
+
+    async def _chunks(self, rows: AsyncIterator[ImportRow], schema: Type[BaseModel]):
+        """Проверенные схемой строки пачками: [(номер строки, модель)]"""
+        chunk = []
+        async for line, row in rows:
+            if "__error__" in row:
+                self.report.reject(line, row["__error__"])
+                continue
+            try:
+                chunk.append((line, schema.model_validate(row)))
+            except ValidationError as e:
+                self.report.reject(line, _validation_message(e))
+                continue
+            if len(chunk) >= settings.IMPORT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _use_copy(self) -> bool:
+        dialect = self.db.bind.dialect
+        return dialect.name == "postgresql" and dialect.driver == "asyncpg"
+
+    async def _insert(self, model, values: List[Dict[str, Any]]):
+        if not values:
+            return
+        if self._use_copy():
+            await self._copy(model.__table__, values)
+        else:
+            await self.db.execute(insert(model), values)
+
+    async def _write(self, model, lines: List[int], values: List[Dict[str, Any]], search_pairs=()) -> bool:
+        """
+        Вставить пачку и закоммитить. Конфликт с параллельной записью
+        (уникальный email, удаленный отель) отклоняет всю пачку.
+        False - ничего не вставлено.
+        """
+        if not values:
+            return False
+        try:
+            await self._insert(model, values)
+            await self._index_search_values(list(search_pairs))
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            for line in lines:
+                self.report.reject(line, f"conflicts with a concurrent write: {e.orig}")
+            return False
+        self.report.inserted += len(values)
+        return True
+
+    async def _copy(self, table, values: List[Dict[str, Any]]):
+        """COPY через asyncpg внутри транзакции сессии; Enum передается именем, как его хранит SQLAlchemy"""
+        columns = list(values[0])
+        records = [
+            tuple(value.name if isinstance(value, enum.Enum) else value for value in (row[column] for column in columns))
+            for row in values
+        ]
+        connection = await self.db.connection()
+        raw = await connection.get_raw_connection()
+        try:
+            await raw.driver_connection.copy_records_to_table(table.name, records=records, columns=columns)
+        except Exception as e:
+            # Ошибки драйвера напрямую не оборачиваются SQLAlchemy; класс 23 - нарушение ограничений
+            if str(getattr(e, "sqlstate", "")).startswith("23"):
+                raise IntegrityError(f"COPY {table.name}", None, e) from e
+            raise
+
+    async def _index_search_values(self, pairs: List[Tuple[str, str]]):
+        """Новые city/country/room_type в search_trigrams (вставка в обход ORM-слушателя)"""
+        if pairs and self.db.bind.dialect.name != "postgresql":
+            await self.db.run_sync(lambda session: index_values(session.connection(), pairs))
+
+    async def import_hotels(self, rows: AsyncIterator[ImportRow]) -> Dict[str, Any]:
+        async for chunk in self._chunks(rows, schemas.HotelCreate):
+            now = datetime.utcnow()
+            values = [{**hotel.model_dump(), "created_at": now} for _, hotel in chunk]
+            search_pairs = [("city", row["city"]) for row in values] + [("country", row["country"]) for row in values]
+            if await self._write(models.Hotel, [line for line, _ in chunk], values, search_pairs):
+                await self.cache_service.invalidate_imported()
+        return self.report.result()
+
+    async def import_rooms(self, rows: AsyncIterator[ImportRow]) -> Dict[str, Any]:
+        known_hotels: Set[int] = set()
+        seen: Set[Tuple[int, str]] = set()
+        async for chunk in self._chunks(rows, schemas.RoomCreate):
+            hotel_ids = {room.hotel_id for _, room in chunk} - known_hotels
+            if hotel_ids:
+                known_hotels.update((await self.db.execute(
+                    select(models.Hotel.id).where(models.Hotel.id.in_(hotel_ids))
+                )).scalars())
+
+            keys = {(room.hotel_id, room.room_number) for _, room in chunk}
+            # Конфликты номеров с уже существующими комнатами - одним запросом на пачку
+            existing = set((await self.db.execute(
+                select(models.Room.hotel_id, models.Room.room_number)
+                .where(tuple_(models.Room.hotel_id, models.Room.room_number).in_(keys))
+            )).tuples())
+
+            now = datetime.utcnow()
+            lines, values = [], []
+            for line, room in chunk:
+                key = (room.hotel_id, room.room_number)
+                if room.hotel_id not in known_hotels:
+                    self.report.reject(line, f"hotel {room.hotel_id} not found")
+                elif key in existing or key in seen:
+                    self.report.reject(line, f"room {room.room_number} already exists in hotel {room.hotel_id}")
+                else:
+                    seen.add(key)
+                    lines.append(line)
+                    values.append({**room.model_dump(), "created_at": now})
+
+            search_pairs = [("room_type", row["room_type"]) for row in values]
+            if await self._write(models.Room, lines, values, search_pairs):
+                await self.cache_service.invalidate_imported({row["hotel_id"] for row in values})
+        return self.report.result()
+
+    async def import_users(self, rows: AsyncIterator[ImportRow]) -> Dict[str, Any]:
+        seen: Set[str] = set()
+        async for chunk in self._chunks(rows, schemas.UserImport):
+            emails = {user.email for _, user in chunk}
+            existing = set((await self.db.execute(
+                select(models.User.email).where(models.User.email.in_(emails))
+            )).scalars())
+
+            lines, accepted = [], []
+            for line, user in chunk:
+                if user.email in existing or user.email in seen:
+                    self.report.reject(line, f"user {user.email} already exists")
+                else:
+                    seen.add(user.email)
+                    lines.append(line)
+                    accepted.append(user)
+
+            # bcrypt намеренно медленный: хеши считаются в пуле потоков, а не в цикле событий
+            hashes = await asyncio.to_thread(
+                lambda: [user.hashed_password or get_password_hash(user.password) for user in accepted]
+            )
+            now = datetime.utcnow()
+            values = [
+                {**user.model_dump(exclude={"password", "hashed_password"}), "hashed_password": hashed, "created_at": now}
+                for user, hashed in zip(accepted, hashes)
+            ]
+            await self._write(models.User, lines, values)
+        return self.report.result()
@@ -1,12 +1,137 @@
+import asyncio
 import logging
-from typing import Optional, List, Dict, Any
-from app.core.redis import get_redis_manager
+import math
+import random
+import time
+import uuid
+from typing import Optional, List, Dict, Any, Iterable, Callable, Awaitable, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.core.redis import get_redis_manager, CACHE_INVALIDATION_CHANNEL
 from app.core.redis import RedisManager
+from app.services.local_cache import local_cache, TierStats
+from app.services.single_flight import single_flight
 import json
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Идентификатор воркера: свои сообщения об инвалидации уже применены локально
+WORKER_ID = uuid.uuid4().hex
+
+redis_stats = TierStats()
+
+# Теги для инвалидации закэшированных выборок: ключи выборки регистрируются
+# в множествах tag:<тег>, и весь тег удаляется без KEYS за два round-trip'а
+HOTELS_LIST_TAG = "hotels"
+ROOMS_LIST_TAG = "rooms"
+
+# Выборки, зависящие от бронирований (статусы и свободные даты комнат).
+# Бронирования сбрасывают только их, не трогая данные и списки отелей
+AVAILABILITY_TAG = "availability"
+
+def hotel_tag(hotel_id: int) -> str:
+    return f"hotel:{hotel_id}"
+
+def availability_tag(hotel_id: int) -> str:
+    return f"availability:{hotel_id}"
+
+def search_key(search_params: Dict[str, Any]) -> str:
+    key_parts = [f"{k}:{v}" for k, v in sorted(search_params.items())]
+    return f"rooms_search:{':'.join(key_parts)}"
+
+def search_tags(search_params: Dict[str, Any]) -> List[str]:
+    """Теги выборки по умолчанию: отель и его доступность, если выборка ограничена одним отелем"""
+    hotel_id = search_params.get("hotel_id")
+    return [hotel_tag(hotel_id), availability_tag(hotel_id)] if hotel_id is not None else []
+
+# Признак записи со сроком свежести (stale-while-revalidate)
+SWR_MARKER = "__swr__"
+
+swr_stats = {"fresh": 0, "early": 0, "stale": 0, "refreshes": 0, "refresh_errors": 0}
+
+_refresh_tasks: Set[asyncio.Task] = set()
+
+def cache_ttls(family: str) -> Tuple[int, int]:
+    """(мягкий, жесткий) TTL семейства ключей: hotels, rooms, rooms_search, user_bookings"""
+    soft_ttl, hard_ttl = settings.CACHE_TTLS[family]
+    return int(soft_ttl), int(hard_ttl)
+
+def wrap_entry(value: Any, soft_ttl: float, delta: float) -> Dict[str, Any]:
+    """Запись кэша: значение, момент мягкого устаревания и время вычисления"""
+    return {SWR_MARKER: 1, "value": value, "soft_expires_at": time.time() + soft_ttl, "delta": delta}
+
+def unwrap_entry(entry: Any) -> Any:
+    if isinstance(entry, dict) and SWR_MARKER in entry:
+        return entry["value"]
+    return entry
+
+def entry_state(entry: Any, now: Optional[float] = None) -> str:
+    """
+    "fresh", "early" (XFetch решил пересчитать досрочно) или "stale".
+    XFetch: пересчет, если now - delta * beta * ln(rand) >= soft_expires_at,
+    т.е. чем дороже вычисление и ближе мягкий TTL, тем вероятнее ранний пересчет.
+    Записи без сроков (прежний формат) считаются свежими.
+    """
+    if not (isinstance(entry, dict) and SWR_MARKER in entry):
+        return "fresh"
+    now = time.time() if now is None else now
+    if now >= entry["soft_expires_at"]:
+        return "stale"
+    gap = -entry["delta"] * settings.CACHE_XFETCH_BETA * math.log(1.0 - random.random())
+    return "early" if now + gap >= entry["soft_expires_at"] else "fresh"
+
+async def drain_refreshes():
+    """Дождаться фоновых пересчетов (тесты, остановка приложения)"""
+    while _refresh_tasks:
+        await asyncio.gather(*list(_refresh_tasks), return_exceptions=True)
+
+def apply_invalidation_message(data: str) -> int:
+    """Применить к локальному кэшу инвалидацию, пришедшую от другого воркера"""
+    message = json.loads(data)
+    if message.get("origin") == WORKER_ID:
+        return 0
+    return local_cache.invalidate(message.get("keys", ()), message.get("tags", ()))
+
+async def listen_for_invalidations(reconnect_delay: float = 1.0, max_reconnect_delay: float = 60.0):
+    """
+    Фоновая задача воркера: подписка на инвалидации остальных воркеров.
+    После (пере)подключения локальный кэш сбрасывается целиком: пока
+    подписки не было, сообщения могли быть потеряны. Без Redis задача
+    ждет с экспоненциальной паузой и пишет в лог только первую ошибку;
+    локальные записи в это время живут не дольше LOCAL_CACHE_TTL.
+    """
+    delay = reconnect_delay
+    while True:
+        manager = await get_redis_manager()
+        pubsub = None
+        try:
+            if not await manager.ping():
+                raise ConnectionError("Redis is not connected")
+            pubsub = manager.redis.pubsub(ignore_subscribe_messages=True)
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            local_cache.clear(reset_stats=False)
+            delay = reconnect_delay
+            logger.info("Subscribed to cache invalidation channel")
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    apply_invalidation_message(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if delay == reconnect_delay:
+                logger.warning(f"Cache invalidation listener disconnected: {e}")
+            else:
+                logger.debug(f"Cache invalidation listener still disconnected: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_reconnect_delay)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
 class CacheService:
     def __init__(self):
         self.redis_manager: Optional[RedisManager] = None
@@ -16,37 +141,185 @@ class CacheService:
             self.redis_manager = await get_redis_manager()
         return self.redis_manager
     
+    async def _get_tiered(self, key: str, local: bool, tags: Iterable[str] = ()) -> Optional[Any]:
+        """Сначала локальный LRU, затем Redis; попадание в Redis прогревает LRU"""
+        local = local and settings.LOCAL_CACHE_ENABLED
+        if local:
+            found, value = local_cache.get(key)
+            if found:
+                return value
+        
+        manager = await self._get_manager()
+        value = await manager.get_key(key)
+        redis_stats.record(value is not None)
+        if local and value is not None:
+            local_cache.set(key, value, tags=tags)
+        return value
+    
+    async def _invalidate(self, keys: List[str], tags: List[str]):
+        """Инвалидировать оба уровня и оповестить остальные воркеры"""
+        local_cache.invalidate(keys, tags)
+        manager = await self._get_manager()
+        await manager.invalidate_tags(
+            tags,
+            keys=keys,
+            publish={"origin": WORKER_ID, "keys": keys, "tags": tags}
+        )
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[AsyncSession], Awaitable[Any]],
+        family: str,
+        db: AsyncSession,
+        tags: Iterable[str] = (),
+        local: bool = False
+    ) -> Any:
+        """
+        Read-through с single-flight и stale-while-revalidate.
+        При промахе значение вычисляет один запрос на ключ: внутри воркера
+        остальные ждут его результат, между воркерами - короткую блокировку
+        lock:<key> в Redis, опрашивая кэш. После мягкого TTL семейства
+        (settings.CACHE_TTLS) запись отдается сразу, а в фоне один запрос
+        пересчитывает ее; XFetch запускает пересчет чуть раньше, с
+        вероятностью, растущей к мягкому TTL. Жесткий TTL - срок жизни в Redis.
+        compute(session) должен вернуть JSON-сериализуемое значение; фоновый
+        пересчет получает собственную сессию на том же движке, что и db.
+        """
+        tags = list(tags)
+        soft_ttl, hard_ttl = cache_ttls(family)
+        
+        entry = await self._get_tiered(key, local, tags)
+        if entry is not None:
+            state = entry_state(entry)
+            swr_stats[state] += 1
+            if state != "fresh":
+                self._schedule_refresh(key, compute, db.bind, soft_ttl, hard_ttl, tags, local)
+            return unwrap_entry(entry)
+        
+        entry = await single_flight.do(
+            key,
+            lambda: self._compute_once(key, lambda: compute(db), soft_ttl, hard_ttl, tags, local)
+        )
+        return unwrap_entry(entry)
+    
+    async def _compute_once(self, key: str, compute, soft_ttl: int, hard_ttl: int, tags: List[str], local: bool) -> Any:
+        manager = await self._get_manager()
+        lock_name = f"lock:{key}"
+        should_compute, lock = await manager.try_lock(lock_name, settings.SINGLE_FLIGHT_LOCK_TTL)
+        
+        if not should_compute:
+            entry = await self._wait_for_value(manager, key, lock_name)
+            if entry is not None:
+                if local and settings.LOCAL_CACHE_ENABLED:
+                    local_cache.set(key, entry, tags=tags)
+                return entry
+            # Вычислявший воркер упал или не уложился в аренду - считаем сами
+        
+        try:
+            started = time.perf_counter()
+            value = await compute()
+            entry = wrap_entry(value, soft_ttl, time.perf_counter() - started)
+            if local and settings.LOCAL_CACHE_ENABLED:
+                local_cache.set(key, entry, tags=tags, ttl=min(local_cache.ttl, hard_ttl))
+            await manager.set_key_with_tags(key, entry, tags, hard_ttl)
+            return entry
+        finally:
+            await manager.release_lock(lock)
+    
+    def _schedule_refresh(self, key: str, compute, bind, soft_ttl: int, hard_ttl: int, tags: List[str], local: bool):
+        """Пересчитать устаревшую запись в фоне; повторные запросы присоединяются к идущему пересчету"""
+        if key in single_flight:
+            return
+        
+        async def compute_with_own_session():
+            # Сессия запроса закроется раньше, чем закончится фоновый пересчет
+            async with AsyncSession(bind, expire_on_commit=False) as session:
+                return await compute(session)
+        
+        async def refresh():
+            try:
+                await single_flight.do(
+                    key,
+                    lambda: self._compute_once(key, compute_with_own_session, soft_ttl, hard_ttl, tags, local)
+                )
+                swr_stats["refreshes"] += 1
+            except Exception as e:
+                swr_stats["refresh_errors"] += 1
+                logger.warning(f"Background refresh of {key} failed: {e}")
+        
+        task = asyncio.create_task(refresh())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+    
+    async def _wait_for_value(self, manager: RedisManager, key: str, lock_name: str) -> Optional[Any]:
+        """Дождаться значения, которое вычисляет другой воркер, не дольше аренды блокировки"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SINGLE_FLIGHT_LOCK_TTL
+        while loop.time() < deadline:
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+            value = await manager.get_key(key)
+            if value is not None:
+                return value
+            if not await manager.exists(lock_name):
+                # Блокировку отпустили без значения: повторная проверка кэша и выход
+                return await manager.get_key(key)
+        return None
+    
+    def get_tier_stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий по уровням кэша этого воркера"""
+        return {
+            "local": local_cache.info(),
+            "redis": redis_stats.as_dict(),
+            "single_flight": single_flight.info(),
+            "swr": dict(swr_stats),
+        }
+    
     async def cache_hotel(self, hotel_id: int, hotel_data: Dict[str, Any], expire: int = 3600):
         """Кэшировать данные отеля"""
         manager = await self._get_manager()
         key = f"hotel:{hotel_id}"
+        if settings.LOCAL_CACHE_ENABLED:
+            local_cache.set(key, hotel_data, tags=[hotel_tag(hotel_id)])
         await manager.set_key(key, hotel_data, expire)
         logger.info(f"Hotel {hotel_id} cached")
     
     async def get_cached_hotel(self, hotel_id: int) -> Optional[Dict[str, Any]]:
         """Получить кэшированные данные отеля"""
-        manager = await self._get_manager()
-        key = f"hotel:{hotel_id}"
-        return await manager.get_key(key)
+        return await self._get_tiered(f"hotel:{hotel_id}", local=True, tags=[hotel_tag(hotel_id)])
     
-    async def cache_available_rooms(self, search_params: Dict[str, Any], rooms_data: List[Dict[str, Any]], expire: int = 1800):
-        """Кэшировать результаты поиска комнат"""
+    async def cache_available_rooms(
+        self,
+        search_params: Dict[str, Any],
+        rooms_data: List[Dict[str, Any]],
+        expire: int = 1800,
+        tags: Optional[List[str]] = None,
+        local: bool = False
+    ):
+        """
+        Кэшировать результаты поиска комнат под тегами для инвалидации.
+        local=True - дополнительно держать выборку в локальном LRU воркера.
+        """
         manager = await self._get_manager()
         
-        key_parts = [f"{k}:{v}" for k, v in sorted(search_params.items())]
-        key = f"rooms_search:{':'.join(key_parts)}"
+        key = search_key(search_params)
+        tags = search_tags(search_params) if tags is None else tags
+        
+        if local and settings.LOCAL_CACHE_ENABLED:
+            local_cache.set(key, rooms_data, tags=tags)
         
-        await manager.set_key(key, rooms_data, expire)
+        await manager.set_key_with_tags(key, rooms_data, tags, expire)
         logger.info(f"Rooms search cached for key: {key}")
     
-    async def get_cached_rooms(self, search_params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    async def get_cached_rooms(
+        self,
+        search_params: Dict[str, Any],
+        local: bool = False,
+        tags: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
         """Получить кэшированные результаты поиска комнат"""
-        manager = await self._get_manager()
-        
-        key_parts = [f"{k}:{v}" for k, v in sorted(search_params.items())]
-        key = f"rooms_search:{':'.join(key_parts)}"
-        
-        return await manager.get_key(key)
+        tags = search_tags(search_params) if tags is None else tags
+        return await self._get_tiered(search_key(search_params), local, tags)
 
     async def cache_user_bookings(self, user_id: int, bookings_data: List[dict]):
         """Кэшировать бронирования пользователя"""
@@ -82,16 +355,77 @@ class CacheService:
     
     async def invalidate_hotel_cache(self, hotel_id: int):
         """Инвалидировать кэш отеля"""
-        manager = await self._get_manager()
+        # Выборки отеля (включая его комнаты) и общие списки, куда он входит
+        await self._invalidate(
+            [f"hotel:{hotel_id}"],
+            [hotel_tag(hotel_id), HOTELS_LIST_TAG, ROOMS_LIST_TAG]
+        )
+        
+        logger.info(f"Cache invalidated for hotel {hotel_id}")
+    
+    async def invalidate_booking_related(
+        self,
+        booking_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        hotel_id: Optional[int] = None
+    ):
+        """
+        Инвалидировать кэш бронирования, пользователя и доступности комнат отеля.
+        Данные отеля и список отелей от бронирований не зависят и остаются в кэше.
+        """
+        keys = []
+        tags = []
+        if booking_id is not None:
+            keys.append(f"booking:{booking_id}")
+        if user_id is not None:
+            keys.append(f"user_bookings:{user_id}")
+        if hotel_id is not None:
+            tags.extend([availability_tag(hotel_id), AVAILABILITY_TAG])
         
-        await manager.delete_key(f"hotel:{hotel_id}")
+        await self._invalidate(keys, tags)
         
-        pattern = f"rooms_search:*hotel_id:{hotel_id}*"
-        keys = await manager.keys(pattern)
-        for key in keys:
-            await manager.delete_key(key)
+        logger.info(f"Cache invalidated for booking {booking_id}, user {user_id}, hotel {hotel_id}")
+    
+    async def invalidate_removed_inventory(
+        self,
+        hotel_id: int,
+        booking_ids: Iterable[int] = (),
+        user_ids: Iterable[int] = ()
+    ):
+        """
+        Инвалидировать кэш после удаления комнаты или отеля: данные отеля,
+        списки, доступность, а также затронутые бронирования и списки
+        бронирований их владельцев. Ключи уходят пачками по
+        REMOVAL_BATCH_SIZE, чтобы сообщение в канал оставалось небольшим.
+        """
+        keys = [f"booking:{booking_id}" for booking_id in booking_ids]
+        keys.extend(f"user_bookings:{user_id}" for user_id in sorted(set(user_ids)))
+        tags = [hotel_tag(hotel_id), HOTELS_LIST_TAG, ROOMS_LIST_TAG, availability_tag(hotel_id), AVAILABILITY_TAG]
         
-        logger.info(f"Cache invalidated for hotel {hotel_id}")
+        chunk = settings.REMOVAL_BATCH_SIZE
+        await self._invalidate(keys[:chunk], tags)
+        for offset in range(chunk, len(keys), chunk):
+            await self._invalidate(keys[offset:offset + chunk], [])
+        
+        logger.info(f"Cache invalidated for hotel {hotel_id} and {len(keys)} booking keys")
+    
+    async def invalidate_imported(self, hotel_ids: Iterable[int] = ()):
+        """
+        Инвалидировать кэш после пачки массового импорта одним вызовом:
+        списки отелей и комнат, а для отелей, получивших комнаты, - их
+        данные и доступность
+        """
+        hotel_ids = sorted(set(hotel_ids))
+        keys = [f"hotel:{hotel_id}" for hotel_id in hotel_ids]
+        tags = [HOTELS_LIST_TAG, ROOMS_LIST_TAG]
+        for hotel_id in hotel_ids:
+            tags.extend([hotel_tag(hotel_id), availability_tag(hotel_id)])
+        if hotel_ids:
+            tags.append(AVAILABILITY_TAG)
+        
+        await self._invalidate(keys, tags)
+        
+        logger.info(f"Cache invalidated after import for {len(hotel_ids)} hotels")
     
     async def invalidate_user_cache(self, user_id: int):
         """Инвалидировать кэш пользователя"""
@@ -108,23 +442,47 @@ class CacheService:
         logger.info(f"Cache invalidated for booking {booking_id}")
     
     async def track_booking_stats(self, hotel_id: int, room_id: int):
-        """Трекинг статистики бронирований"""
+        """Трекинг статистики бронирований одним pipeline; ошибки Redis пробрасываются"""
         manager = await self._get_manager()
         
-        await manager.increment(f"stats:hotel:{hotel_id}:bookings")
-        await manager.increment(f"stats:room:{room_id}:bookings")
-        await manager.increment("stats:total_bookings")
+        async with manager.pipeline() as pipe:
+            if pipe is None:
+                return
+            pipe.incr(f"stats:hotel:{hotel_id}:bookings")
+            pipe.incr(f"stats:room:{room_id}:bookings")
+            pipe.incr("stats:total_bookings")
+            pipe.sadd("popular:rooms", str(room_id))
+            pipe.sadd("popular:hotels", str(hotel_id))
+    
+    async def track_group_booking_stats(self, hotel_id: int, room_ids: List[int]):
+        """Статистика группового бронирования тем же pipeline, что и track_booking_stats"""
+        manager = await self._get_manager()
         
-        await manager.add_to_set("popular:rooms", str(room_id))
-        await manager.add_to_set("popular:hotels", str(hotel_id))
+        async with manager.pipeline() as pipe:
+            if pipe is None:
+                return
+            pipe.incrby(f"stats:hotel:{hotel_id}:bookings", len(room_ids))
+            for room_id in room_ids:
+                pipe.incr(f"stats:room:{room_id}:bookings")
+            pipe.incrby("stats:total_bookings", len(room_ids))
+            pipe.sadd("popular:rooms", *[str(room_id) for room_id in room_ids])
+            pipe.sadd("popular:hotels", str(hotel_id))
     
     async def get_booking_stats(self) -> Dict[str, Any]:
         """Получить статистику бронирований"""
         manager = await self._get_manager()
         
-        total_bookings = await manager.get_key("stats:total_bookings") or 0
-        popular_rooms = await manager.get_set("popular:rooms")
-        popular_hotels = await manager.get_set("popular:hotels")
+        total_bookings, popular_rooms, popular_hotels = 0, set(), set()
+        try:
+            async with manager.pipeline() as pipe:
+                if pipe is not None:
+                    pipe.get("stats:total_bookings")
+                    pipe.smembers("popular:rooms")
+                    pipe.smembers("popular:hotels")
+                    total_bookings, popular_rooms, popular_hotels = await pipe.execute()
+        except Exception as e:
+            logger.error(f"Failed to get booking stats: {e}")
+        total_bookings = int(total_bookings or 0)
         
         return {
             "total_bookings": total_bookings,
@@ -0,0 +1,332 @@
+import csv
+import enum
+import io
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, text
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES, BookingStatus, RoomStatus, UserRole
+from app.core.security import get_password_hash
+from app.services.booking_stats import rebuild_booking_stats
+from app.services.room_nights import booking_nights
+from app.services.text_search import rebuild_search_index
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10000
+
+# Пароль всех сгенерированных пользователей: bcrypt считается один раз
+DEFAULT_PASSWORD = "password"
+
+# Города с весами: в крупных городах отелей больше
+CITIES = (
+    ("Москва", "Россия", 30), ("Санкт-Петербург", "Россия", 18), ("Сочи", "Россия", 10),
+    ("Казань", "Россия", 8), ("Новосибирск", "Россия", 6), ("Екатеринбург", "Россия", 6),
+    ("Калининград", "Россия", 5), ("Ярославль", "Россия", 4), ("Минск", "Беларусь", 5),
+    ("Алматы", "Казахстан", 4), ("Ереван", "Армения", 2), ("Тбилиси", "Грузия", 2),
+)
+
+# (тип комнаты, вес, базовая цена за ночь, вместимость)
+ROOM_TYPES = (
+    ("Standard", 45, 2000, 2), ("Business", 15, 4000, 2), ("Deluxe", 15, 3500, 2),
+    ("Superior", 10, 4500, 3), ("Family", 10, 5000, 4), ("Suite", 5, 7000, 4),
+)
+
+# Длительность проживания в ночах и ее вес: чаще всего 1-3 ночи
+STAY_LENGTHS = ((1, 25), (2, 25), (3, 18), (4, 10), (5, 7), (6, 4), (7, 6), (10, 3), (14, 2))
+
+# Сезонность загрузки по месяцам: пик летом и в декабре
+SEASONALITY = (0.75, 0.8, 0.9, 0.95, 1.05, 1.15, 1.25, 1.25, 1.05, 0.9, 0.8, 1.0)
+
+SPECIAL_REQUESTS = (None,) * 7 + ("Поздний заезд", "Детская кроватка", "Тихий номер")
+
+_CITY_WEIGHTS = [city[2] for city in CITIES]
+_ROOM_TYPE_WEIGHTS = [room_type[1] for room_type in ROOM_TYPES]
+_STAY_WEIGHTS = [stay[1] for stay in STAY_LENGTHS]
+MEAN_STAY = sum(nights * weight for nights, weight in STAY_LENGTHS) / sum(_STAY_WEIGHTS)
+
+CHECK_IN_TIME = timedelta(hours=14)
+CHECK_OUT_TIME = timedelta(hours=12)
+
+class _Writer:
+    """
+    Буфер строк одной таблицы. Сбрасывается пачкой: на PostgreSQL с
+    psycopg2 - COPY ... FROM STDIN, иначе executemany.
+    Enum пишется именем, как его хранит SQLAlchemy.
+    """
+
+    def __init__(self, connection, table):
+        self.connection = connection
+        self.table = table
+        self.rows: List[Dict[str, Any]] = []
+        self.total = 0
+        self.use_copy = connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2"
+
+    def add(self, row: Dict[str, Any]):
+        self.rows.append(row)
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            self._copy()
+        else:
+            self.connection.execute(insert(self.table), self.rows)
+        self.total += len(self.rows)
+        self.rows = []
+
+    def _copy(self):
+        columns = list(self.rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in self.rows:
+            writer.writerow([
+                value.name if isinstance(value, enum.Enum) else value
+                for value in (row[column] for column in columns)
+            ])
+        buffer.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            # Пустое поле без кавычек в CSV - NULL
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+class DatasetGenerator:
+    """
+    Синтетический набор данных для нагрузочных тестов: отели, комнаты,
+    пользователи и бронирования с правдоподобными датами и загрузкой.
+    Один и тот же seed дает те же строки. Данные пишутся пачками по
+    BATCH_SIZE в обход ORM (executemany, на PostgreSQL - COPY) вместе с
+    инвентарем room_nights; id назначаются явно после текущего максимума,
+    поэтому генерировать можно и в непустую базу.
+
+    Бронирования комнаты идут подряд без пересечений: длительность из
+    STAY_LENGTHS, промежуток между заездами подобран под целевую
+    загрузку с учетом сезона и популярности отеля. Последнее бронирование
+    заканчивается не позже now + future_days: прошедшие бронирования завершены, текущие
+    заселены, будущие подтверждены; часть прошедших и будущих отменена.
+    """
+
+    def __init__(
+        self,
+        hotels: int,
+        rooms_per_hotel: int,
+        bookings: int,
+        users: Optional[int] = None,
+        occupancy: float = 0.7,
+        cancellation_rate: float = 0.1,
+        future_days: int = 90,
+        seed: int = 42,
+        now: Optional[datetime] = None,
+    ):
+        self.hotels = hotels
+        self.rooms_per_hotel = rooms_per_hotel
+        self.bookings = bookings
+        self.users = users if users is not None else max(10, bookings // 10)
+        self.occupancy = min(max(occupancy, 0.05), 0.95)
+        self.cancellation_rate = cancellation_rate
+        self.future_days = future_days
+        self.now = now or datetime.utcnow()
+        self.rng = random.Random(seed)
+
+    def _next_ids(self, connection) -> Dict[str, int]:
+        return {
+            model.__tablename__: (connection.execute(select(func.max(model.id))).scalar() or 0) + 1
+            for model in (models.Hotel, models.Room, models.User, models.Booking)
+        }
+
+    def _hotel_rows(self, first_id: int):
+        for offset in range(self.hotels):
+            city, country, _ = self.rng.choices(CITIES, _CITY_WEIGHTS)[0]
+            hotel_id = first_id + offset
+            yield {
+                "id": hotel_id,
+                "name": f"Hotel {city} {hotel_id}",
+                "description": None,
+                "address": f"ул. Тестовая, {self.rng.randint(1, 200)}",
+                "city": city,
+                "country": country,
+                "rating": round(self.rng.triangular(3.0, 5.0, 4.3), 1),
+                "created_at": self.now,
+            }
+
+    def _room_rows(self, hotel: Dict[str, Any], first_id: int):
+        city_factor = 1.5 if hotel["city"] == "Москва" else 1.3 if hotel["city"] == "Санкт-Петербург" else 1.0
+        for index in range(self.rooms_per_hotel):
+            room_type, _, base_price, capacity = self.rng.choices(ROOM_TYPES, _ROOM_TYPE_WEIGHTS)[0]
+            floor = 1 + index // 20
+            yield {
+                "id": first_id + index,
+                "hotel_id": hotel["id"],
+                "room_number": f"{floor}{index % 20 + 1:02d}",
+                "floor": floor,
+                "room_type": room_type,
+                "description": None,
+                "price_per_night": round(base_price * city_factor * self.rng.uniform(0.9, 1.2), 2),
+                "capacity": capacity,
+                "amenities": None,
+                "status": RoomStatus.AVAILABLE,
+                "created_at": self.now,
+            }
+
+    def _user_rows(self, first_id: int):
+        hashed_password = get_password_hash(DEFAULT_PASSWORD)
+        for offset in range(self.users):
+            user_id = first_id + offset
+            yield {
+                "id": user_id,
+                "email": f"user{user_id}@example.com",
+                "first_name": f"User{user_id}",
+                "last_name": "Test",
+                "phone": None,
+                "role": UserRole.USER,
+                "hashed_password": hashed_password,
+                "created_at": self.now,
+            }
+
+    def _status(self, check_in: datetime, check_out: datetime) -> BookingStatus:
+        if check_out <= self.now:
+            cancelled, done = BookingStatus.CANCELLED, BookingStatus.COMPLETED
+        elif check_in <= self.now:
+            return BookingStatus.CHECKED_IN
+        else:
+            cancelled, done = BookingStatus.CANCELLED, BookingStatus.CONFIRMED
+        return cancelled if self.rng.random() < self.cancellation_rate else done
+
+    def _room_stays(self, count: int, hotel_occupancy: float) -> List[Tuple[datetime, int]]:
+        """
+        count непересекающихся проживаний одной комнаты, по возрастанию дат:
+        (первая ночь, число ночей). Строятся назад от now + future_days,
+        поэтому чем больше бронирований на комнату, тем длиннее история.
+        """
+        stays = []
+        day = self.now.date() + timedelta(days=self.future_days)
+        for _ in range(count):
+            occupancy = min(hotel_occupancy * SEASONALITY[day.month - 1], 0.95)
+            # Свободные ночи между проживаниями: в среднем nights * (1 - загрузка) / загрузка
+            day -= timedelta(days=round(self.rng.expovariate(occupancy / ((1 - occupancy) * MEAN_STAY))))
+            nights = self.rng.choices(STAY_LENGTHS, _STAY_WEIGHTS)[0][0]
+            day -= timedelta(days=nights)
+            stays.append((day, nights))
+        stays.reverse()
+        return stays
+
+    def _user_id(self, first_id: int) -> int:
+        # Постоянные гости бронируют чаще: распределение смещено к первым пользователям
+        return first_id + int(self.users * self.rng.random() ** 2)
+
+    def generate(self, connection, progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, Any]:
+        """Сгенерировать набор в connection, коммитя каждую пачку"""
+        started = time.perf_counter()
+        ids = self._next_ids(connection)
+        writers = {
+            name: _Writer(connection, model.__table__)
+            for name, model in (
+                ("hotels", models.Hotel), ("rooms", models.Room), ("users", models.User),
+                ("bookings", models.Booking), ("room_nights", models.RoomNight),
+            )
+        }
+
+        def flush(force: bool = False):
+            if not force and all(len(writer.rows) < BATCH_SIZE for writer in writers.values()):
+                return
+            # Порядок важен для внешних ключей: бронирования раньше их ночей
+            for writer in writers.values():
+                writer.flush()
+            connection.commit()
+            if progress:
+                progress({name: writer.total for name, writer in writers.items()})
+
+        # Для бронирований нужны только id, отель, цена и вместимость комнаты
+        rooms: List[Tuple[int, int, float, int, float]] = []
+        next_room_id = ids["rooms"]
+        for hotel in self._hotel_rows(ids["hotels"]):
+            writers["hotels"].add(hotel)
+            # Популярность отеля: загрузка отличается от целевой на +-20%
+            hotel_occupancy = min(self.occupancy * self.rng.uniform(0.8, 1.2), 0.95)
+            for room in self._room_rows(hotel, next_room_id):
+                writers["rooms"].add(room)
+                rooms.append((room["id"], hotel["id"], room["price_per_night"], room["capacity"], hotel_occupancy))
+                flush()
+            next_room_id += self.rooms_per_hotel
+
+        for user in self._user_rows(ids["users"]):
+            writers["users"].add(user)
+            flush()
+        flush(force=True)
+
+        booking_id = ids["bookings"]
+        per_room, extra = divmod(self.bookings, len(rooms)) if rooms and self.users else (0, 0)
+        for index, (room_id, hotel_id, price, capacity, hotel_occupancy) in enumerate(rooms):
+            count = per_room + (1 if index < extra else 0)
+            for first_night, nights in self._room_stays(count, hotel_occupancy):
+                check_in = datetime.combine(first_night, datetime.min.time()) + CHECK_IN_TIME
+                check_out = datetime.combine(first_night + timedelta(days=nights), datetime.min.time()) + CHECK_OUT_TIME
+                status = self._status(check_in, check_out)
+                writers["bookings"].add({
+                    "id": booking_id,
+                    "booking_reference": str(uuid.UUID(int=self.rng.getrandbits(128), version=4)),
+                    "user_id": self._user_id(ids["users"]),
+                    "hotel_id": hotel_id,
+                    "room_id": room_id,
+                    "check_in_date": check_in,
+                    "check_out_date": check_out,
+                    "number_of_guests": self.rng.randint(1, capacity),
+                    "total_price": round(price * nights, 2),
+                    "status": status,
+                    "special_requests": self.rng.choice(SPECIAL_REQUESTS),
+                    # Бронируют в среднем за три недели до заезда
+                    "created_at": check_in - timedelta(days=round(self.rng.expovariate(1 / 21))),
+                })
+                if status in ACTIVE_BOOKING_STATUSES:
+                    for night in booking_nights(check_in, check_out):
+                        writers["room_nights"].add({"room_id": room_id, "night": night, "booking_id": booking_id})
+                booking_id += 1
+                flush()
+        flush(force=True)
+
+        self._finish(connection)
+        elapsed = time.perf_counter() - started
+        totals = {name: writer.total for name, writer in writers.items()}
+        rows = sum(totals.values())
+        logger.info(f"Dataset generated: {totals} in {elapsed:.1f}s")
+        return {
+            **totals,
+            "elapsed_seconds": round(elapsed, 2),
+            "rows_per_second": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def _finish(self, connection):
+        """
+        Последовательности id после явных id, индекс поиска и агрегаты
+        бронирований после вставки в обход ORM
+        """
+        rebuild_booking_stats(connection)
+        if connection.dialect.name == "postgresql":
+            for model in (models.Hotel, models.Room, models.User, models.Booking):
+                table = model.__tablename__
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+                ))
+        else:
+            rebuild_search_index(connection)
+        connection.commit()
+
+def clear_dataset(connection):
+    """Удалить отели, комнаты, пользователей и бронирования вместе с производными таблицами"""
+    for model in (
+        models.RoomNight, models.RoomStats, models.HotelStats, models.ArchivedBooking, models.Booking,
+        models.Room, models.Hotel, models.User, models.SearchTrigram,
+    ):
+        connection.execute(delete(model))
+    connection.commit()
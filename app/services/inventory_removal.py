@@ -0,0 +1,134 @@
+from typing import Dict, List, Set
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import ACTIVE_BOOKING_STATUSES, BookingStatus, RoomStatus
+from app.services.booking_stats import BookingStatsService
+from app.services.room_nights import RoomNightInventory
+
+class RemovedBookings:
+    """id бронирований, затронутых удалением, и их владельцы - для инвалидации кэша"""
+
+    def __init__(self):
+        self.booking_ids: List[int] = []
+        self.user_ids: Set[int] = set()
+
+    def add(self, rows):
+        for booking_id, user_id in rows:
+            self.booking_ids.append(booking_id)
+            if user_id is not None:
+                self.user_ids.add(user_id)
+
+class InventoryRemovalService:
+    """
+    Удаление комнат и отелей set-based запросами. Бронирования меняются
+    пачками по REMOVAL_BATCH_SIZE: UPDATE/DELETE ... WHERE id IN (SELECT
+    ... LIMIT n) RETURNING id, user_id, и каждая пачка коммитится отдельно,
+    чтобы история за годы не держала блокировки одной длинной транзакцией.
+    Сначала комнаты переводятся в INACTIVE: create_booking отклоняет
+    неактивную комнату, и новые брони не появляются между пачками.
+    Прерванное удаление можно повторить - обработанные пачки не повторяются.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.batch_size = settings.REMOVAL_BATCH_SIZE
+
+    async def _deactivate_rooms(self, condition):
+        await self.db.execute(
+            update(models.Room)
+            .where(condition)
+            .values(status=RoomStatus.INACTIVE)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+
+    async def _in_batches(self, statement, selection, removed: RemovedBookings) -> int:
+        """
+        Выполнять statement для очередной пачки id из selection, пока пачки не кончатся.
+        statement должен выводить бронирования из selection, иначе цикл не завершится.
+        """
+        total = 0
+        while True:
+            batch = selection.limit(self.batch_size).scalar_subquery()
+            rows = (await self.db.execute(
+                statement.where(models.Booking.id.in_(batch))
+                .returning(models.Booking.id, models.Booking.user_id)
+                .execution_options(synchronize_session=False)
+            )).all()
+            if not rows:
+                return total
+            booking_ids = [row[0] for row in rows]
+            await self.db.execute(delete(models.RoomNight).where(models.RoomNight.booking_id.in_(booking_ids)))
+            await self.db.commit()
+            removed.add(rows)
+            total += len(rows)
+
+    async def remove_room(self, room: models.Room) -> Dict[str, object]:
+        """
+        Отменить активные бронирования комнаты, отвязать от нее историю
+        (room_id = NULL) и удалить комнату
+        """
+        room_id, hotel_id = room.id, room.hotel_id
+        await self._deactivate_rooms(models.Room.id == room_id)
+
+        cancelled = RemovedBookings()
+        await self._in_batches(
+            update(models.Booking).values(status=BookingStatus.CANCELLED),
+            select(models.Booking.id).where(
+                models.Booking.room_id == room_id,
+                models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            ),
+            cancelled,
+        )
+
+        detached = RemovedBookings()
+        await self._in_batches(
+            update(models.Booking).values(room_id=None),
+            select(models.Booking.id).where(models.Booking.room_id == room_id),
+            detached,
+        )
+
+        await RoomNightInventory(self.db).remove_rooms([room_id])
+        await self.db.execute(delete(models.Room).where(models.Room.id == room_id))
+        # Массовые UPDATE выше слушатель сессии не видит: агрегаты отеля - пересчетом
+        await BookingStatsService(self.db).recompute_hotels([hotel_id])
+        await self.db.commit()
+
+        return {
+            "cancelled_booking_ids": cancelled.booking_ids,
+            "preserved_bookings": len(detached.booking_ids) - len(cancelled.booking_ids),
+            "booking_ids": detached.booking_ids,
+            "user_ids": detached.user_ids | cancelled.user_ids,
+        }
+
+    async def remove_hotel(self, hotel: models.Hotel) -> Dict[str, object]:
+        """Удалить бронирования отеля пачками, затем его комнаты и сам отель"""
+        hotel_id = hotel.id
+        await self._deactivate_rooms(models.Room.hotel_id == hotel_id)
+
+        deleted = RemovedBookings()
+        await self._in_batches(
+            delete(models.Booking),
+            select(models.Booking.id).where(models.Booking.hotel_id == hotel_id),
+            deleted,
+        )
+
+        room_ids = (await self.db.execute(
+            select(models.Room.id).where(models.Room.hotel_id == hotel_id)
+        )).scalars().all()
+        await RoomNightInventory(self.db).remove_rooms(room_ids)
+        rooms_result = await self.db.execute(delete(models.Room).where(models.Room.hotel_id == hotel_id))
+        await self.db.execute(delete(models.Hotel).where(models.Hotel.id == hotel_id))
+        await BookingStatsService(self.db).recompute_hotels([hotel_id])
+        await self.db.commit()
+
+        return {
+            "room_ids": list(room_ids),
+            "rooms_deleted": rooms_result.rowcount,
+            "booking_ids": deleted.booking_ids,
+            "user_ids": deleted.user_ids,
+        }
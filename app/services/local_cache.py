@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from app.config import settings
+
+class TierStats:
+    """Счетчики попаданий и промахов одного уровня кэша"""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
+
+class LocalCache:
+    """
+    Внутрипроцессный LRU-кэш с TTL - первый уровень перед Redis.
+    Хранит уже декодированные значения, поэтому попадание не стоит ни
+    round-trip'а, ни json.loads. Значения нельзя изменять после чтения.
+    Записи помечаются теми же тегами, что и в Redis, и инвалидируются
+    вместе с ними; другие воркеры узнают об инвалидации через pub/sub.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+        self.stats = TierStats()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Tuple[bool, Optional[Any]]:
+        """Вернуть (найдено, значение); просроченная запись считается промахом"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats.record(True)
+                return True, entry[1]
+            if entry is not None:
+                self._drop_locked(key)
+            self.stats.record(False)
+            return False, None
+
+    def set(self, key: str, value: Any, tags: Iterable[str] = (), ttl: Optional[float] = None):
+        """Положить значение; при переполнении вытесняется самая давняя запись"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        tags = tuple(tags)
+        with self._lock:
+            self._drop_locked(key)
+            self._entries[key] = (expires_at, value)
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop_locked(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop_locked(self, key: str) -> bool:
+        if self._entries.pop(key, None) is None:
+            return False
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def invalidate(self, keys: Iterable[str] = (), tags: Iterable[str] = ()) -> int:
+        """Удалить ключи и все записи под тегами"""
+        removed = 0
+        with self._lock:
+            doomed = set(keys)
+            for tag in tags:
+                doomed |= self._tags.get(tag, set())
+            for key in doomed:
+                if self._drop_locked(key):
+                    removed += 1
+        return removed
+
+    def clear(self, reset_stats: bool = True):
+        """Сбросить кэш и счетчики (например, между тестами)"""
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+            if reset_stats:
+                self.stats.reset()
+                self.evictions = 0
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            **self.stats.as_dict(),
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+local_cache = LocalCache(
+    max_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+    ttl=settings.LOCAL_CACHE_TTL,
+)
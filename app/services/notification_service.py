@@ -45,6 +45,39 @@ class NotificationService:
         )
         logger.info(f"Booking confirmation sent to {user_email}")
     
+    async def send_group_booking_confirmation(self, user_email: str, user_name: str, batch_data: dict):
+        """Отправить одно подтверждение на все комнаты группового бронирования"""
+        rooms = ", ".join(batch_data["room_numbers"])
+        message = NotificationMessage(
+            notification_type=NotificationType.EMAIL,
+            recipient=user_email,
+            subject="Подтверждение группового бронирования",
+            message=f"""
+                Уважаемый(ая) {user_name},
+
+                Ваше групповое бронирование подтверждено!
+
+                Детали бронирования:
+                - Отель: {batch_data.get('hotel_name', 'Название отеля')}
+                - Комнаты ({len(batch_data["room_numbers"])}): {rooms}
+                - Заезд: {batch_data['check_in_date'].strftime('%d.%m.%Y %H:%M')}
+                - Выезд: {batch_data['check_out_date'].strftime('%d.%m.%Y %H:%M')}
+                - Стоимость: {batch_data['total_price']} руб.
+
+                Спасибо за выбор нашего сервиса!
+            """.strip(),
+            template_id="group_booking_confirmation",
+            metadata={"booking_references": batch_data.get("booking_references")}
+        )
+        
+        manager = await self._get_manager()
+        await manager.publish_message(
+            exchange="notification_events",
+            routing_key="",
+            message=message.dict()
+        )
+        logger.info(f"Group booking confirmation sent to {user_email}")
+    
     async def send_booking_cancellation(self, user_email: str, user_name: str, booking_data: dict):
         """Отправить уведомление об отмене бронирования"""
         message = NotificationMessage(
@@ -0,0 +1,251 @@
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import ACTIVE_BOOKING_STATUSES
+from app.services.room_nights import REMOVED_ROOMS_KEY, DateLike, changed_bookings, night_range
+
+try:
+    import numpy as np
+except ImportError:  # numpy - необязательная зависимость, без нее матрица выключена
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# session.info: изменения бронирований, которые применяются к матрице после коммита
+PENDING_KEY = "occupancy_matrix_pending"
+
+class OccupancyMatrix:
+    """
+    Внутрипроцессная матрица занятости "комнаты × ночи" на скользящем
+    горизонте [origin, origin + days) в NumPy.
+    Ячейка - число активных бронирований на ночь, а не бит: снятие одной
+    из пересекающихся броней не должно освобождать ночь, занятую другой.
+    "Свободна ли комната все ночи [a, b)" для тысяч комнат - один срез
+    матрицы и any() по строкам вместо проверки каждой брони.
+    Как и booking_index, видит только коммиты своего процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._rows: Dict[int, int] = {}
+        self._free_rows: List[int] = []
+        # booking_id -> (room_id, первая ночь, ночь после последней)
+        self._bookings: Dict[int, Tuple[int, date, date]] = {}
+        self.origin: Optional[date] = None
+        self.days = 0
+        self.ready = False
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    def clear(self):
+        """Сбросить матрицу (например, между тестами)"""
+        with self._lock:
+            self._reset(None, 0)
+            self.ready = False
+
+    def _reset(self, origin: Optional[date], days: int, capacity: int = 0):
+        self._matrix = np.zeros((capacity, days), dtype=np.uint16) if np is not None and origin else None
+        self._rows = {}
+        self._free_rows = []
+        self._bookings = {}
+        self.origin = origin
+        self.days = days
+
+    def rebuild(self, db: Session, days: Optional[int] = None) -> int:
+        """Построить матрицу из активных бронирований (холодный старт)"""
+        if np is None:
+            logger.warning("numpy is not installed, occupancy matrix is disabled")
+            return 0
+
+        origin = date.today()
+        rows = db.query(
+            models.Booking.id,
+            models.Booking.room_id,
+            models.Booking.check_in_date,
+            models.Booking.check_out_date,
+        ).filter(
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.room_id.isnot(None),
+            models.Booking.check_out_date > datetime.combine(origin, time.min),
+        ).all()
+
+        with self._lock:
+            self._reset(origin, days or settings.OCCUPANCY_MATRIX_DAYS, capacity=len({row[1] for row in rows}))
+            for booking_id, room_id, check_in, check_out in rows:
+                self._add_locked(booking_id, room_id, check_in, check_out)
+            self.ready = True
+
+        logger.info(
+            f"Occupancy matrix rebuilt: {len(rows)} bookings, {len(self._rows)} rooms, "
+            f"{self.days} nights from {origin}"
+        )
+        return len(rows)
+
+    def _row(self, room_id: int) -> int:
+        row = self._rows.get(room_id)
+        if row is not None:
+            return row
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._rows)
+            if row >= self._matrix.shape[0]:
+                # Удвоение числа строк: амортизированно O(1) на новую комнату
+                grown = np.zeros((max(16, row * 2), self.days), dtype=self._matrix.dtype)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+        self._rows[room_id] = row
+        return row
+
+    def _columns(self, first: date, end: date, low: int = 0, high: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        """Столбцы ночей [first, end), обрезанные до [low, high); None - вне матрицы"""
+        high = self.days if high is None else high
+        start = max((first - self.origin).days, low)
+        stop = min((end - self.origin).days, high)
+        return (start, stop) if start < stop else None
+
+    def _apply(self, room_id: int, first: date, end: date, delta: int, low: int = 0, high: Optional[int] = None):
+        columns = self._columns(first, end, low, high)
+        if columns is None:
+            return
+        row = self._row(room_id) if delta > 0 else self._rows.get(room_id)
+        if row is None:
+            return
+        cells = self._matrix[row, columns[0]:columns[1]]
+        if delta > 0:
+            cells += 1
+        else:
+            cells -= 1
+
+    def _add_locked(self, booking_id: int, room_id: int, check_in: DateLike, check_out: DateLike):
+        self._remove_locked(booking_id)
+        first, end = night_range(check_in, check_out)
+        self._bookings[booking_id] = (room_id, first, end)
+        self._apply(room_id, first, end, 1)
+
+    def _remove_locked(self, booking_id: int):
+        booking = self._bookings.pop(booking_id, None)
+        if booking is not None:
+            self._apply(*booking, -1)
+
+    def _roll_locked(self, today: date):
+        """Сдвинуть горизонт на сегодня: прошедшие ночи уходят, новые заполняются из известных броней"""
+        shift = (today - self.origin).days
+        if shift <= 0:
+            return
+        if shift < self.days:
+            self._matrix[:, :self.days - shift] = self._matrix[:, shift:]
+        low = max(self.days - shift, 0)
+        self._matrix[:, low:] = 0
+        self.origin = today
+        for booking_id, (room_id, first, end) in list(self._bookings.items()):
+            if end <= today:
+                del self._bookings[booking_id]
+            else:
+                self._apply(room_id, first, end, 1, low=low)
+
+    def apply_changes(self, changes: Iterable[Tuple[int, Optional[int], Any, Any, bool]]):
+        """Применить закоммиченные изменения: (booking_id, room_id, заезд, выезд, активна ли)"""
+        with self._lock:
+            if not self.ready:
+                return
+            for booking_id, room_id, check_in, check_out, active in changes:
+                if active and room_id is not None:
+                    self._add_locked(booking_id, room_id, check_in, check_out)
+                else:
+                    self._remove_locked(booking_id)
+
+    def remove_rooms(self, room_ids: Iterable[int]):
+        """Забыть комнаты целиком (удаление комнаты или отеля)"""
+        with self._lock:
+            if not self.ready:
+                return
+            room_ids = set(room_ids)
+            for booking_id, booking in list(self._bookings.items()):
+                if booking[0] in room_ids:
+                    del self._bookings[booking_id]
+            for room_id in room_ids:
+                row = self._rows.pop(room_id, None)
+                if row is not None:
+                    self._matrix[row] = 0
+                    self._free_rows.append(row)
+
+    def covers(self, check_in: DateLike, check_out: DateLike) -> bool:
+        """Все ночи интервала внутри горизонта матрицы"""
+        if not self.ready:
+            return False
+        first, end = night_range(check_in, check_out)
+        today = date.today()
+        return first >= today and end <= today + timedelta(days=self.days)
+
+    def free_rooms(self, room_ids: Iterable[int], check_in: DateLike, check_out: DateLike) -> Optional[List[int]]:
+        """Какие из комнат свободны все ночи [check_in, check_out); None - интервал вне горизонта"""
+        room_ids = list(room_ids)
+        with self._lock:
+            if not self.ready:
+                return None
+            self._roll_locked(date.today())
+            first, end = night_range(check_in, check_out)
+            start, stop = (first - self.origin).days, (end - self.origin).days
+            if start < 0 or stop > self.days:
+                return None
+
+            rows = np.fromiter((self._rows.get(room_id, -1) for room_id in room_ids), dtype=np.int64, count=len(room_ids))
+            known = rows >= 0
+            busy = np.zeros(len(room_ids), dtype=bool)
+            if known.any():
+                busy[known] = self._matrix[rows[known], start:stop].any(axis=1)
+
+        return [room_id for room_id, is_busy in zip(room_ids, busy.tolist()) if not is_busy]
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "available": self.available(),
+                "ready": self.ready,
+                "origin": self.origin.isoformat() if self.origin else None,
+                "days": self.days,
+                "rooms": len(self._rows),
+                "bookings": len(self._bookings),
+                "memory_bytes": int(self._matrix.nbytes) if self._matrix is not None else 0,
+            }
+
+occupancy_matrix = OccupancyMatrix()
+
+@event.listens_for(Session, "after_flush")
+def _collect_booking_changes(session, flush_context):
+    """Запомнить изменения бронирований до коммита: откат не должен попасть в матрицу"""
+    if not occupancy_matrix.ready:
+        return
+    changed, deleted_ids = changed_bookings(session)
+    pending = session.info.setdefault(PENDING_KEY, [])
+    pending.extend(
+        (booking.id, booking.room_id, booking.check_in_date, booking.check_out_date,
+         booking.status in ACTIVE_BOOKING_STATUSES)
+        for booking in changed
+    )
+    pending.extend((booking_id, None, None, None, False) for booking_id in deleted_ids)
+
+@event.listens_for(Session, "after_commit")
+def _apply_booking_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    removed_rooms = session.info.pop(REMOVED_ROOMS_KEY, None)
+    if pending:
+        occupancy_matrix.apply_changes(pending)
+    if removed_rooms:
+        occupancy_matrix.remove_rooms(removed_rooms)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_booking_changes(session):
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(REMOVED_ROOMS_KEY, None)
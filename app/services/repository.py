@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import bindparam, inspect, lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES
+
+# Запросы горячих путей строятся один раз при импорте. Ключ кэша
+# скомпилированных запросов SQLAlchemy у готового объекта запоминается,
+# поэтому повторный вызов не собирает ни сам запрос, ни его ключ заново.
+# Значения передаются через bindparam.
+_ID = bindparam("id")
+
+HOTEL_BY_ID = select(models.Hotel).where(models.Hotel.id == _ID)
+ROOM_BY_ID = select(models.Room).where(models.Room.id == _ID)
+ROOM_WITH_HOTEL_BY_ID = ROOM_BY_ID.options(selectinload(models.Room.hotel))
+USER_BY_ID = select(models.User).where(models.User.id == _ID)
+USER_BY_TOKEN = select(models.User).where(models.User.email == bindparam("email"), models.User.id == _ID)
+BOOKING_BY_ID = select(models.Booking).where(models.Booking.id == _ID)
+BOOKING_WITH_ROOM_BY_ID = BOOKING_BY_ID.options(selectinload(models.Booking.room))
+BOOKING_WITH_DETAILS_BY_ID = BOOKING_BY_ID.options(
+    joinedload(models.Booking.user),
+    joinedload(models.Booking.hotel),
+    joinedload(models.Booking.room),
+)
+# Комната под блокировкой до конца транзакции; populate_existing перечитывает
+# уже загруженный в сессию объект
+ROOM_FOR_UPDATE = ROOM_BY_ID.with_for_update().execution_options(populate_existing=True)
+# Несколько комнат под блокировкой: строки блокируются по возрастанию id,
+# поэтому пересекающиеся групповые бронирования не ловят взаимоблокировку
+ROOMS_FOR_UPDATE = (
+    select(models.Room)
+    .where(models.Room.id.in_(bindparam("ids", expanding=True)))
+    .order_by(models.Room.id)
+    .with_for_update()
+    .execution_options(populate_existing=True)
+)
+
+class Repository:
+    """
+    Поиск Hotel/Room/Booking/User по первичному ключу и проверка
+    пересечений бронирований на заранее построенных запросах.
+    Как и session.get, сначала смотрит identity map сессии.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    def _identity(self, model, ident, relations: Iterable[str] = ()):
+        """Объект из identity map, если он загружен вместе с нужными связями"""
+        obj = self.db.sync_session.identity_map.get(inspect(model).identity_key_from_primary_key([ident]))
+        if obj is None:
+            return None
+        state = inspect(obj)
+        if state.expired or any(relation in state.unloaded for relation in relations):
+            return None
+        return obj
+
+    async def _one(self, statement, **params):
+        return (await self.db.execute(statement, params)).unique().scalars().first()
+
+    async def _get(self, model, statement, ident, relations: Iterable[str] = ()):
+        if ident is None:
+            return None
+        obj = self._identity(model, ident, relations)
+        if obj is not None:
+            return obj
+        return await self._one(statement, id=ident)
+
+    async def get_hotel(self, hotel_id: int) -> Optional[models.Hotel]:
+        return await self._get(models.Hotel, HOTEL_BY_ID, hotel_id)
+
+    async def get_room(self, room_id: int, with_hotel: bool = False) -> Optional[models.Room]:
+        if with_hotel:
+            return await self._get(models.Room, ROOM_WITH_HOTEL_BY_ID, room_id, ("hotel",))
+        return await self._get(models.Room, ROOM_BY_ID, room_id)
+
+    async def get_user(self, user_id: int) -> Optional[models.User]:
+        return await self._get(models.User, USER_BY_ID, user_id)
+
+    async def get_user_by_token(self, email: str, user_id: int) -> Optional[models.User]:
+        """Пользователь из JWT: id и email должны совпасть"""
+        return await self._one(USER_BY_TOKEN, id=user_id, email=email)
+
+    async def get_booking(
+        self,
+        booking_id: int,
+        with_room: bool = False,
+        with_details: bool = False,
+    ) -> Optional[models.Booking]:
+        """with_room - с комнатой, with_details - с пользователем, отелем и комнатой"""
+        if with_details:
+            return await self._get(
+                models.Booking, BOOKING_WITH_DETAILS_BY_ID, booking_id, ("user", "hotel", "room")
+            )
+        if with_room:
+            return await self._get(models.Booking, BOOKING_WITH_ROOM_BY_ID, booking_id, ("room",))
+        return await self._get(models.Booking, BOOKING_BY_ID, booking_id)
+
+    async def lock_room(self, room_id: int) -> Optional[models.Room]:
+        """SELECT ... FOR UPDATE комнаты (блокировку SQLite берет AvailabilityService.lock_room)"""
+        return await self._one(ROOM_FOR_UPDATE, id=room_id)
+
+    async def booking_overlaps(
+        self,
+        room_id: int,
+        check_in: datetime,
+        check_out: datetime,
+        exclude_booking_id: Optional[int] = None,
+    ) -> bool:
+        """
+        Есть ли у комнаты активное бронирование, пересекающее [check_in, check_out).
+        lambda_stmt: запрос собирается и получает ключ кэша по месту в коде,
+        значения из замыкания становятся параметрами.
+        """
+        statement = lambda_stmt(lambda: select(models.Booking.id).where(
+            models.Booking.room_id == room_id,
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.check_in_date < check_out,
+            models.Booking.check_out_date > check_in,
+        ))
+        if exclude_booking_id is not None:
+            statement += lambda s: s.where(models.Booking.id != exclude_booking_id)
+        statement += lambda s: s.limit(1)
+
+        result = await self.db.execute(statement)
+        return result.first() is not None
+
+    async def lock_rooms(self, room_ids: Iterable[int]) -> List[models.Room]:
+        """SELECT ... FOR UPDATE нескольких комнат одним запросом, по возрастанию id"""
+        result = await self.db.execute(ROOMS_FOR_UPDATE, {"ids": sorted(set(room_ids))})
+        return list(result.scalars().all())
+
+    async def overlapping_rooms(self, room_ids: Iterable[int], check_in: datetime, check_out: datetime) -> Set[int]:
+        """Комнаты из room_ids с активным бронированием, пересекающим [check_in, check_out)"""
+        ids = list(room_ids)
+        statement = lambda_stmt(lambda: select(models.Booking.room_id).where(
+            models.Booking.room_id.in_(ids),
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.check_in_date < check_out,
+            models.Booking.check_out_date > check_in,
+        ).distinct())
+        return set((await self.db.execute(statement)).scalars())
@@ -0,0 +1,157 @@
+import logging
+from datetime import date, datetime, timedelta
+from itertools import chain
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+from sqlalchemy import delete, event, exists, inspect, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES
+
+logger = logging.getLogger(__name__)
+
+DateLike = Union[date, datetime]
+
+# Поля бронирования, от которых зависят его ночи
+_TRACKED_FIELDS = ("status", "room_id", "check_in_date", "check_out_date")
+
+BATCH_SIZE = 10000
+
+# session.info: комнаты, ночи которых удалены массово (для подписчиков after_commit)
+REMOVED_ROOMS_KEY = "room_nights_removed_rooms"
+
+def _as_date(value: DateLike) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def night_range(check_in: DateLike, check_out: DateLike) -> Tuple[date, date]:
+    """
+    Ночи [first, end) интервала: от даты заезда до даты выезда.
+    Заезд и выезд в один день все равно занимают ночь.
+    """
+    first = _as_date(check_in)
+    end = max(_as_date(check_out), first + timedelta(days=1))
+    return first, end
+
+def booking_nights(check_in: DateLike, check_out: DateLike) -> List[date]:
+    first, end = night_range(check_in, check_out)
+    return [first + timedelta(days=offset) for offset in range((end - first).days)]
+
+def _night_rows(booking_id: int, room_id: int, check_in: DateLike, check_out: DateLike) -> List[dict]:
+    return [
+        {"room_id": room_id, "night": night, "booking_id": booking_id}
+        for night in booking_nights(check_in, check_out)
+    ]
+
+def busy_condition(check_in: DateLike, check_out: DateLike):
+    """EXISTS: у текущей комнаты занята хотя бы одна ночь из [check_in, check_out)"""
+    first, end = night_range(check_in, check_out)
+    return exists().where(
+        models.RoomNight.room_id == models.Room.id,
+        models.RoomNight.night >= first,
+        models.RoomNight.night < end,
+    )
+
+class RoomNightInventory:
+    """Операции с инвентарем ночей, которые роутеры выполняют явно"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def remove_rooms(self, room_ids: Iterable[int]):
+        """
+        Убрать ночи комнат (удаление комнаты или отеля). Брони при этом
+        удаляются массовым DELETE, который слушатель сессии не видит.
+        """
+        room_ids = list(room_ids)
+        if room_ids:
+            await self.db.execute(delete(models.RoomNight).where(models.RoomNight.room_id.in_(room_ids)))
+            self.db.sync_session.info.setdefault(REMOVED_ROOMS_KEY, set()).update(room_ids)
+
+def _sync_bookings(connection, bookings: Iterable[models.Booking], deleted_ids: Iterable[int]):
+    table = models.RoomNight.__table__
+    stale_ids = set(deleted_ids)
+    rows = []
+    for booking in bookings:
+        stale_ids.add(booking.id)
+        if booking.status in ACTIVE_BOOKING_STATUSES and booking.room_id is not None:
+            rows.extend(_night_rows(booking.id, booking.room_id, booking.check_in_date, booking.check_out_date))
+
+    if stale_ids:
+        connection.execute(delete(table).where(table.c.booking_id.in_(stale_ids)))
+    if rows:
+        connection.execute(insert(table), rows)
+
+def changed_bookings(session) -> Tuple[List[models.Booking], List[int]]:
+    """
+    Бронирования сессии, у которых в этом flush изменились ночи,
+    и id удаленных бронирований. Вызывать из after_flush.
+    """
+    changed = [
+        obj for obj in chain(session.new, session.dirty)
+        if isinstance(obj, models.Booking)
+        and any(inspect(obj).attrs[field].history.has_changes() for field in _TRACKED_FIELDS)
+    ]
+    deleted_ids = [obj.id for obj in session.deleted if isinstance(obj, models.Booking)]
+    return changed, deleted_ids
+
+@event.listens_for(Session, "after_flush")
+def _update_room_nights(session, flush_context):
+    """Ночи меняются в той же транзакции, что и бронирование: создание, даты, отмена, выезд, удаление"""
+    changed, deleted_ids = changed_bookings(session)
+    if changed or deleted_ids:
+        _sync_bookings(session.connection(), changed, deleted_ids)
+
+def _expected_nights(connection):
+    """Ночи, которые должны быть в инвентаре по активным бронированиям"""
+    result = connection.execute(
+        select(
+            models.Booking.id,
+            models.Booking.room_id,
+            models.Booking.check_in_date,
+            models.Booking.check_out_date,
+        ).where(
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.room_id.isnot(None),
+        ).execution_options(yield_per=BATCH_SIZE)
+    )
+    for booking_id, room_id, check_in, check_out in result:
+        yield from _night_rows(booking_id, room_id, check_in, check_out)
+
+def rebuild_room_nights(connection) -> int:
+    """Заполнить инвентарь заново по активным бронированиям (бэкфилл или починка)"""
+    table = models.RoomNight.__table__
+    connection.execute(delete(table))
+    total = 0
+    batch = []
+    for row in _expected_nights(connection):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        total += len(batch)
+    logger.info(f"Room nights rebuilt: {total} nights")
+    return total
+
+def check_room_nights(connection) -> Dict[str, int]:
+    """Сравнить инвентарь с бронированиями: сколько ночей не хватает и сколько лишних"""
+    expected: Set[Tuple[int, date, int]] = {
+        (row["room_id"], row["night"], row["booking_id"]) for row in _expected_nights(connection)
+    }
+    table = models.RoomNight.__table__
+    actual = {
+        (room_id, night, booking_id)
+        for room_id, night, booking_id in connection.execute(
+            select(table.c.room_id, table.c.night, table.c.booking_id)
+        )
+    }
+    return {
+        "expected": len(expected),
+        "actual": len(actual),
+        "missing": len(expected - actual),
+        "extra": len(actual - expected),
+    }
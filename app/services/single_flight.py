@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+class SingleFlight:
+    """
+    Схлопывание конкурентных вычислений одного ключа внутри процесса.
+    Первый вызов по ключу выполняет вычисление, остальные ждут его
+    результат (или исключение) вместо повторного запроса к БД.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while key in self._calls:
+            future = self._calls[key]
+            self.followers += 1
+            try:
+                # shield: отмена ожидающего запроса не отменяет общее вычисление
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # Отменен сам вычисляющий запрос (клиент отключился) - пробуем заново
+
+        future = asyncio.get_running_loop().create_future()
+        # Исключение без ожидающих не должно попадать в лог как "never retrieved"
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._calls[key] = future
+        self.leaders += 1
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+        }
+
+single_flight = SingleFlight()
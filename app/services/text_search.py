@@ -0,0 +1,150 @@
+import re
+from itertools import chain
+from typing import Iterable, List, Set, Tuple
+
+from sqlalchemy import delete, event, false, inspect, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.config import settings
+
+# Поля, по которым ищет search_available_rooms
+SEARCH_FIELDS = {
+    "city": models.Hotel.city,
+    "country": models.Hotel.country,
+    "room_type": models.Room.room_type,
+}
+
+_MODEL_FIELDS = {
+    models.Hotel: ("city", "country"),
+    models.Room: ("room_type",),
+}
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+def normalize(value: str) -> str:
+    """Нижний регистр, знаки препинания и лишние пробелы - в один пробел"""
+    return _NON_WORD.sub(" ", value.casefold()).strip()
+
+def trigrams(value: str) -> Set[str]:
+    """Триграммы как в pg_trgm: слово дополняется двумя пробелами слева и одним справа"""
+    result = set()
+    for word in normalize(value).split():
+        padded = f"  {word} "
+        result.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return result
+
+def substring_trigrams(needle: str) -> Set[str]:
+    """Триграммы, которые обязательно есть у любого значения, содержащего needle"""
+    result = set()
+    for word in normalize(needle).split():
+        result.update(word[index:index + 3] for index in range(len(word) - 2))
+    return result
+
+def similarity(left: Set[str], right: Set[str]) -> float:
+    """Сходство по триграммам, как similarity() в pg_trgm"""
+    shared = len(left & right)
+    total = len(left) + len(right) - shared
+    return shared / total if total else 0.0
+
+def value_matches(value: str, needle: str) -> bool:
+    """Значение содержит needle или похоже на него (опечатки)"""
+    return (
+        normalize(needle) in normalize(value)
+        or similarity(trigrams(needle), trigrams(value)) >= settings.SEARCH_SIMILARITY_THRESHOLD
+    )
+
+def _trigram_rows(field: str, values: Iterable[str]) -> List[dict]:
+    return [
+        {"field": field, "trigram": trigram, "value": value}
+        for value in set(values) if value
+        for trigram in trigrams(value)
+    ]
+
+class TextSearch:
+    """
+    Поиск по city, country и room_type: подстрока без учета регистра
+    плюс нечеткое совпадение по триграммам.
+    PostgreSQL: ILIKE и оператор % по GIN-индексам pg_trgm (миграция 0005).
+    Остальные базы: подходящие значения находятся по таблице search_trigrams,
+    а выборка фильтруется по ним через IN, то есть по обычным индексам.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def condition(self, field: str, needle: str):
+        """Условие WHERE для поиска needle в поле field"""
+        column = SEARCH_FIELDS[field]
+        if self.db.bind.dialect.name == "postgresql":
+            escaped = needle.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return or_(column.ilike(f"%{escaped}%", escape="\\"), column.op("%")(needle))
+
+        values = await self.matching_values(field, needle)
+        return column.in_(values) if values else false()
+
+    async def matching_values(self, field: str, needle: str) -> List[str]:
+        """Значения поля из search_trigrams, подходящие под needle"""
+        table = models.SearchTrigram
+        candidates = substring_trigrams(needle) | trigrams(needle)
+        if not candidates:
+            return []
+
+        if substring_trigrams(needle):
+            # Кандидаты - значения с общими триграммами, по первичному ключу (field, trigram)
+            query = select(table.value).where(
+                table.field == field,
+                table.trigram.in_(candidates)
+            ).group_by(table.value)
+        else:
+            # Слова короче трех букв: как и pg_trgm, перебираем все значения поля
+            query = select(table.value).where(table.field == field).distinct()
+
+        values = (await self.db.execute(query)).scalars().all()
+        return [value for value in values if value_matches(value, needle)]
+
+def index_values(connection, pairs: Iterable[Tuple[str, str]]):
+    """Добавить в search_trigrams пары (поле, значение), которых там еще нет"""
+    table = models.SearchTrigram.__table__
+    for field, value in set(pairs):
+        if not value:
+            continue
+        indexed = connection.execute(
+            select(table.c.value).where(table.c.field == field, table.c.value == value).limit(1)
+        ).first()
+        if indexed is None:
+            connection.execute(insert(table), _trigram_rows(field, [value]))
+
+def rebuild_search_index(connection) -> int:
+    """
+    Перестроить search_trigrams по текущим отелям и комнатам.
+    Нужен после массовой вставки в обход ORM; заодно убирает значения,
+    которых больше нет ни у одного отеля или комнаты.
+    """
+    table = models.SearchTrigram.__table__
+    connection.execute(delete(table))
+    total = 0
+    for field, column in SEARCH_FIELDS.items():
+        values = connection.execute(select(column).distinct()).scalars().all()
+        rows = _trigram_rows(field, values)
+        if rows:
+            connection.execute(insert(table), rows)
+        total += len(rows)
+    return total
+
+@event.listens_for(Session, "after_flush")
+def _index_flushed_values(session, flush_context):
+    """Новые значения city/country/room_type попадают в search_trigrams в той же транзакции"""
+    pairs = [
+        (field, value)
+        for obj in chain(session.new, session.dirty)
+        for field in _MODEL_FIELDS.get(type(obj), ())
+        for value in inspect(obj).attrs[field].history.added
+    ]
+    if not pairs:
+        return
+    connection = session.connection()
+    # На PostgreSQL поиск идет по pg_trgm, таблица не нужна
+    if connection.dialect.name != "postgresql":
+        index_values(connection, pairs)
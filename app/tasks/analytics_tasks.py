@@ -3,6 +3,9 @@ from celery import shared_task
 import time
 from typing import Dict, Any
 
+from app.database import engine
+from app.services.booking_stats import read_hotel_stats
+
 logger = logging.getLogger(__name__)
 
 @shared_task
@@ -56,20 +59,15 @@ def process_booking_analytics(booking_data: Dict[str, Any]):
 
 @shared_task
 def update_hotel_statistics(hotel_id: int):
-    """Обновить статистику отеля"""
+    """Статистика отеля: одна строка hotel_stats, которую ведет сервис бронирований"""
     try:
         logger.info(f"Updating statistics for hotel {hotel_id}")
 
-        time.sleep(1)
-        
-        stats = {
-            "hotel_id": hotel_id,
-            "total_bookings": 150, 
-            "average_rating": 4.5,
-            "revenue": 750000,
-            "updated_at": time.time()
-        }
-        
+        with engine.connect() as connection:
+            stats = read_hotel_stats(connection, hotel_id)
+        if stats["updated_at"] is not None:
+            stats["updated_at"] = stats["updated_at"].isoformat()
+
         logger.info(f"Statistics updated for hotel {hotel_id}")
         return {"status": "success", "stats": stats}
         
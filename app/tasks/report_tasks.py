@@ -2,6 +2,10 @@ import logging
 from celery import shared_task
 import time
 from datetime import datetime, timedelta
+from typing import Optional
+
+from app.database import engine
+from app.services.booking_archive import archive_bookings
 
 logger = logging.getLogger(__name__)
 
@@ -56,23 +60,31 @@ def generate_booking_report(start_date: str, end_date: str):
         logger.error(f"Failed to generate booking report: {e}")
         return {"status": "error", "error": str(e)}
 
-@shared_task
-def cleanup_old_data():
-    """Очистка старых данных"""
+@shared_task(bind=True)
+def cleanup_old_data(self, retention_days: Optional[int] = None, batch_size: Optional[int] = None):
+    """
+    Очистка старых данных: завершенные и отмененные бронирования старше
+    окна хранения переносятся в bookings_archive пачками. Прогресс виден
+    в /tasks/status/{task_id} как состояние PROGRESS.
+    """
     try:
         logger.info("Starting cleanup of old data")
 
-        time.sleep(1)
-        
-        cleaned_items = {
-            "old_sessions": 1500,
-            "temp_files": 45,
-            "cache_entries": 12000
-        }
+        def report_progress(archived: int, total: int):
+            logger.info(f"Archived {archived}/{total} bookings")
+            if self.request.id:
+                self.update_state(state="PROGRESS", meta={"archived": archived, "total": total})
+
+        cleaned_items = archive_bookings(
+            engine,
+            retention_days=retention_days,
+            batch_size=batch_size,
+            progress=report_progress
+        )
         
         logger.info("Old data cleanup completed")
         return {"status": "success", "cleaned_items": cleaned_items}
         
     except Exception as e:
         logger.error(f"Failed to cleanup old data: {e}")
-        return {"status": "error", "error": str(e)}
\ No newline at end of file
+        return {"status": "error", "error": str(e)}
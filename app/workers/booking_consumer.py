@@ -39,6 +39,7 @@ class BookingConsumer:
         await queue.bind(exchange, routing_key="booking.cancelled")
         await queue.bind(exchange, routing_key="booking.checked_in")
         await queue.bind(exchange, routing_key="booking.checked_out")
+        await queue.bind(exchange, routing_key="booking.batch_created")
         
         logger.info("Starting to consume booking events...")
         
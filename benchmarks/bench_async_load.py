@@ -0,0 +1,176 @@
+"""
+Нагрузочный бенчмарк: синхронная Session внутри async-эндпоинта (как было)
+против AsyncSession (как стало) при конкурентных запросах.
+
+Синхронный драйвер блокирует цикл событий на время каждого запроса к БД,
+поэтому конкурентные запросы выстраиваются в очередь и p99 растет вместе
+с конкурентностью. Задержка сети до БД имитируется паузой в execute
+курсора sqlite3.
+
+Запуск:
+    python -m benchmarks.bench_async_load --concurrency 1 10 50 --latency 2
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+import app.models.hotels as models
+from app.database import Base
+from app.core.enums import RoomStatus
+from app.services.availability_service import AvailabilityService
+from app.services.booking_index import booking_index
+from benchmarks.bench_availability import seed
+
+def slow_connection_factory(latency: float):
+    """Фабрика соединений sqlite3, каждый execute которых ждет latency секунд"""
+
+    class SlowCursor(sqlite3.Cursor):
+        def execute(self, *args, **kwargs):
+            time.sleep(latency)
+            return super().execute(*args, **kwargs)
+
+    class SlowConnection(sqlite3.Connection):
+        def cursor(self, factory=SlowCursor):
+            return super().cursor(factory)
+
+    return SlowConnection
+
+def build_app(path: str, latency: float):
+    """Приложение с двумя вариантами одного эндпоинта поиска свободных комнат"""
+    factory = slow_connection_factory(latency)
+
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "factory": factory},
+        pool_size=64,
+    )
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}",
+        connect_args={"factory": factory},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=64,
+    )
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    def get_sync_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    bench_app = FastAPI()
+
+    @bench_app.get("/sync/{hotel_id}")
+    async def sync_rooms(hotel_id: int, check_in: datetime, check_out: datetime, db: Session = Depends(get_sync_db)):
+        # Прежний вариант: async def с синхронной сессией блокирует цикл событий
+        hotel = db.get(models.Hotel, hotel_id)
+        service = AvailabilityService(db)
+        rooms = db.execute(
+            select(models.Room).where(
+                models.Room.hotel_id == hotel.id,
+                models.Room.status == RoomStatus.AVAILABLE,
+                service.room_is_free_condition(check_in, check_out),
+            ).order_by(models.Room.id)
+        ).scalars().all()
+        return {"rooms": len(rooms)}
+
+    @bench_app.get("/async/{hotel_id}")
+    async def async_rooms(hotel_id: int, check_in: datetime, check_out: datetime, db: AsyncSession = Depends(get_async_db)):
+        hotel = await db.get(models.Hotel, hotel_id)
+        rooms = await AvailabilityService(db).get_available_rooms(hotel.id, check_in, check_out)
+        return {"rooms": len(rooms)}
+
+    return bench_app, engine, async_engine
+
+async def load(client: httpx.AsyncClient, url: str, params: dict, concurrency: int, requests: int):
+    """Прогнать requests запросов в concurrency параллельных клиентов"""
+    timings = []
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            response = await client.get(url, params=params)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.text
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return statistics.median(timings), p99, requests / elapsed
+
+async def run(concurrency_levels, requests: int, latency_ms: float, rooms: int):
+    start = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time())
+    params = {"check_in": start.isoformat(), "check_out": (start + timedelta(days=2)).isoformat()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        seed_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=seed_engine)
+        with sessionmaker(bind=seed_engine)() as db:
+            hotel_id = seed(db, rooms, start)
+        seed_engine.dispose()
+
+        # Сравниваем именно доступ к БД, а не внутрипроцессный индекс
+        booking_index.clear()
+        bench_app, engine, async_engine = build_app(path, latency_ms / 1000)
+        transport = httpx.ASGITransport(app=bench_app)
+
+        print(
+            f"{'clients':>7} | {'sync p50 ms':>11} | {'sync p99 ms':>11} | {'sync rps':>8} | "
+            f"{'async p50 ms':>12} | {'async p99 ms':>12} | {'async rps':>9}"
+        )
+        print("-" * 89)
+
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            # Прогрев: открытие соединений не должно попадать в замеры
+            await load(client, f"/sync/{hotel_id}", params, 10, 20)
+            await load(client, f"/async/{hotel_id}", params, 10, 20)
+
+            for concurrency in concurrency_levels:
+                sync_result = await load(client, f"/sync/{hotel_id}", params, concurrency, requests)
+                async_result = await load(client, f"/async/{hotel_id}", params, concurrency, requests)
+                print(
+                    f"{concurrency:>7} | {sync_result[0]:>11.2f} | {sync_result[1]:>11.2f} | {sync_result[2]:>8.0f} | "
+                    f"{async_result[0]:>12.2f} | {async_result[1]:>12.2f} | {async_result[2]:>9.0f}"
+                )
+
+        await async_engine.dispose()
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк синхронной и асинхронной сессий")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=2.0, help="Имитируемая задержка запроса к БД, мс")
+    parser.add_argument("--rooms", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.requests, args.latency, args.rooms))
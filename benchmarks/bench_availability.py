@@ -0,0 +1,178 @@
+"""
+Бенчмарк поиска доступных комнат: старый цикл "запрос на каждую комнату"
+против AvailabilityService: один set-based запрос с анти-join по
+пересекающимся бронированиям или по ночам из room_nights и
+внутрипроцессный индекс занятости.
+
+Запуск:
+    python -m benchmarks.bench_availability --rooms 10 50 100 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.models.hotels as models
+from app.config import settings
+from app.database import Base
+from app.core.enums import RoomStatus, BookingStatus
+from app.services.availability_service import AvailabilityService
+from app.services.booking_index import booking_index
+
+def seed(db, rooms_count: int, start: datetime) -> int:
+    """Отель с rooms_count комнатами, половина из них занята на пересекающиеся даты"""
+    hotel = models.Hotel(name="Bench Hotel", address="Bench st. 1", city="Moscow", country="Russia")
+    db.add(hotel)
+    db.flush()
+
+    user = models.User(email="bench@example.com", first_name="Bench", last_name="User", hashed_password="x")
+    db.add(user)
+    db.flush()
+
+    for index in range(rooms_count):
+        room = models.Room(
+            hotel_id=hotel.id,
+            room_number=str(index + 1),
+            floor=index // 20 + 1,
+            room_type="Standard",
+            price_per_night=100.0 + index % 50,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        db.add(room)
+        db.flush()
+        for week in range(4):
+            # У каждой комнаты история из нескольких броней, у чётных одна пересекается с окном поиска
+            offset = week * 7 + (0 if index % 2 == 0 else 3)
+            db.add(models.Booking(
+                user_id=user.id,
+                hotel_id=hotel.id,
+                room_id=room.id,
+                check_in_date=start + timedelta(days=offset - 1),
+                check_out_date=start + timedelta(days=offset + 1),
+                number_of_guests=1,
+                total_price=200.0,
+                status=BookingStatus.CONFIRMED
+            ))
+
+    db.commit()
+    return hotel.id
+
+async def legacy_available_rooms(db, hotel_id: int, check_in: datetime, check_out: datetime):
+    """Прежняя реализация get_available_rooms: отдельный запрос на каждую комнату"""
+    all_rooms = (await db.execute(select(models.Room).where(
+        models.Room.hotel_id == hotel_id,
+        models.Room.status == RoomStatus.AVAILABLE
+    ))).scalars().all()
+
+    available_rooms = []
+    for room in all_rooms:
+        conflicting_booking = (await db.execute(select(models.Booking).where(
+            models.Booking.room_id == room.id,
+            models.Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.CHECKED_IN]),
+            models.Booking.check_in_date < check_out,
+            models.Booking.check_out_date > check_in
+        ))).scalars().first()
+        if not conflicting_booking:
+            available_rooms.append(room)
+    return available_rooms
+
+async def measure(session_factory, engine, func, repeat: int):
+    """Вернуть (число запросов за вызов, медианная задержка в мс, число комнат)"""
+    statements = []
+
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    timings = []
+    result_size = 0
+    for _ in range(repeat):
+        statements.clear()
+        event.listen(engine.sync_engine, "before_cursor_execute", count_statements)
+        started = time.perf_counter()
+        try:
+            async with session_factory() as db:
+                result_size = len(await func(db))
+        finally:
+            timings.append((time.perf_counter() - started) * 1000)
+            event.remove(engine.sync_engine, "before_cursor_execute", count_statements)
+
+    return len(statements), statistics.median(timings), result_size
+
+async def run(rooms_counts, repeat: int):
+    start = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time())
+    check_in, check_out = start, start + timedelta(days=2)
+
+    print(
+        f"{'rooms':>6} | {'legacy queries':>14} | {'legacy ms':>9} | {'engine queries':>14} | {'engine ms':>9} | "
+        f"{'nights ms':>9} | {'index queries':>13} | {'index ms':>8} | {'free':>5}"
+    )
+    print("-" * 113)
+
+    for rooms_count in rooms_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            seed_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+            with seed_factory() as db:
+                hotel_id = seed(db, rooms_count, start)
+
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+            legacy = await measure(
+                session_factory, async_engine,
+                lambda db: legacy_available_rooms(db, hotel_id, check_in, check_out),
+                repeat
+            )
+            booking_index.clear()
+            settings.ROOM_NIGHTS_ENABLED = False
+            engine_result = await measure(
+                session_factory, async_engine,
+                lambda db: AvailabilityService(db).get_available_rooms(hotel_id, check_in, check_out),
+                repeat
+            )
+            settings.ROOM_NIGHTS_ENABLED = True
+            nights_result = await measure(
+                session_factory, async_engine,
+                lambda db: AvailabilityService(db).get_available_rooms(hotel_id, check_in, check_out),
+                repeat
+            )
+
+            with seed_factory() as db:
+                booking_index.rebuild(db)
+            index_result = await measure(
+                session_factory, async_engine,
+                lambda db: AvailabilityService(db).get_available_rooms(hotel_id, check_in, check_out),
+                repeat
+            )
+            booking_index.clear()
+
+            assert legacy[2] == engine_result[2] == nights_result[2] == index_result[2], "Результаты реализаций расходятся"
+
+            print(
+                f"{rooms_count:>6} | {legacy[0]:>14} | {legacy[1]:>9.2f} | "
+                f"{engine_result[0]:>14} | {engine_result[1]:>9.2f} | {nights_result[1]:>9.2f} | "
+                f"{index_result[0]:>13} | {index_result[1]:>8.2f} | {engine_result[2]:>5}"
+            )
+            await async_engine.dispose()
+            engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк движка доступности комнат")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10, 50, 100, 300])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.rooms, args.repeat))
@@ -0,0 +1,148 @@
+"""
+Бенчмарк группового бронирования: N последовательных POST /bookings/
+(на каждую комнату - проверка пользователя и отеля, блокировка,
+проверка пересечений, коммит, событие и уведомление) против одного
+POST /bookings/batch на те же N комнат.
+
+Брокер и Redis не нужны: публикация события, уведомление и запись
+статистики в Redis заменены паузой --publish-latency мс, как сетевой
+round-trip до брокера.
+
+Запуск:
+    python -m benchmarks.bench_batch_booking --rooms 10 20 50 --repeat 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import app.models.hotels as models
+from app.core.dependencies import require_user_or_admin
+from app.core.enums import RoomStatus, UserRole
+from app.database import Base, get_db
+from app.main import app
+from app.services.booking_events import BookingEventService
+from app.services.cache_service import CacheService
+from app.services.notification_service import NotificationService
+
+def stub_side_effects(latency: float):
+    """События, уведомления и Redis - одной паузой на вызов"""
+
+    async def round_trip(*args, **kwargs):
+        await asyncio.sleep(latency)
+
+    for service, names in (
+        (BookingEventService, ("publish_booking_created", "publish_booking_batch_created")),
+        (NotificationService, ("send_booking_confirmation", "send_group_booking_confirmation")),
+        (CacheService, ("invalidate_booking_related", "track_booking_stats", "track_group_booking_stats")),
+    ):
+        for name in names:
+            setattr(service, name, round_trip)
+
+def seed(engine, rooms: int, groups: int) -> dict:
+    """Отель с rooms * groups комнатами: каждый замер бронирует свои комнаты"""
+    with engine.begin() as connection:
+        hotel_id = connection.execute(insert(models.Hotel).values(
+            name="Bench Hotel", address="Main St", city="Moscow", country="Russia"
+        )).inserted_primary_key[0]
+        user_id = connection.execute(insert(models.User).values(
+            email="operator@example.com", first_name="Tour", last_name="Operator",
+            hashed_password="x", role=UserRole.ADMIN
+        )).inserted_primary_key[0]
+        connection.execute(insert(models.Room), [
+            {
+                "hotel_id": hotel_id, "room_number": str(number), "floor": 1, "room_type": "Standard",
+                "price_per_night": 100.0, "capacity": 2, "status": RoomStatus.AVAILABLE,
+            }
+            for number in range(rooms * groups)
+        ])
+    return {"hotel_id": hotel_id, "user_id": user_id}
+
+async def run(rooms: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        # Каждый замер - два варианта, у каждого свои комнаты
+        data = seed(engine, rooms, 2 * repeat)
+        with engine.connect() as connection:
+            operator = connection.execute(
+                models.User.__table__.select().where(models.User.id == data["user_id"])
+            ).first()
+        engine.dispose()
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+        session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def override_get_db():
+            async with session_factory() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[require_user_or_admin] = lambda: operator
+
+        check_in = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time())
+        common = {
+            "user_id": data["user_id"],
+            "hotel_id": data["hotel_id"],
+            "check_in_date": (check_in + timedelta(hours=14)).isoformat(),
+            "check_out_date": (check_in + timedelta(days=3, hours=12)).isoformat(),
+        }
+
+        sequential, batched = [], []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            room_id = 1
+            for _ in range(repeat):
+                started = time.perf_counter()
+                for offset in range(rooms):
+                    response = await client.post(
+                        "/api/v1/bookings/",
+                        json={**common, "room_id": room_id + offset, "number_of_guests": 2}
+                    )
+                    assert response.status_code == 200, response.text
+                sequential.append((time.perf_counter() - started) * 1000)
+                room_id += rooms
+
+                started = time.perf_counter()
+                response = await client.post("/api/v1/bookings/batch", json={
+                    **common,
+                    "rooms": [{"room_id": room_id + offset, "number_of_guests": 2} for offset in range(rooms)],
+                })
+                assert response.status_code == 200, response.text
+                batched.append((time.perf_counter() - started) * 1000)
+                room_id += rooms
+
+        app.dependency_overrides.clear()
+        await async_engine.dispose()
+        return statistics.median(sequential), statistics.median(batched)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, nargs="+", default=[10, 20, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--publish-latency", type=float, default=1.0, help="мс на событие, уведомление и вызов Redis")
+    args = parser.parse_args()
+
+    stub_side_effects(args.publish_latency / 1000)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"{'rooms':>6} {'sequential ms':>14} {'batch ms':>10} {'speedup':>8}")
+    for rooms in args.rooms:
+        sequential, batched = asyncio.run(run(rooms, args.repeat))
+        print(f"{rooms:>6} {sequential:>14.1f} {batched:>10.1f} {sequential / batched:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
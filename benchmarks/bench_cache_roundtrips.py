@@ -0,0 +1,162 @@
+"""
+Микро-бенчмарк обращений к Redis на одно бронирование: прежняя
+последовательность команд CacheService (по await на команду, KEYS для
+инвалидации) против pipeline/тегов.
+
+Считаются round-trip'ы до Redis: одиночная команда - один, pipeline - один.
+Опция --latency добавляет задержку сети на каждый round-trip.
+
+Бенчмарк очищает базу Redis (FLUSHDB) перед каждым замером, поэтому
+использует отдельный BENCH_REDIS_URL, а не REDIS_URL приложения, и
+отказывается работать с базой 0.
+
+Запуск (нужен запущенный Redis):
+    BENCH_REDIS_URL=redis://localhost:6379/15 python -m benchmarks.bench_cache_roundtrips --searches 5 20 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis.asyncio as redis
+
+from app.core.redis import RedisManager
+from app.services.cache_service import CacheService
+
+HOTEL_ID = 1
+ROOM_ID = 101
+USER_ID = 7
+
+class RoundTripCounter:
+    """Считает round-trip'ы клиента Redis и при необходимости добавляет задержку"""
+
+    def __init__(self, client: redis.Redis, latency: float):
+        self.count = 0
+        self.latency = latency
+        self._wrap_client(client)
+
+    async def _round_trip(self):
+        self.count += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _wrap_client(self, client):
+        execute_command = client.execute_command
+        pipeline = client.pipeline
+
+        async def counted_execute_command(*args, **kwargs):
+            await self._round_trip()
+            return await execute_command(*args, **kwargs)
+
+        def counted_pipeline(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            execute = pipe.execute
+            immediate_execute_command = pipe.immediate_execute_command
+
+            async def counted_execute(*execute_args, **execute_kwargs):
+                await self._round_trip()
+                return await execute(*execute_args, **execute_kwargs)
+
+            # Команды, которые pipeline отправляет сразу (WATCH, SCRIPT LOAD и т.п.)
+            async def counted_immediate_execute_command(*command_args, **command_kwargs):
+                await self._round_trip()
+                return await immediate_execute_command(*command_args, **command_kwargs)
+
+            pipe.execute = counted_execute
+            pipe.immediate_execute_command = counted_immediate_execute_command
+            return pipe
+
+        client.execute_command = counted_execute_command
+        client.pipeline = counted_pipeline
+
+async def legacy_booking_cache_ops(manager: RedisManager):
+    """Кэш-операции create_booking до pipeline и тегов"""
+    await manager.increment(f"stats:hotel:{HOTEL_ID}:bookings")
+    await manager.increment(f"stats:room:{ROOM_ID}:bookings")
+    await manager.increment("stats:total_bookings")
+    await manager.add_to_set("popular:rooms", str(ROOM_ID))
+    await manager.add_to_set("popular:hotels", str(HOTEL_ID))
+
+    await manager.delete_key(f"user_bookings:{USER_ID}")
+
+    await manager.delete_key(f"hotel:{HOTEL_ID}")
+    keys = await manager.keys(f"rooms_search:*hotel_id:{HOTEL_ID}*")
+    for key in keys:
+        await manager.delete_key(key)
+
+async def booking_cache_ops(cache_service: CacheService):
+    """Текущие кэш-операции create_booking"""
+    await cache_service.track_booking_stats(HOTEL_ID, ROOM_ID)
+    await cache_service.invalidate_booking_related(user_id=USER_ID, hotel_id=HOTEL_ID)
+
+async def seed(cache_service: CacheService, searches: int):
+    """Закэшированные поиски отеля, которые должна сбросить инвалидация"""
+    for index in range(searches):
+        await cache_service.cache_available_rooms(
+            {"hotel_id": HOTEL_ID, "check_in_date": f"2030-01-{index % 28 + 1:02d}", "page": index},
+            [{"id": ROOM_ID}]
+        )
+
+async def measure(client, counter: RoundTripCounter, cache_service: CacheService, searches: int, operation, repeat: int):
+    """Вернуть (round-trip'ов на бронирование, медианная задержка в мс)"""
+    timings = []
+    round_trips = 0
+    for _ in range(repeat):
+        await client.flushdb()
+        await seed(cache_service, searches)
+
+        counter.count = 0
+        started = time.perf_counter()
+        await operation()
+        timings.append((time.perf_counter() - started) * 1000)
+        round_trips = counter.count
+
+    return round_trips, statistics.median(timings)
+
+async def run(searches_counts, repeat: int, latency_ms: float):
+    url = os.getenv("BENCH_REDIS_URL", "redis://localhost:6379/15")
+    client = redis.from_url(url, encoding="utf-8", decode_responses=True)
+    if int(client.connection_pool.connection_kwargs.get("db", 0)) == 0:
+        print(f"Бенчмарк очищает базу Redis - укажите в BENCH_REDIS_URL отдельную базу, не 0 (сейчас {url})")
+        await client.close()
+        return
+    try:
+        await client.ping()
+    except Exception as e:
+        print(f"Redis недоступен по {url}: {e}")
+        return
+
+    counter = RoundTripCounter(client, latency_ms / 1000)
+    manager = RedisManager(url)
+    manager.redis = client
+    cache_service = CacheService()
+    cache_service.redis_manager = manager
+
+    print(f"{'searches':>8} | {'legacy trips':>12} | {'legacy ms':>9} | {'pipelined trips':>15} | {'pipelined ms':>12}")
+    print("-" * 69)
+
+    for searches in searches_counts:
+        legacy = await measure(
+            client, counter, cache_service, searches,
+            lambda: legacy_booking_cache_ops(manager), repeat
+        )
+        pipelined = await measure(
+            client, counter, cache_service, searches,
+            lambda: booking_cache_ops(cache_service), repeat
+        )
+        print(f"{searches:>8} | {legacy[0]:>12} | {legacy[1]:>9.2f} | {pipelined[0]:>15} | {pipelined[1]:>12.2f}")
+
+    await client.flushdb()
+    await client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-trip'ы к Redis на одно бронирование")
+    parser.add_argument("--searches", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Имитируемая задержка round-trip, мс")
+    args = parser.parse_args()
+    asyncio.run(run(args.searches, args.repeat, args.latency))
@@ -0,0 +1,119 @@
+"""
+Бенчмарк массового импорта комнат: строка за строкой, как POST /rooms/
+(проверка дубликата, INSERT, commit, refresh), против BulkImportService
+(поток NDJSON, проверка пачками, один запрос конфликтов на пачку,
+executemany). Печатает строки в секунду. Построчный путь медленный,
+поэтому меряется на --sample строк. Инвалидация кэша в замер не входит:
+Redis для бенчмарка не нужен.
+
+Запуск:
+    python -m benchmarks.bench_import --rooms 100000 --sample 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models.hotels as models
+from app.config import settings
+from app.database import Base
+from app.services.bulk_import import BulkImportService, parse_rows
+from app.services.cache_service import CacheService
+
+ROOMS_PER_HOTEL = 100
+STREAM_CHUNK = 64 * 1024
+
+def room_row(index: int, offset: int = 0) -> dict:
+    return {
+        "hotel_id": index // ROOMS_PER_HOTEL + 1,
+        "room_number": str(offset + index % ROOMS_PER_HOTEL),
+        "floor": 1 + index % 10,
+        "room_type": ("Standard", "Deluxe", "Suite")[index % 3],
+        "price_per_night": 100.0 + index % 50,
+        "capacity": 2,
+        "status": "available",
+    }
+
+async def stream(body: bytes):
+    for offset in range(0, len(body), STREAM_CHUNK):
+        yield body[offset:offset + STREAM_CHUNK]
+
+async def import_row_by_row(session_factory, rows) -> float:
+    """Путь create_room: проверка номера, вставка и коммит на каждую строку"""
+    started = time.perf_counter()
+    async with session_factory() as db:
+        for row in rows:
+            existing = (await db.execute(select(models.Room).where(
+                models.Room.hotel_id == row["hotel_id"],
+                models.Room.room_number == row["room_number"]
+            ))).scalars().first()
+            if existing:
+                continue
+            room = models.Room(**row)
+            db.add(room)
+            await db.commit()
+            await db.refresh(room)
+    return len(rows) / (time.perf_counter() - started)
+
+async def import_bulk(session_factory, rows) -> dict:
+    body = "".join(json.dumps(row) + "\n" for row in rows).encode()
+    async with session_factory() as db:
+        return await BulkImportService(db).import_rooms(parse_rows(stream(body), "ndjson"))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=100000)
+    parser.add_argument("--sample", type=int, default=2000, help="строк для построчного импорта")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    settings.IMPORT_CHUNK_SIZE = args.chunk_size
+
+    async def no_invalidation(self, hotel_ids=()):
+        pass
+
+    CacheService.invalidate_imported = no_invalidation
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        hotels = args.rooms // ROOMS_PER_HOTEL + 1
+        with engine.begin() as connection:
+            connection.execute(insert(models.Hotel), [
+                {"name": f"Hotel {index}", "address": "Main St", "city": "Moscow", "country": "Russia"}
+                for index in range(hotels)
+            ])
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def bench():
+            # Построчный импорт - в отдельный диапазон номеров, чтобы не конфликтовать с пакетным
+            sample = [room_row(index, offset=1000) for index in range(args.sample)]
+            row_rate = await import_row_by_row(session_factory, sample)
+            result = await import_bulk(session_factory, [room_row(index) for index in range(args.rooms)])
+            await async_engine.dispose()
+            return row_rate, result
+
+        row_rate, result = asyncio.run(bench())
+
+        with engine.connect() as connection:
+            total = connection.execute(select(func.count()).select_from(models.Room)).scalar_one()
+        engine.dispose()
+
+    print(f"{'path':<14} {'rows':>8} {'rows/s':>10}")
+    print(f"{'row by row':<14} {args.sample:>8} {row_rate:>10.0f}")
+    print(f"{'bulk NDJSON':<14} {result['inserted']:>8} {result['rows_per_second']:>10.0f}")
+    print(f"\nspeedup {result['rows_per_second'] / row_rate:.1f}x, rooms in table: {total}, rejected: {result['rejected']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Бенчмарк поиска свободных комнат по всему городу: анти-join в SQL
+(по пересекающимся бронированиям и по ночам room_nights) против
+матрицы занятости "комнаты × ночи" в NumPy. Замеряются полный вызов
+search_available_rooms и отдельно сама проверка занятости: один
+запрос id свободных комнат против среза матрицы по всем комнатам.
+
+Запуск (нужен numpy):
+    python -m benchmarks.bench_occupancy --hotels 100 500 --rooms-per-hotel 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+import app.models.hotels as models
+from app.config import settings
+from app.database import Base
+from app.core.enums import RoomStatus, BookingStatus
+from app.services.availability_service import AvailabilityService
+from app.services.occupancy_matrix import occupancy_matrix
+from app.services.room_nights import rebuild_room_nights
+from app.services.text_search import rebuild_search_index
+
+BATCH_SIZE = 20000
+BOOKINGS_PER_ROOM = 6
+
+def seed(engine, hotels_count: int, rooms_per_hotel: int, start: datetime):
+    """Отели одного города; у каждой комнаты несколько броней на ближайшие 90 дней"""
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [{
+            "email": "bench@example.com", "first_name": "Bench", "last_name": "User", "hashed_password": "x"
+        }])
+        connection.execute(insert(models.Hotel), [
+            {"name": f"Hotel {index}", "address": "Main St", "city": "Moscow", "country": "Russia", "rating": 4.0}
+            for index in range(hotels_count)
+        ])
+
+        rooms = []
+        for hotel_id in range(1, hotels_count + 1):
+            rooms.extend(
+                {
+                    "hotel_id": hotel_id,
+                    "room_number": str(100 + number),
+                    "floor": 1,
+                    "room_type": "Standard",
+                    "price_per_night": 100.0,
+                    "capacity": 2,
+                    "status": RoomStatus.AVAILABLE,
+                }
+                for number in range(rooms_per_hotel)
+            )
+        for offset in range(0, len(rooms), BATCH_SIZE):
+            connection.execute(insert(models.Room), rooms[offset:offset + BATCH_SIZE])
+
+        bookings = []
+        for room_id in range(1, len(rooms) + 1):
+            hotel_id = (room_id - 1) // rooms_per_hotel + 1
+            day = rng.randint(0, 5)
+            for _ in range(BOOKINGS_PER_ROOM):
+                length = rng.randint(1, 5)
+                bookings.append({
+                    "user_id": 1,
+                    "hotel_id": hotel_id,
+                    "room_id": room_id,
+                    "check_in_date": start + timedelta(days=day, hours=14),
+                    "check_out_date": start + timedelta(days=day + length, hours=12),
+                    "number_of_guests": 1,
+                    "total_price": 100.0 * length,
+                    "status": BookingStatus.CONFIRMED,
+                })
+                day += length + rng.randint(1, 10)
+        for offset in range(0, len(bookings), BATCH_SIZE):
+            connection.execute(insert(models.Booking), bookings[offset:offset + BATCH_SIZE])
+
+        # Вставка в обход ORM - производные таблицы строятся отдельно
+        rebuild_room_nights(connection)
+        rebuild_search_index(connection)
+    return len(rooms), len(bookings)
+
+async def measure(func, repeat: int):
+    """Вернуть (медианная задержка в мс, результат последнего вызова)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+async def run(hotels_counts, rooms_per_hotel: int, nights: int, repeat: int):
+    start = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+    # Время заезда и выезда как у броней: интервалы и ночи дают одинаковый ответ
+    check_in = start + timedelta(days=7, hours=14)
+    check_out = start + timedelta(days=7 + nights, hours=12)
+
+    print(f"window: {nights} nights, {BOOKINGS_PER_ROOM} bookings per room")
+    print(
+        f"{'hotels':>6} | {'rooms':>7} | {'search intervals':>16} | {'search nights':>13} | {'search matrix':>13} | "
+        f"{'check sql':>9} | {'check matrix':>12} | {'free':>6}"
+    )
+    print("-" * 108)
+
+    for hotels_count in hotels_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            rooms_count, _ = seed(engine, hotels_count, rooms_per_hotel, start)
+            with Session(engine) as db:
+                occupancy_matrix.rebuild(db)
+
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+            async def search():
+                async with session_factory() as db:
+                    rooms = await AvailabilityService(db).search_available_rooms(
+                        city="Moscow", check_in=check_in, check_out=check_out
+                    )
+                    return {room.id for room in rooms}
+
+            async def check_sql():
+                async with session_factory() as db:
+                    service = AvailabilityService(db)
+                    result = await db.execute(
+                        select(models.Room.id).where(service.room_is_free_condition(check_in, check_out))
+                    )
+                    return set(result.scalars().all())
+
+            room_ids = list(range(1, rooms_count + 1))
+
+            async def check_matrix():
+                return set(occupancy_matrix.free_rooms(room_ids, check_in, check_out))
+
+            settings.OCCUPANCY_MATRIX_ENABLED = False
+            settings.ROOM_NIGHTS_ENABLED = False
+            intervals_ms, intervals_free = await measure(search, repeat)
+            settings.ROOM_NIGHTS_ENABLED = True
+            nights_ms, nights_free = await measure(search, repeat)
+            check_sql_ms, sql_free = await measure(check_sql, repeat)
+            settings.OCCUPANCY_MATRIX_ENABLED = True
+            matrix_ms, matrix_free = await measure(search, repeat)
+            check_matrix_ms, only_matrix_free = await measure(check_matrix, repeat)
+            settings.OCCUPANCY_MATRIX_ENABLED = False
+
+            assert intervals_free == nights_free == matrix_free == sql_free == only_matrix_free, \
+                "Результаты реализаций расходятся"
+
+            print(
+                f"{hotels_count:>6} | {rooms_count:>7} | {intervals_ms:>16.2f} | {nights_ms:>13.2f} | "
+                f"{matrix_ms:>13.2f} | {check_sql_ms:>9.2f} | {check_matrix_ms:>12.2f} | {len(matrix_free):>6}"
+            )
+            occupancy_matrix.clear()
+            await async_engine.dispose()
+            engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк матрицы занятости против SQL")
+    parser.add_argument("--hotels", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--rooms-per-hotel", type=int, default=50)
+    parser.add_argument("--nights", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.hotels, args.rooms_per_hotel, args.nights, args.repeat))
@@ -0,0 +1,118 @@
+"""
+Бенчмарк глубокой пагинации списка отелей: OFFSET (прежний skip)
+против keyset-курсора (PageParams). Замеряются страницы разной глубины
+(до 1000-й) на таблицах разного размера: OFFSET читает и отбрасывает
+все предыдущие строки, курсор начинает чтение индекса сразу с нужного
+места, поэтому его задержка не зависит ни от номера страницы, ни от
+размера таблицы.
+
+Запуск:
+    python -m benchmarks.bench_pagination --hotels 50000 200000 800000 --pages 10 100 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models.hotels as models
+from app.database import Base
+from app.core.pagination import PageParams, encode_cursor
+
+CITIES = ["Moscow", "Kazan", "Sochi", "Tver", "Omsk"]
+BATCH_SIZE = 10000
+
+def seed(engine, hotels_count: int):
+    """hotels_count отелей с повторяющимися именами: сортировке по имени нужен id"""
+    with engine.begin() as connection:
+        for start in range(0, hotels_count, BATCH_SIZE):
+            connection.execute(insert(models.Hotel), [
+                {
+                    "name": f"Hotel {index % 5000:04d}",
+                    "address": f"Street {index}",
+                    "city": CITIES[index % len(CITIES)],
+                    "country": "Russia",
+                    "rating": index % 50 / 10,
+                }
+                for index in range(start, min(start + BATCH_SIZE, hotels_count))
+            ])
+
+def page_cursor(engine, sort: str, skip: int) -> str:
+    """Курсор, указывающий на ту же страницу, что и OFFSET skip (последняя строка предыдущей)"""
+    column = getattr(models.Hotel, sort)
+    order_by = [models.Hotel.id] if sort == "id" else [column, models.Hotel.id]
+    with engine.connect() as connection:
+        row = connection.execute(
+            select(column, models.Hotel.id).order_by(*order_by).offset(skip - 1).limit(1)
+        ).one()
+    return encode_cursor(sort, "asc", row[0], row[1])
+
+async def measure(session_factory, page: PageParams, repeat: int):
+    """Вернуть (медианная задержка в мс, id первой строки страницы)"""
+    timings = []
+    first_id = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        async with session_factory() as db:
+            result = await db.execute(page.apply(select(models.Hotel)))
+            hotels, _ = page.split(result.scalars().all())
+        timings.append((time.perf_counter() - started) * 1000)
+        first_id = hotels[0].id
+    return statistics.median(timings), first_id
+
+async def compare(session_factory, engine, hotels_count: int, page_number: int, sort: str, limit: int, repeat: int):
+    """Сравнить OFFSET и курсор на одной и той же странице"""
+    skip = (page_number - 1) * limit
+    offset_page = PageParams(models.Hotel, sort, "asc", limit, skip=skip)
+    cursor_page = PageParams(models.Hotel, sort, "asc", limit, page_cursor(engine, sort, skip))
+    cursor_page.validate(("id", "name"))
+
+    offset_ms, offset_first = await measure(session_factory, offset_page, repeat)
+    cursor_ms, cursor_first = await measure(session_factory, cursor_page, repeat)
+    assert offset_first == cursor_first, "OFFSET и курсор вернули разные страницы"
+
+    print(
+        f"{hotels_count:>8} | {page_number:>5} | {sort:>5} | {offset_ms:>9.2f} | {cursor_ms:>9.2f} | "
+        f"{offset_ms / cursor_ms:>6.1f}x"
+    )
+
+async def run(hotels_counts, page_numbers, limit: int, repeat: int):
+    print(f"limit {limit}")
+    print(f"{'hotels':>8} | {'page':>5} | {'sort':>5} | {'offset ms':>9} | {'cursor ms':>9} | {'speedup':>7}")
+    print("-" * 60)
+
+    for hotels_count in hotels_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'bench.db')
+            engine = create_engine(f"sqlite:///{path}")
+            Base.metadata.create_all(bind=engine)
+            seed(engine, hotels_count)
+
+            async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+            session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+            for page_number in page_numbers:
+                if page_number < 2 or hotels_count <= (page_number - 1) * limit:
+                    # На первой странице курсора нет, за пределами таблицы сравнивать нечего
+                    continue
+                for sort in ("id", "name"):
+                    await compare(session_factory, engine, hotels_count, page_number, sort, limit, repeat)
+
+            await async_engine.dispose()
+            engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк глубокой пагинации: OFFSET против курсора")
+    parser.add_argument("--hotels", type=int, nargs="+", default=[50000, 200000, 800000])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.hotels, args.pages, args.limit, args.repeat))
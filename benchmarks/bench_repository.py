@@ -0,0 +1,135 @@
+"""
+Бенчмарк CPU на один поиск по первичному ключу и одну проверку
+пересечений: session.get и запрос, собираемый при каждом вызове, против
+заранее построенных запросов Repository (готовый select с bindparam и
+lambda_stmt). Identity map перед каждым вызовом очищается, так что
+каждый вызов идет в БД; разница - сборка запроса и его ключа кэша.
+Заодно печатается статистика кэша скомпилированных запросов.
+
+Запуск:
+    python -m benchmarks.bench_repository --calls 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+import app.models.hotels as models
+from app.database import Base
+from app.core.enums import ACTIVE_BOOKING_STATUSES, BookingStatus, RoomStatus
+from app.core.query_stats import compiled_cache_stats, instrument_engine
+from app.services.repository import Repository
+
+CHECK_IN = datetime(2030, 5, 10, 14)
+
+def seed(engine):
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [{
+            "email": "bench@example.com", "first_name": "Bench", "last_name": "User", "hashed_password": "x"
+        }])
+        connection.execute(insert(models.Hotel), [
+            {"name": "Hotel", "address": "Main St", "city": "Moscow", "country": "Russia", "rating": 4.0}
+        ])
+        connection.execute(insert(models.Room), [{
+            "hotel_id": 1,
+            "room_number": "101",
+            "floor": 1,
+            "room_type": "Standard",
+            "price_per_night": 100.0,
+            "capacity": 2,
+            "status": RoomStatus.AVAILABLE,
+        }])
+        connection.execute(insert(models.Booking), [{
+            "user_id": 1,
+            "hotel_id": 1,
+            "room_id": 1,
+            "check_in_date": CHECK_IN,
+            "check_out_date": CHECK_IN + timedelta(days=2),
+            "number_of_guests": 1,
+            "total_price": 200.0,
+            "status": BookingStatus.CONFIRMED,
+        }])
+
+async def adhoc_overlap(db: AsyncSession, room_id: int, check_in: datetime, check_out: datetime) -> bool:
+    """Проверка пересечений в прежнем виде: запрос собирается заново"""
+    query = select(models.Booking.id).where(
+        models.Booking.room_id == room_id,
+        and_(
+            models.Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            models.Booking.check_in_date < check_out,
+            models.Booking.check_out_date > check_in,
+        ),
+    )
+    return (await db.execute(query.limit(1))).first() is not None
+
+CASES = {
+    "hotel by id": (
+        lambda db: db.get(models.Hotel, 1),
+        lambda db: Repository(db).get_hotel(1),
+    ),
+    "booking + room": (
+        lambda db: db.get(models.Booking, 1, options=[selectinload(models.Booking.room)]),
+        lambda db: Repository(db).get_booking(1, with_room=True),
+    ),
+    "overlap check": (
+        lambda db: adhoc_overlap(db, 1, CHECK_IN, CHECK_IN + timedelta(days=1)),
+        lambda db: Repository(db).booking_overlaps(1, CHECK_IN, CHECK_IN + timedelta(days=1)),
+    ),
+}
+
+async def measure(session_factory, call, calls: int) -> float:
+    """CPU процесса на один вызов, мкс"""
+    async with session_factory() as db:
+        for _ in range(100):
+            await call(db)
+            db.expunge_all()
+        started = time.process_time()
+        for _ in range(calls):
+            await call(db)
+            db.expunge_all()
+        return (time.process_time() - started) / calls * 1e6
+
+async def run_case(session_factory, calls: int):
+    print(f"{'lookup':<16} {'ad-hoc us':>10} {'repository us':>14} {'saved us':>9} {'speedup':>8}")
+    for name, (adhoc, repository) in CASES.items():
+        adhoc_us = await measure(session_factory, adhoc, calls)
+        repository_us = await measure(session_factory, repository, calls)
+        print(
+            f"{name:<16} {adhoc_us:>10.1f} {repository_us:>14.1f} "
+            f"{adhoc_us - repository_us:>9.1f} {adhoc_us / repository_us:>7.2f}x"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        seed(engine)
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        instrument_engine(async_engine.sync_engine, "bench")
+        session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        async def bench():
+            await run_case(session_factory, args.calls)
+            await async_engine.dispose()
+
+        asyncio.run(bench())
+        print(f"\ncompiled cache: {compiled_cache_stats.info()['bench']}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
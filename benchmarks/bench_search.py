@@ -0,0 +1,150 @@
+"""
+Бенчмарк поиска комнат по подстроке города и типа комнаты: прежний
+ILIKE '%x%' (полное сканирование hotels и rooms) против TextSearch
+(значения находятся по таблице search_trigrams, выборка идет через
+IN по индексам). Замеряется поиск по подстроке, по слову с опечаткой
+и по городу вместе с типом комнаты. На PostgreSQL TextSearch
+использует GIN-индексы pg_trgm, здесь замеряется вариант для SQLite.
+
+Запуск:
+    python -m benchmarks.bench_search --hotels 10000 --rooms-per-hotel 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models.hotels as models
+from app.database import Base
+from app.core.enums import RoomStatus
+from app.services.text_search import TextSearch, rebuild_search_index
+
+SYLLABLES = ["ka", "zan", "mo", "sk", "tver", "om", "no", "vo", "gor", "rod", "pe", "ter", "burg", "so", "chi", "ly"]
+ROOM_TYPES = ["Standard", "Deluxe", "Junior Suite", "Presidential Suite", "Family Room", "Economy"]
+BATCH_SIZE = 20000
+
+# (название, город, тип комнаты)
+CASES = [
+    ("substring", "kazan", None),
+    ("typo", "kazam", None),
+    ("city+type", "kazan", "suite"),
+]
+
+def city_names(count: int):
+    """count разных названий городов; первое - Kazan, чтобы было что искать"""
+    rng = random.Random(42)
+    names = {"Kazan"}
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+def seed(engine, hotels_count: int, rooms_per_hotel: int, cities_count: int):
+    cities = city_names(cities_count)
+    with engine.begin() as connection:
+        for start in range(0, hotels_count, BATCH_SIZE):
+            connection.execute(insert(models.Hotel), [
+                {
+                    "name": f"Hotel {index}",
+                    "address": f"Street {index}",
+                    "city": cities[index % len(cities)],
+                    "country": "Russia",
+                    "rating": 4.0,
+                }
+                for index in range(start, min(start + BATCH_SIZE, hotels_count))
+            ])
+
+        rows = []
+        for hotel_id in range(1, hotels_count + 1):
+            for number in range(rooms_per_hotel):
+                rows.append({
+                    "hotel_id": hotel_id,
+                    "room_number": str(100 + number),
+                    "floor": 1,
+                    "room_type": ROOM_TYPES[(hotel_id + number) % len(ROOM_TYPES)],
+                    "price_per_night": 100.0,
+                    "capacity": 2,
+                    "status": RoomStatus.AVAILABLE,
+                })
+            if len(rows) >= BATCH_SIZE:
+                connection.execute(insert(models.Room), rows)
+                rows = []
+        if rows:
+            connection.execute(insert(models.Room), rows)
+
+        # Вставка в обход ORM - индекс триграмм строится отдельно
+        rebuild_search_index(connection)
+
+def base_query():
+    return select(models.Room.id).join(models.Hotel).where(models.Room.status == RoomStatus.AVAILABLE)
+
+async def ilike_search(db, city, room_type):
+    query = base_query().where(models.Hotel.city.ilike(f"%{city}%"))
+    if room_type:
+        query = query.where(models.Room.room_type.ilike(f"%{room_type}%"))
+    return (await db.execute(query)).scalars().all()
+
+async def trigram_search(db, city, room_type):
+    search = TextSearch(db)
+    query = base_query().where(await search.condition("city", city))
+    if room_type:
+        query = query.where(await search.condition("room_type", room_type))
+    return (await db.execute(query)).scalars().all()
+
+async def measure(session_factory, search, city, room_type, repeat: int):
+    """Вернуть (медианная задержка в мс, число найденных комнат)"""
+    timings = []
+    found = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        async with session_factory() as db:
+            found = len(await search(db, city, room_type))
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), found
+
+async def run(hotels_count: int, rooms_per_hotel: int, cities_count: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        seed(engine, hotels_count, rooms_per_hotel, cities_count)
+        print(
+            f"{hotels_count} hotels, {hotels_count * rooms_per_hotel} rooms, {cities_count} cities "
+            f"(seeded in {time.perf_counter() - started:.1f} s)"
+        )
+
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+        print(f"{'case':>10} | {'ilike':>7} | {'trigram':>7} | {'ilike ms':>9} | {'trigram ms':>10} | {'speedup':>7}")
+        print("-" * 66)
+        for name, city, room_type in CASES:
+            ilike_ms, ilike_found = await measure(session_factory, ilike_search, city, room_type, repeat)
+            trigram_ms, trigram_found = await measure(session_factory, trigram_search, city, room_type, repeat)
+            # Триграммы находят все, что нашел ILIKE, плюс похожие названия
+            assert trigram_found >= ilike_found, "Поиск по триграммам потерял совпадения ILIKE"
+            print(
+                f"{name:>10} | {ilike_found:>7} | {trigram_found:>7} | {ilike_ms:>9.2f} | {trigram_ms:>10.2f} | "
+                f"{ilike_ms / trigram_ms:>6.1f}x"
+            )
+
+        await async_engine.dispose()
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска по подстроке: ILIKE против триграмм")
+    parser.add_argument("--hotels", type=int, default=10000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=100)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.hotels, args.rooms_per_hotel, args.cities, args.repeat))
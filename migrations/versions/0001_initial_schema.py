@@ -0,0 +1,116 @@
+"""initial schema
+
+Схема, которую раньше создавал create_tables(). Для существующих баз
+app.database.run_migrations() помечает эту ревизию как примененную.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 02:03:42.531065
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'hotels',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('address', sa.String(length=200), nullable=False),
+        sa.Column('city', sa.String(length=50), nullable=False),
+        sa.Column('country', sa.String(length=50), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_hotels_id', 'hotels', ['id'], unique=False)
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('first_name', sa.String(length=50), nullable=False),
+        sa.Column('last_name', sa.String(length=50), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('role', sa.Enum('ADMIN', 'USER', name='userrole'), nullable=True),
+        sa.Column('hashed_password', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+
+    op.create_table(
+        'rooms',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('hotel_id', sa.Integer(), nullable=False),
+        sa.Column('room_number', sa.String(length=10), nullable=False),
+        sa.Column('floor', sa.Integer(), nullable=False),
+        sa.Column('room_type', sa.String(length=50), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('price_per_night', sa.Float(), nullable=False),
+        sa.Column('capacity', sa.Integer(), nullable=False),
+        sa.Column('amenities', sa.Text(), nullable=True),
+        sa.Column(
+            'status',
+            sa.Enum('AVAILABLE', 'OCCUPIED', 'MAINTENANCE', 'CLEANING', 'INACTIVE', name='roomstatus'),
+            nullable=True,
+        ),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['hotel_id'], ['hotels.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_rooms_id', 'rooms', ['id'], unique=False)
+
+    op.create_table(
+        'bookings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('booking_reference', sa.String(length=36), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('hotel_id', sa.Integer(), nullable=True),
+        sa.Column('room_id', sa.Integer(), nullable=True),
+        sa.Column('check_in_date', sa.DateTime(), nullable=False),
+        sa.Column('check_out_date', sa.DateTime(), nullable=False),
+        sa.Column('number_of_guests', sa.Integer(), nullable=False),
+        sa.Column('total_price', sa.Float(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum('CONFIRMED', 'CANCELLED', 'COMPLETED', 'CHECKED_IN', 'CHECKED_OUT', name='bookingstatus'),
+            nullable=True,
+        ),
+        sa.Column('special_requests', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['hotel_id'], ['hotels.id']),
+        sa.ForeignKeyConstraint(['room_id'], ['rooms.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('booking_reference'),
+    )
+    op.create_index('ix_bookings_id', 'bookings', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_id', table_name='bookings')
+    op.drop_table('bookings')
+    op.drop_index('ix_rooms_id', table_name='rooms')
+    op.drop_table('rooms')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+    op.drop_index('ix_hotels_id', table_name='hotels')
+    op.drop_table('hotels')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for enum_name in ('bookingstatus', 'roomstatus', 'userrole'):
+            sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
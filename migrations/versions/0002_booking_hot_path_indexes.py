@@ -0,0 +1,47 @@
+"""booking hot path indexes
+
+Составные индексы под предикаты роутеров: проверка пересечений
+бронирований, поиск свободных комнат, бронирования пользователя,
+фильтры отелей по городу и стране.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 02:20:11.104223
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_hotels_city_country', 'hotels', ['city', 'country']),
+    ('ix_hotels_country', 'hotels', ['country']),
+    ('ix_rooms_hotel_status_price', 'rooms', ['hotel_id', 'status', 'price_per_night']),
+    ('ix_rooms_hotel_number', 'rooms', ['hotel_id', 'room_number']),
+    ('ix_bookings_room_status_dates', 'bookings', ['room_id', 'status', 'check_in_date', 'check_out_date']),
+    ('ix_bookings_user_checkin', 'bookings', ['user_id', 'check_in_date']),
+    ('ix_bookings_hotel_status', 'bookings', ['hotel_id', 'status']),
+]
+
+
+def upgrade() -> None:
+    # База могла быть создана через create_all() уже с этими индексами
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+"""booking no overlap
+
+PostgreSQL: EXCLUDE-ограничение, запрещающее пересекающиеся активные
+бронирования одной комнаты. Это последний рубеж защиты от двойного
+бронирования, если блокировку комнаты обойдут (другой сервис, ручной SQL).
+Миграция упадет, если в базе уже есть пересекающиеся активные брони.
+На SQLite ограничение не создается: запись в БД и так сериализуется.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 03:12:40.218337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+CONSTRAINT_NAME = 'ex_bookings_room_no_overlap'
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # btree_gist нужен для сравнения room_id через = в GiST-индексе
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    op.execute(
+        f"ALTER TABLE bookings ADD CONSTRAINT {CONSTRAINT_NAME} "
+        "EXCLUDE USING gist (room_id WITH =, tsrange(check_in_date, check_out_date) WITH &&) "
+        "WHERE (status IN ('CONFIRMED', 'CHECKED_IN'))"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.drop_constraint(CONSTRAINT_NAME, 'bookings', type_='exclude')
@@ -0,0 +1,44 @@
+"""keyset pagination indexes
+
+Индексы (поле сортировки, id) под keyset-пагинацию списков: условие
+(поле, id) > (?, ?) и ORDER BY поле, id читаются из индекса без
+сортировки и без пропуска предыдущих страниц. Сортировка по id
+обслуживается первичным ключом.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 11:05:37.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ('ix_hotels_name_id', 'hotels', ['name', 'id']),
+    ('ix_rooms_price_id', 'rooms', ['price_per_night', 'id']),
+    ('ix_bookings_checkin_id', 'bookings', ['check_in_date', 'id']),
+]
+
+
+def upgrade() -> None:
+    # База могла быть создана через create_all() уже с этими индексами
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        existing = {index['name'] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
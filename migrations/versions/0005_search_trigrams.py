@@ -0,0 +1,62 @@
+"""search trigrams
+
+Поиск комнат по подстроке city, country и room_type без полного
+сканирования. PostgreSQL: расширение pg_trgm и GIN-индексы gin_trgm_ops,
+которыми пользуются и ILIKE '%x%', и оператор похожести %. На остальных
+базах - таблица search_trigrams (поле, триграмма, значение), которую
+приложение поддерживает само; здесь она заполняется по текущим данным.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:21:09.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_INDEXES = [
+    ('ix_hotels_city_trgm', 'hotels', 'city'),
+    ('ix_hotels_country_trgm', 'hotels', 'country'),
+    ('ix_rooms_room_type_trgm', 'rooms', 'room_type'),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # База могла быть создана через create_all() уже с этой таблицей
+    if 'search_trigrams' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'search_trigrams',
+            sa.Column('field', sa.String(length=20), nullable=False),
+            sa.Column('trigram', sa.String(length=3), nullable=False),
+            sa.Column('value', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('field', 'trigram', 'value'),
+        )
+        op.create_index('ix_search_trigrams_field_value', 'search_trigrams', ['field', 'value'], unique=False)
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRGM_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)')
+    else:
+        from app.services.text_search import rebuild_search_index
+        rebuild_search_index(bind)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _, _ in reversed(TRGM_INDEXES):
+            op.execute(f'DROP INDEX IF EXISTS {name}')
+
+    op.drop_index('ix_search_trigrams_field_value', table_name='search_trigrams')
+    op.drop_table('search_trigrams')
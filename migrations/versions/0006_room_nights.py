@@ -0,0 +1,49 @@
+"""room nights
+
+Инвентарь занятости room_nights: строка на каждую ночь активного
+бронирования. Поиск свободных комнат проверяет ночи анти-join'ом по
+первичному ключу (room_id, night) вместо пересечения интервалов.
+Таблица заполняется по существующим бронированиям; потом ее ведет
+приложение (app/services/room_nights.py), а проверить и перестроить
+ее можно командой python -m app.services.room_nights.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:02:44.180356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # База могла быть создана через create_all() уже с этой таблицей
+    if 'room_nights' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'room_nights',
+            sa.Column('room_id', sa.Integer(), nullable=False),
+            sa.Column('night', sa.Date(), nullable=False),
+            sa.Column('booking_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('room_id', 'night', 'booking_id'),
+        )
+        op.create_index('ix_room_nights_booking', 'room_nights', ['booking_id'], unique=False)
+
+    from app.services.room_nights import rebuild_room_nights
+    rebuild_room_nights(bind)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_room_nights_booking', table_name='room_nights')
+    op.drop_table('room_nights')
@@ -0,0 +1,89 @@
+"""bookings archive
+
+Архив bookings_archive для завершенных и отмененных бронирований старше
+окна хранения: их переносит задача cleanup_old_data пачками
+(app/services/booking_archive.py), и горячая таблица bookings со своими
+индексами и EXCLUDE-ограничением остается маленькой.
+PostgreSQL: архив секционирован по месяцу заезда (PARTITION BY RANGE),
+месячные секции создаются при переносе, DEFAULT-секция страхует вставку.
+Сама bookings не секционируется: EXCLUDE-ограничение из 0003 и внешний
+ключ room_nights.booking_id требуют уникальности без ключа секционирования.
+На SQLite архив - обычная таблица.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 16:41:09.532871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # База могла быть создана через create_all() уже с этой таблицей
+    if 'bookings_archive' in sa.inspect(bind).get_table_names():
+        return
+
+    if bind.dialect.name == 'postgresql':
+        op.execute(
+            "CREATE TABLE bookings_archive ("
+            "id INTEGER NOT NULL, "
+            "check_in_date TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+            "booking_reference VARCHAR(36), "
+            "user_id INTEGER, "
+            "hotel_id INTEGER, "
+            "room_id INTEGER, "
+            "check_out_date TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+            "number_of_guests INTEGER NOT NULL, "
+            "total_price FLOAT NOT NULL, "
+            "status bookingstatus, "
+            "special_requests TEXT, "
+            "created_at TIMESTAMP WITHOUT TIME ZONE, "
+            "archived_at TIMESTAMP WITHOUT TIME ZONE NOT NULL, "
+            "PRIMARY KEY (id, check_in_date)"
+            ") PARTITION BY RANGE (check_in_date)"
+        )
+        op.execute("CREATE TABLE bookings_archive_default PARTITION OF bookings_archive DEFAULT")
+    else:
+        op.create_table(
+            'bookings_archive',
+            sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column('check_in_date', sa.DateTime(), nullable=False),
+            sa.Column('booking_reference', sa.String(length=36), nullable=True),
+            sa.Column('user_id', sa.Integer(), nullable=True),
+            sa.Column('hotel_id', sa.Integer(), nullable=True),
+            sa.Column('room_id', sa.Integer(), nullable=True),
+            sa.Column('check_out_date', sa.DateTime(), nullable=False),
+            sa.Column('number_of_guests', sa.Integer(), nullable=False),
+            sa.Column('total_price', sa.Float(), nullable=False),
+            sa.Column(
+                'status',
+                sa.Enum('CONFIRMED', 'CANCELLED', 'COMPLETED', 'CHECKED_IN', 'CHECKED_OUT', name='bookingstatus'),
+                nullable=True,
+            ),
+            sa.Column('special_requests', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id', 'check_in_date'),
+        )
+
+    # На секционированной таблице индекс создается во всех секциях
+    op.create_index('ix_bookings_archive_user_checkin', 'bookings_archive', ['user_id', 'check_in_date'], unique=False)
+    op.create_index('ix_bookings_archive_hotel_checkin', 'bookings_archive', ['hotel_id', 'check_in_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_archive_hotel_checkin', table_name='bookings_archive')
+    op.drop_index('ix_bookings_archive_user_checkin', table_name='bookings_archive')
+    # Секции удаляются вместе с родительской таблицей
+    op.drop_table('bookings_archive')
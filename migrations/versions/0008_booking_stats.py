@@ -0,0 +1,71 @@
+"""booking stats
+
+Агрегаты hotel_stats и room_stats: счетчики бронирований по статусам,
+выручка и проданные ночи за всю историю, включая архив. Приложение
+ведет их в той же транзакции, что и бронирования
+(app/services/booking_stats.py); здесь таблицы заполняются по текущей
+истории. Проверить и перестроить их можно командой
+python -m app.rebuild_booking_stats.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 18:05:37.214906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _counter_columns():
+    return [
+        sa.Column('bookings_count', sa.Integer(), nullable=False),
+        sa.Column('active_bookings', sa.Integer(), nullable=False),
+        sa.Column('completed_bookings', sa.Integer(), nullable=False),
+        sa.Column('cancelled_bookings', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.Column('nights_sold', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    tables = sa.inspect(bind).get_table_names()
+    # База могла быть создана через create_all() уже с этими таблицами
+    if 'hotel_stats' not in tables:
+        op.create_table(
+            'hotel_stats',
+            sa.Column('hotel_id', sa.Integer(), nullable=False),
+            *_counter_columns(),
+            sa.ForeignKeyConstraint(['hotel_id'], ['hotels.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('hotel_id'),
+        )
+    if 'room_stats' not in tables:
+        op.create_table(
+            'room_stats',
+            sa.Column('room_id', sa.Integer(), nullable=False),
+            sa.Column('hotel_id', sa.Integer(), nullable=False),
+            *_counter_columns(),
+            sa.ForeignKeyConstraint(['room_id'], ['rooms.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['hotel_id'], ['hotels.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('room_id'),
+        )
+        op.create_index('ix_room_stats_hotel', 'room_stats', ['hotel_id'], unique=False)
+
+    from app.services.booking_stats import rebuild_booking_stats
+    rebuild_booking_stats(bind)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_room_stats_hotel', table_name='room_stats')
+    op.drop_table('room_stats')
+    op.drop_table('hotel_stats')
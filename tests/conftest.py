@@ -1,47 +1,139 @@
 # tests/conftest.py
+import asyncio
 import pytest
 import os
 import sys
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 # Добавляем путь к корневой папке в Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app
+from app.config import settings
 from app.database import get_db, Base
+from app.core.redis import RedisManager
+from app.core.query_stats import STATEMENTS_HEADER, TIME_HEADER, DUPLICATES_HEADER, instrument_engine
 from app.core.enums import RoomStatus, BookingStatus
+from app.services.booking_index import booking_index
+from app.services.occupancy_matrix import occupancy_matrix
+from app.services.local_cache import local_cache
 
-# Тестовая база данных
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+@pytest.fixture
+def test_db(tmp_path):
+    """
+    Отдельный файл SQLite на каждый тест: данные и блокировки
+    одного теста не переживают его и не мешают следующему.
+    Синхронный движок готовит данные, приложение работает через aiosqlite.
+    """
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(
+        async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    async def override_get_db():
+        async with async_session_factory() as db:
+            yield db
+
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "primary")
+    Base.metadata.create_all(bind=engine)
+    app.dependency_overrides[get_db] = override_get_db
+    # Старт приложения (миграции, индекс занятости) работает с тестовой базой, а не с ./hotel_booking.db
+    app.state.engine = engine
+    app.state.session_factory = session_factory
+    app.state.async_engine = async_engine
+    # Индекс, матрица и локальный кэш живут в процессе и пережили бы смену базы
+    booking_index.clear()
+    occupancy_matrix.clear()
+    local_cache.clear()
+
+    yield SimpleNamespace(
+        engine=engine,
+        async_engine=async_engine,
+        session_factory=session_factory,
+        async_session_factory=async_session_factory,
+    )
+
+    app.dependency_overrides.pop(get_db, None)
+    booking_index.clear()
+    occupancy_matrix.clear()
+    engine.dispose()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+@pytest.fixture
+def query_budget(monkeypatch):
+    """
+    Проверка бюджета SQL-запросов ответа по заголовкам X-DB-*:
+    query_budget(response, statements=1) падает, если эндпоинт выполнил
+    больше запросов или повторил одну форму запроса больше duplicates раз.
+    """
+    monkeypatch.setattr(settings, "DEBUG", True)
+
+    def check(response, statements: int, duplicates: int = 0):
+        executed = int(response.headers[STATEMENTS_HEADER])
+        repeated = int(response.headers[DUPLICATES_HEADER])
+        summary = (
+            f"{response.request.method} {response.request.url.path}: {executed} запросов, "
+            f"{repeated} повторов, {response.headers[TIME_HEADER]} мс"
+        )
+        assert executed <= statements, f"Бюджет {statements} превышен - {summary}"
+        assert repeated <= duplicates, f"Допустимо повторов: {duplicates} - {summary}"
+
+    return check
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+@pytest.fixture
+def client(test_db):
+    with TestClient(app) as test_client:
+        yield test_client
 
-def override_get_db():
+@pytest.fixture
+def db_session(test_db):
+    # Сессия для тестов сервисов без HTTP-слоя
+    db = test_db.session_factory()
     try:
-        db = TestingSessionLocal()
         yield db
     finally:
         db.close()
 
-app.dependency_overrides[get_db] = override_get_db
+@pytest.fixture
+def loop():
+    # Один цикл событий на тест: асинхронная сессия живёт внутри него
+    event_loop = asyncio.new_event_loop()
+    yield event_loop
+    event_loop.close()
 
 @pytest.fixture
-def client():
-    # Создаем таблицы для каждого теста
-    Base.metadata.create_all(bind=engine)
-    with TestClient(app) as test_client:
-        yield test_client
-    # Очищаем после теста
-    Base.metadata.drop_all(bind=engine)
+def run(loop):
+    """Выполнить корутину в цикле событий теста"""
+    return loop.run_until_complete
+
+@pytest.fixture
+def async_db(test_db, db_session, loop):
+    # Асинхронная сессия для сервисов; данные готовятся через db_session
+    db = test_db.async_session_factory()
+    try:
+        yield db
+    finally:
+        loop.run_until_complete(db.close())
+
+@pytest.fixture
+def fake_redis():
+    """RedisManager поверх fakeredis: команды выполняются в памяти процесса"""
+    fakeredis = pytest.importorskip("fakeredis")
+    manager = RedisManager("redis://fake")
+    manager.redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    manager.connected = True
+    return manager
 
 @pytest.fixture
 def sample_hotel_data():
@@ -0,0 +1,106 @@
+# tests/test_archival.py
+import importlib
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+
+import app.models.hotels as models
+from app.core.enums import BookingStatus, RoomStatus
+from app.services.booking_archive import archive_bookings, next_month, partition_name
+
+# app.tasks в пакете app перекрыт роутером с тем же именем
+report_tasks = importlib.import_module("app.tasks.report_tasks")
+
+NOW = datetime.utcnow()
+
+class TestBookingArchive:
+    @pytest.fixture
+    def bookings(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        user = models.User(email="user@example.com", first_name="Test", last_name="User", hashed_password="x")
+        db_session.add_all([hotel, user])
+        db_session.flush()
+        room = models.Room(
+            hotel_id=hotel.id,
+            room_number="101",
+            floor=1,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        db_session.add(room)
+        db_session.flush()
+
+        def booking(days_ago: int, status: BookingStatus):
+            check_out = NOW - timedelta(days=days_ago)
+            return models.Booking(
+                user_id=user.id,
+                hotel_id=hotel.id,
+                room_id=room.id,
+                check_in_date=check_out - timedelta(days=2),
+                check_out_date=check_out,
+                number_of_guests=1,
+                total_price=200.0,
+                status=status,
+                special_requests="Late check-in"
+            )
+
+        rows = {
+            "old_completed": booking(400, BookingStatus.COMPLETED),
+            "old_cancelled": booking(500, BookingStatus.CANCELLED),
+            "old_checked_out": booking(600, BookingStatus.CHECKED_OUT),
+            # Активная бронь не архивируется, даже если даты давно прошли
+            "old_confirmed": booking(450, BookingStatus.CONFIRMED),
+            "recent_completed": booking(10, BookingStatus.COMPLETED),
+        }
+        db_session.add_all(rows.values())
+        db_session.commit()
+        return {name: row.id for name, row in rows.items()}
+
+    def remaining(self, db_session):
+        db_session.expire_all()
+        return set(db_session.execute(select(models.Booking.id)).scalars())
+
+    def test_moves_old_finished_bookings_in_batches(self, test_db, db_session, bookings):
+        progress = []
+        result = archive_bookings(
+            test_db.engine,
+            retention_days=365,
+            batch_size=2,
+            progress=lambda archived, total: progress.append((archived, total))
+        )
+
+        assert result == {"archived_bookings": 3, "batches": 2, "archivable_bookings": 3}
+        assert progress == [(2, 3), (3, 3)]
+        assert self.remaining(db_session) == {bookings["old_confirmed"], bookings["recent_completed"]}
+
+        archived = db_session.execute(select(models.ArchivedBooking)).scalars().all()
+        assert {row.id for row in archived} == {
+            bookings["old_completed"], bookings["old_cancelled"], bookings["old_checked_out"]
+        }
+        row = next(row for row in archived if row.id == bookings["old_cancelled"])
+        assert row.status == BookingStatus.CANCELLED
+        assert row.special_requests == "Late check-in"
+        assert row.booking_reference
+        assert row.archived_at is not None
+
+        # Повторный запуск ничего не переносит
+        assert archive_bookings(test_db.engine, retention_days=365)["archived_bookings"] == 0
+
+    def test_max_batches_bounds_a_run(self, test_db, db_session, bookings):
+        result = archive_bookings(test_db.engine, retention_days=365, batch_size=1, max_batches=1)
+        assert result["archived_bookings"] == 1
+        assert len(self.remaining(db_session)) == 4
+
+    def test_cleanup_task(self, test_db, db_session, bookings, monkeypatch):
+        monkeypatch.setattr(report_tasks, "engine", test_db.engine)
+        result = report_tasks.cleanup_old_data.run(retention_days=0)
+
+        assert result["status"] == "success"
+        assert result["cleaned_items"]["archived_bookings"] == 4
+        assert self.remaining(db_session) == {bookings["old_confirmed"]}
+
+    def test_partition_bounds(self):
+        assert partition_name(date(2025, 3, 1)) == "bookings_archive_y2025m03"
+        assert next_month(date(2025, 12, 1)) == date(2026, 1, 1)
@@ -0,0 +1,195 @@
+# tests/test_availability.py
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import RoomStatus, BookingStatus
+from app.services.availability_service import AvailabilityService
+from app.services.booking_index import BookingIntervalIndex, booking_index
+
+class TestAvailabilityService:
+    @pytest.fixture
+    def hotel_with_rooms(self, db_session):
+        hotel = models.Hotel(
+            name="Grand Hotel",
+            address="123 Main St",
+            city="Moscow",
+            country="Russia"
+        )
+        db_session.add(hotel)
+        db_session.flush()
+
+        rooms = []
+        for number, price in [("101", 100.0), ("102", 150.0), ("103", 200.0), ("104", 250.0)]:
+            room = models.Room(
+                hotel_id=hotel.id,
+                room_number=number,
+                floor=1,
+                room_type="Standard",
+                price_per_night=price,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            db_session.add(room)
+            rooms.append(room)
+        rooms[3].status = RoomStatus.MAINTENANCE
+
+        user = models.User(
+            email="guest@example.com",
+            first_name="John",
+            last_name="Doe",
+            hashed_password="x"
+        )
+        db_session.add(user)
+        db_session.flush()
+
+        check_in = datetime.combine(date.today() + timedelta(days=10), datetime.min.time())
+        # Комната 101 занята на пересекающиеся даты, у 102 бронь отменена
+        bookings = [
+            (rooms[0], check_in + timedelta(days=1), check_in + timedelta(days=3), BookingStatus.CONFIRMED),
+            (rooms[1], check_in, check_in + timedelta(days=2), BookingStatus.CANCELLED),
+            (rooms[2], check_in - timedelta(days=3), check_in, BookingStatus.CONFIRMED),
+        ]
+        for room, start, end, status in bookings:
+            db_session.add(models.Booking(
+                user_id=user.id,
+                hotel_id=hotel.id,
+                room_id=room.id,
+                check_in_date=start,
+                check_out_date=end,
+                number_of_guests=1,
+                total_price=100.0,
+                status=status
+            ))
+        db_session.commit()
+
+        return {"hotel": hotel, "rooms": rooms, "check_in": check_in}
+
+    def test_get_available_rooms_excludes_overlapping(self, async_db, run, hotel_with_rooms):
+        check_in = hotel_with_rooms["check_in"]
+        rooms = run(AvailabilityService(async_db).get_available_rooms(
+            hotel_with_rooms["hotel"].id,
+            check_in.date(),
+            (check_in + timedelta(days=2)).date()
+        ))
+
+        # 101 пересекается, 104 на обслуживании, выезд из 103 в день заезда не конфликтует
+        assert [room.room_number for room in rooms] == ["102", "103"]
+
+    def test_get_available_rooms_price_filter(self, async_db, run, hotel_with_rooms):
+        check_in = hotel_with_rooms["check_in"]
+        rooms = run(AvailabilityService(async_db).get_available_rooms(
+            hotel_with_rooms["hotel"].id,
+            check_in,
+            check_in + timedelta(days=2),
+            min_price=160.0
+        ))
+
+        assert [room.room_number for room in rooms] == ["103"]
+
+    def test_get_available_rooms_single_query(self, async_db, run, hotel_with_rooms):
+        hotel_id = hotel_with_rooms["hotel"].id
+        check_in = hotel_with_rooms["check_in"]
+        statements = []
+
+        def count_statements(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        bind = async_db.bind.sync_engine
+        event.listen(bind, "before_cursor_execute", count_statements)
+        try:
+            run(AvailabilityService(async_db).get_available_rooms(
+                hotel_id,
+                check_in,
+                check_in + timedelta(days=2)
+            ))
+        finally:
+            event.remove(bind, "before_cursor_execute", count_statements)
+
+        assert len(statements) == 1
+
+    def test_search_available_rooms_loads_hotel(self, async_db, run, hotel_with_rooms):
+        check_in = hotel_with_rooms["check_in"]
+        rooms = run(AvailabilityService(async_db).search_available_rooms(
+            city="mosc",
+            check_in=check_in,
+            check_out=check_in + timedelta(days=2)
+        ))
+
+        assert [room.room_number for room in rooms] == ["102", "103"]
+        assert all(room.hotel.city == "Moscow" for room in rooms)
+
+    def test_index_matches_sql_path(self, db_session, async_db, run, hotel_with_rooms, monkeypatch):
+        monkeypatch.setattr(settings, "BOOKING_INDEX_ENABLED", True)
+        hotel_id = hotel_with_rooms["hotel"].id
+        check_in = hotel_with_rooms["check_in"]
+        service = AvailabilityService(async_db)
+
+        sql_rooms = run(service.get_available_rooms(hotel_id, check_in, check_in + timedelta(days=2)))
+        booking_index.rebuild(db_session)
+        try:
+            assert service.use_index()
+            index_rooms = run(service.get_available_rooms(hotel_id, check_in, check_in + timedelta(days=2)))
+            assert not run(service.is_room_free(hotel_with_rooms["rooms"][0].id, check_in, check_in + timedelta(days=2)))
+        finally:
+            booking_index.clear()
+
+        assert [room.id for room in index_rooms] == [room.id for room in sql_rooms]
+
+    def test_authoritative_check_ignores_stale_index(self, db_session, async_db, run, hotel_with_rooms, monkeypatch):
+        monkeypatch.setattr(settings, "BOOKING_INDEX_ENABLED", True)
+        room_id = hotel_with_rooms["rooms"][0].id
+        check_in = hotel_with_rooms["check_in"]
+        service = AvailabilityService(async_db)
+
+        booking_index.rebuild(db_session)
+        try:
+            # Бронь отменена в обход этого процесса: индекс все еще считает комнату занятой
+            db_session.query(models.Booking).update({models.Booking.status: BookingStatus.CANCELLED})
+            db_session.commit()
+
+            assert not run(service.is_room_free(room_id, check_in, check_in + timedelta(days=2)))
+            assert run(service.is_room_free(room_id, check_in, check_in + timedelta(days=2), authoritative=True))
+        finally:
+            booking_index.clear()
+
+class TestBookingIntervalIndex:
+    def test_free_and_busy_ranges(self):
+        index = BookingIntervalIndex()
+        start = datetime(2030, 1, 10)
+        index.add(1, 10, start, start + timedelta(days=3))
+        index.add(2, 10, start + timedelta(days=5), start + timedelta(days=7))
+
+        assert index.is_free(10, start - timedelta(days=2), start)
+        assert index.is_free(10, start + timedelta(days=3), start + timedelta(days=5))
+        assert not index.is_free(10, start + timedelta(days=2), start + timedelta(days=4))
+        assert not index.is_free(10, start - timedelta(days=1), start + timedelta(days=10))
+        assert index.is_free(11, start, start + timedelta(days=1))
+
+    def test_long_booking_hidden_behind_later_start(self):
+        # Пересекающиеся брони: длинная бронь должна учитываться через префиксный максимум
+        index = BookingIntervalIndex()
+        start = datetime(2030, 1, 1)
+        index.add(1, 10, start, start + timedelta(days=30))
+        index.add(2, 10, start + timedelta(days=2), start + timedelta(days=3))
+
+        assert not index.is_free(10, start + timedelta(days=10), start + timedelta(days=12))
+
+    def test_remove_and_move(self):
+        index = BookingIntervalIndex()
+        start = datetime(2030, 1, 1)
+        index.add(1, 10, start, start + timedelta(days=3))
+        index.add(2, 20, start, start + timedelta(days=3))
+
+        index.remove(1)
+        assert index.is_free(10, start, start + timedelta(days=3))
+
+        # Повторное добавление переносит бронь на новые даты
+        index.add(2, 20, start + timedelta(days=10), start + timedelta(days=12))
+        assert index.is_free(20, start, start + timedelta(days=3))
+        assert index.free_rooms([10, 20, 30], start + timedelta(days=11), start + timedelta(days=15)) == [10, 30]
+
+        index.remove_rooms([20])
+        assert index.is_free(20, start + timedelta(days=10), start + timedelta(days=12))
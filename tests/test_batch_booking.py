@@ -0,0 +1,169 @@
+# tests/test_batch_booking.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+
+import app.models.hotels as models
+from app.main import app
+from app.core.dependencies import require_user_or_admin
+from app.core.enums import BookingStatus, RoomStatus, UserRole
+from app.services.booking_events import BookingEventService
+from app.services.cache_service import CacheService
+from app.services.notification_service import NotificationService
+
+CHECK_IN = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=14)
+CHECK_OUT = CHECK_IN + timedelta(days=3)
+
+class TestBatchBooking:
+    @pytest.fixture
+    def group(self, db_session, monkeypatch):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        other_hotel = models.Hotel(name="Other Hotel", address="Side St", city="Kazan", country="Russia")
+        operator = models.User(
+            email="operator@example.com",
+            first_name="Tour",
+            last_name="Operator",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add_all([hotel, other_hotel, operator])
+        db_session.flush()
+
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=str(101 + index),
+                floor=1,
+                room_type="Standard",
+                price_per_night=100.0 + index,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for index in range(6)
+        ]
+        foreign_room = models.Room(
+            hotel_id=other_hotel.id,
+            room_number="201",
+            floor=2,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        db_session.add_all(rooms + [foreign_room])
+        db_session.commit()
+
+        published = {"events": [], "notifications": [], "stats": []}
+
+        async def publish(self, batch_data):
+            published["events"].append(batch_data)
+
+        async def notify(self, user_email, user_name, batch_data):
+            published["notifications"].append((user_email, batch_data))
+
+        async def track(self, hotel_id, room_ids):
+            published["stats"].append((hotel_id, room_ids))
+
+        monkeypatch.setattr(BookingEventService, "publish_booking_batch_created", publish)
+        monkeypatch.setattr(NotificationService, "send_group_booking_confirmation", notify)
+        monkeypatch.setattr(CacheService, "track_group_booking_stats", track)
+
+        app.dependency_overrides[require_user_or_admin] = lambda: operator
+        yield {
+            "hotel_id": hotel.id,
+            "user_id": operator.id,
+            "room_ids": [room.id for room in rooms],
+            "foreign_room_id": foreign_room.id,
+            "published": published,
+        }
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def payload(self, group, room_ids, guests: int = 2):
+        return {
+            "user_id": group["user_id"],
+            "hotel_id": group["hotel_id"],
+            "check_in_date": CHECK_IN.isoformat(),
+            "check_out_date": CHECK_OUT.isoformat(),
+            "rooms": [{"room_id": room_id, "number_of_guests": guests} for room_id in room_ids],
+            "special_requests": "Группа 40 человек"
+        }
+
+    def count(self, db_session, model, *conditions):
+        db_session.expire_all()
+        return db_session.execute(select(func.count()).select_from(model).where(*conditions)).scalar_one()
+
+    def test_books_all_rooms_with_one_event(self, client, db_session, group, query_budget):
+        room_ids = group["room_ids"][:5]
+        response = client.post("/api/v1/bookings/batch", json=self.payload(group, room_ids))
+        assert response.status_code == 200, response.text
+
+        body = response.json()
+        assert sorted(booking["room_id"] for booking in body["bookings"]) == room_ids
+        assert all(booking["status"] == BookingStatus.CONFIRMED.value for booking in body["bookings"])
+        # Три ночи по цене каждой комнаты
+        assert body["total_price"] == sum(3 * (100.0 + index) for index in range(5))
+
+        # Проверки и блокировка - без запроса на комнату. Повторяется только
+        # INSERT бронирований: SQLite возвращает id строкой на каждую вставку.
+        # Еще два - агрегаты отеля и комнат, одним upsert на таблицу
+        query_budget(response, statements=10 + len(room_ids), duplicates=len(room_ids) - 1)
+
+        assert self.count(db_session, models.Booking) == 5
+        assert self.count(db_session, models.RoomNight) == 15
+        assert self.count(db_session, models.Room, models.Room.status == RoomStatus.OCCUPIED) == 5
+
+        events = group["published"]["events"]
+        assert len(events) == 1
+        assert sorted(events[0]["booking_ids"]) == sorted(booking["id"] for booking in body["bookings"])
+        assert events[0]["room_ids"] == room_ids
+        notifications = group["published"]["notifications"]
+        assert len(notifications) == 1
+        assert notifications[0][0] == "operator@example.com"
+        assert notifications[0][1]["room_numbers"] == ["101", "102", "103", "104", "105"]
+        assert group["published"]["stats"] == [(group["hotel_id"], room_ids)]
+
+    def test_one_busy_room_rejects_whole_batch(self, client, db_session, group):
+        busy_room = group["room_ids"][2]
+        db_session.add(models.Booking(
+            user_id=group["user_id"],
+            hotel_id=group["hotel_id"],
+            room_id=busy_room,
+            check_in_date=CHECK_IN + timedelta(days=1),
+            check_out_date=CHECK_OUT + timedelta(days=1),
+            number_of_guests=1,
+            total_price=200.0,
+            status=BookingStatus.CONFIRMED
+        ))
+        db_session.commit()
+
+        response = client.post("/api/v1/bookings/batch", json=self.payload(group, group["room_ids"]))
+        assert response.status_code == 400
+        assert "103" in response.json()["detail"]
+
+        assert self.count(db_session, models.Booking) == 1
+        assert self.count(db_session, models.Room, models.Room.status == RoomStatus.OCCUPIED) == 0
+        assert group["published"]["events"] == []
+        assert group["published"]["notifications"] == []
+
+    @pytest.mark.parametrize("case, status", [
+        ("missing", 404),
+        ("foreign", 400),
+        ("capacity", 400),
+        ("duplicate", 422),
+    ])
+    def test_invalid_batch_creates_nothing(self, client, db_session, group, case, status):
+        room_ids = group["room_ids"][:2]
+        guests = 2
+        if case == "missing":
+            room_ids = room_ids + [10_000]
+        elif case == "foreign":
+            room_ids = room_ids + [group["foreign_room_id"]]
+        elif case == "capacity":
+            guests = 3
+        elif case == "duplicate":
+            room_ids = room_ids + room_ids[:1]
+
+        response = client.post("/api/v1/bookings/batch", json=self.payload(group, room_ids, guests))
+        assert response.status_code == status, response.text
+        assert self.count(db_session, models.Booking) == 0
+        assert self.count(db_session, models.Room, models.Room.status == RoomStatus.OCCUPIED) == 0
@@ -0,0 +1,121 @@
+# tests/test_booking_concurrency.py
+import asyncio
+import pytest
+import httpx
+from datetime import datetime, timedelta
+from sqlalchemy.exc import OperationalError
+
+import app.models.hotels as models
+from app.main import app
+from app.core.dependencies import require_user_or_admin
+from app.core.enums import RoomStatus, BookingStatus, UserRole
+from app.services.availability_service import AvailabilityService
+
+PARALLEL_BOOKINGS = 200
+
+class TestConcurrentBookings:
+    @pytest.fixture
+    def room(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="123 Main St", city="Moscow", country="Russia")
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add_all([hotel, admin])
+        db_session.flush()
+
+        room = models.Room(
+            hotel_id=hotel.id,
+            room_number="101",
+            floor=1,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        db_session.add(room)
+        db_session.commit()
+
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {"hotel_id": hotel.id, "room_id": room.id, "user_id": admin.id}
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def test_parallel_bookings_single_winner(self, db_session, run, room):
+        check_in = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time())
+        payload = {
+            "user_id": room["user_id"],
+            "hotel_id": room["hotel_id"],
+            "room_id": room["room_id"],
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "number_of_guests": 1
+        }
+
+        async def fire():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(
+                    client.post("/api/v1/bookings/", json=payload) for _ in range(PARALLEL_BOOKINGS)
+                ))
+
+        responses = run(fire())
+        statuses = [response.status_code for response in responses]
+
+        # Проигравшие получают 400 (даты заняты) или 409 (не дождались блокировки)
+        assert statuses.count(200) == 1
+        assert statuses.count(400) + statuses.count(409) == PARALLEL_BOOKINGS - 1
+
+        db_session.expire_all()
+        bookings = db_session.query(models.Booking).filter(
+            models.Booking.room_id == room["room_id"],
+            models.Booking.status == BookingStatus.CONFIRMED
+        ).all()
+        assert len(bookings) == 1
+
+    def payload(self, room, start_day: int, nights: int = 2):
+        check_in = datetime.combine(datetime.now().date() + timedelta(days=start_day), datetime.min.time())
+        return {
+            "user_id": room["user_id"],
+            "hotel_id": room["hotel_id"],
+            "room_id": room["room_id"],
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=nights)).isoformat(),
+            "number_of_guests": 1
+        }
+
+    def test_update_dates_checks_overlap(self, client, db_session, room):
+        first = client.post("/api/v1/bookings/", json=self.payload(room, 30)).json()
+        # Бронь комнаты переводит ее в OCCUPIED - возвращаем, чтобы создать вторую
+        db_session.query(models.Room).update({models.Room.status: RoomStatus.AVAILABLE})
+        db_session.commit()
+        second = client.post("/api/v1/bookings/", json=self.payload(room, 40))
+        assert second.status_code == 200
+
+        overlapping = self.payload(room, 31)
+        response = client.put(f"/api/v1/bookings/{second.json()['id']}", json={
+            "check_in_date": overlapping["check_in_date"],
+            "check_out_date": overlapping["check_out_date"]
+        })
+        assert response.status_code == 400
+
+        # Сдвиг внутри собственного интервала с самим собой не пересекается
+        shifted = self.payload(room, 31, nights=3)
+        response = client.put(f"/api/v1/bookings/{first['id']}", json={
+            "check_in_date": shifted["check_in_date"],
+            "check_out_date": shifted["check_out_date"]
+        })
+        assert response.status_code == 200
+        assert response.json()["total_price"] == 300.0
+
+    def test_lock_timeout_returns_conflict(self, client, room, monkeypatch):
+        async def locked(self, room_id):
+            raise OperationalError("UPDATE rooms", {}, Exception("database is locked"))
+
+        monkeypatch.setattr(AvailabilityService, "lock_room", locked)
+        response = client.post("/api/v1/bookings/", json=self.payload(room, 30))
+
+        assert response.status_code == 409
+        assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,218 @@
+# tests/test_booking_stats.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+
+import app.models.hotels as models
+from app.main import app
+from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.enums import BookingStatus, RoomStatus, UserRole
+from app.services.booking_archive import archive_bookings
+from app.services.booking_stats import check_booking_stats, rebuild_booking_stats
+from app.services.cache_service import CacheService
+
+CHECK_IN = datetime.combine(datetime.now().date() + timedelta(days=30), datetime.min.time()) + timedelta(hours=14)
+
+class TestBookingStats:
+    @pytest.fixture
+    def hotel(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add_all([hotel, admin])
+        db_session.flush()
+
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=number,
+                floor=1,
+                room_type="Standard",
+                price_per_night=price,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for number, price in (("101", 100.0), ("102", 150.0))
+        ]
+        db_session.add_all(rooms)
+        db_session.commit()
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {"hotel_id": hotel.id, "user_id": admin.id, "room_ids": [room.id for room in rooms]}
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def booking(self, hotel, room_index: int, days_from_now: int, nights: int, status: BookingStatus, price: float):
+        check_in = CHECK_IN + timedelta(days=days_from_now - 30)
+        return models.Booking(
+            user_id=hotel["user_id"],
+            hotel_id=hotel["hotel_id"],
+            room_id=hotel["room_ids"][room_index],
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=nights),
+            number_of_guests=1,
+            total_price=price,
+            status=status
+        )
+
+    def stats(self, client, path):
+        response = client.get(path)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    def test_booking_lifecycle_updates_stats(self, client, db_session, hotel):
+        bookings = []
+        for room_id in hotel["room_ids"]:
+            response = client.post("/api/v1/bookings/", json={
+                "user_id": hotel["user_id"],
+                "hotel_id": hotel["hotel_id"],
+                "room_id": room_id,
+                "check_in_date": CHECK_IN.isoformat(),
+                "check_out_date": (CHECK_IN + timedelta(days=2)).isoformat(),
+                "number_of_guests": 1
+            })
+            assert response.status_code == 200, response.text
+            bookings.append(response.json())
+
+        stats = self.stats(client, f"/api/v1/hotels/{hotel['hotel_id']}/stats")
+        assert stats["bookings_count"] == 2
+        assert stats["active_bookings"] == 2
+        assert stats["revenue"] == 500.0
+        assert stats["nights_sold"] == 4
+        assert stats["average_booking_value"] == 250.0
+        assert stats["updated_at"] is not None
+
+        assert client.put(f"/api/v1/bookings/{bookings[0]['id']}/cancel").status_code == 200
+        assert client.put(f"/api/v1/bookings/{bookings[1]['id']}/check-in").status_code == 200
+        assert client.put(f"/api/v1/bookings/{bookings[1]['id']}/check-out").status_code == 200
+
+        stats = self.stats(client, f"/api/v1/hotels/{hotel['hotel_id']}/stats")
+        assert stats["bookings_count"] == 2
+        assert stats["active_bookings"] == 0
+        assert stats["completed_bookings"] == 1
+        assert stats["cancelled_bookings"] == 1
+        assert stats["revenue"] == 300.0
+        assert stats["nights_sold"] == 2
+
+        cancelled_room = self.stats(client, f"/api/v1/rooms/{hotel['room_ids'][0]}/stats")
+        assert cancelled_room["hotel_id"] == hotel["hotel_id"]
+        assert cancelled_room["cancelled_bookings"] == 1
+        assert cancelled_room["revenue"] == 0.0
+        assert cancelled_room["average_booking_value"] == 0.0
+        completed_room = self.stats(client, f"/api/v1/rooms/{hotel['room_ids'][1]}/stats")
+        assert completed_room["completed_bookings"] == 1
+        assert completed_room["revenue"] == 300.0
+
+        assert check_booking_stats(db_session.connection())["hotels_mismatched"] == 0
+
+    def test_orm_changes_and_deletes_adjust_stats(self, db_session, hotel):
+        first = self.booking(hotel, 0, 30, 2, BookingStatus.CONFIRMED, 200.0)
+        second = self.booking(hotel, 1, 40, 3, BookingStatus.CONFIRMED, 450.0)
+        db_session.add_all([first, second])
+        db_session.commit()
+
+        # Бронирование переехало в другую комнату на другие даты, второе удалено
+        first.room_id = hotel["room_ids"][1]
+        first.check_out_date = first.check_out_date + timedelta(days=2)
+        first.total_price = 600.0
+        db_session.delete(second)
+        db_session.commit()
+
+        hotel_stats = db_session.get(models.HotelStats, hotel["hotel_id"])
+        db_session.refresh(hotel_stats)
+        assert (hotel_stats.bookings_count, hotel_stats.revenue, hotel_stats.nights_sold) == (1, 600.0, 4)
+        rooms = {row.room_id: row for row in db_session.execute(select(models.RoomStats)).scalars()}
+        # Строка комнаты без бронирований может остаться с нулями или исчезнуть при пересчете
+        assert getattr(rooms.get(hotel["room_ids"][0]), "bookings_count", 0) == 0
+        assert rooms[hotel["room_ids"][1]].bookings_count == 1
+        assert rooms[hotel["room_ids"][1]].nights_sold == 4
+
+        assert check_booking_stats(db_session.connection()) == {
+            "hotels": 1, "hotels_mismatched": 0, "rooms": 1, "rooms_mismatched": 0
+        }
+
+    def test_unknown_previous_value_recomputes_hotel(self, db_session, hotel):
+        booking = self.booking(hotel, 0, 30, 2, BookingStatus.CONFIRMED, 200.0)
+        db_session.add(booking)
+        db_session.commit()
+
+        # Статус перезаписан без загрузки: разницу не посчитать, отель пересчитывается
+        db_session.expire(booking, ["status"])
+        booking.status = BookingStatus.CANCELLED
+        db_session.commit()
+
+        hotel_stats = db_session.get(models.HotelStats, hotel["hotel_id"])
+        db_session.refresh(hotel_stats)
+        assert hotel_stats.cancelled_bookings == 1
+        assert hotel_stats.active_bookings == 0
+        assert hotel_stats.revenue == 0.0
+        assert check_booking_stats(db_session.connection())["rooms_mismatched"] == 0
+
+    def test_room_removal_recomputes_hotel(self, client, db_session, hotel, monkeypatch):
+        async def skip(self, hotel_id, booking_ids=(), user_ids=()):
+            pass
+
+        monkeypatch.setattr(CacheService, "invalidate_removed_inventory", skip)
+        db_session.add_all([
+            self.booking(hotel, 0, 30, 2, BookingStatus.CONFIRMED, 200.0),
+            self.booking(hotel, 1, 30, 2, BookingStatus.CONFIRMED, 300.0),
+        ])
+        db_session.commit()
+
+        response = client.delete(f"/api/v1/rooms/{hotel['room_ids'][0]}")
+        assert response.status_code == 200, response.text
+
+        # Массовая отмена прошла мимо сессии, агрегаты отеля пересчитаны
+        stats = self.stats(client, f"/api/v1/hotels/{hotel['hotel_id']}/stats")
+        assert stats["bookings_count"] == 2
+        assert stats["cancelled_bookings"] == 1
+        assert stats["revenue"] == 300.0
+        assert client.get(f"/api/v1/rooms/{hotel['room_ids'][0]}/stats").status_code == 404
+
+        response = client.delete(f"/api/v1/hotels/{hotel['hotel_id']}")
+        assert response.status_code == 200, response.text
+        db_session.expire_all()
+        assert db_session.execute(select(models.HotelStats)).all() == []
+        assert db_session.execute(select(models.RoomStats)).all() == []
+
+    def test_rebuild_matches_incremental_and_keeps_archive(self, test_db, db_session, hotel):
+        db_session.add_all([
+            self.booking(hotel, 0, -500, 3, BookingStatus.COMPLETED, 300.0),
+            self.booking(hotel, 1, -400, 1, BookingStatus.CANCELLED, 150.0),
+            self.booking(hotel, 0, 10, 2, BookingStatus.CONFIRMED, 200.0),
+        ])
+        db_session.commit()
+
+        def snapshot():
+            db_session.expire_all()
+            return [
+                tuple(getattr(row, column) for column in ("hotel_id", "bookings_count", "revenue", "nights_sold"))
+                for row in db_session.execute(select(models.HotelStats)).scalars()
+            ] + [
+                tuple(getattr(row, column) for column in ("room_id", "bookings_count", "revenue", "nights_sold"))
+                for row in db_session.execute(select(models.RoomStats).order_by(models.RoomStats.room_id)).scalars()
+            ]
+
+        incremental = snapshot()
+        assert incremental[0] == (hotel["hotel_id"], 3, 500.0, 5)
+
+        # Архив убирает старые бронирования из bookings, но не из истории отеля
+        assert archive_bookings(test_db.engine, retention_days=365)["archived_bookings"] == 2
+        assert snapshot() == incremental
+
+        with test_db.engine.begin() as connection:
+            connection.execute(update(models.HotelStats).values(revenue=0.0))
+            assert check_booking_stats(connection)["hotels_mismatched"] == 1
+            rebuild_booking_stats(connection)
+            assert check_booking_stats(connection)["hotels_mismatched"] == 0
+        assert snapshot() == incremental
+
+    def test_stats_of_missing_hotel(self, client, hotel):
+        assert client.get("/api/v1/hotels/10000/stats").status_code == 404
+        assert client.get("/api/v1/rooms/10000/stats").status_code == 404
@@ -0,0 +1,140 @@
+# tests/test_bulk_import.py
+import json
+import pytest
+from sqlalchemy import func, select
+
+import app.models.hotels as models
+from app.main import app
+from app.config import settings
+from app.core.dependencies import require_admin, require_admin_jwt
+from app.core.enums import RoomStatus, UserRole
+from app.core.security import verify_password
+from app.services.cache_service import CacheService
+
+def ndjson(rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n"
+
+class TestBulkImport:
+    @pytest.fixture
+    def admin(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add(admin)
+        db_session.commit()
+
+        invalidated = []
+
+        async def capture(self, hotel_ids=()):
+            invalidated.append(sorted(hotel_ids))
+
+        monkeypatch.setattr(CacheService, "invalidate_imported", capture)
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_admin_jwt] = lambda: admin
+        yield invalidated
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_admin_jwt, None)
+
+    @pytest.fixture
+    def hotel_id(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        db_session.add(hotel)
+        db_session.flush()
+        db_session.add(models.Room(
+            hotel_id=hotel.id,
+            room_number="101",
+            floor=1,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        ))
+        db_session.commit()
+        return hotel.id
+
+    def count(self, db_session, model, *conditions):
+        db_session.expire_all()
+        return db_session.execute(select(func.count()).select_from(model).where(*conditions)).scalar_one()
+
+    def test_import_hotels_ndjson(self, client, db_session, admin):
+        body = ndjson([
+            {"name": "Hotel A", "address": "A St", "city": "Kazan", "country": "Russia", "rating": 4.5},
+            {"name": "Hotel B", "address": "B St", "city": "Sochi", "country": "Russia"},
+            "{not json",
+            {"name": "Hotel C", "address": "C St", "city": "Kazan"},
+            {"name": "Hotel D", "address": "D St", "city": "Tver", "country": "Russia"},
+        ])
+        response = client.post(
+            "/api/v1/hotels/import",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == 200, response.text
+
+        result = response.json()
+        assert result["inserted"] == 3
+        assert result["rejected"] == 2
+        assert [error["line"] for error in result["errors"]] == [3, 4]
+        assert "country" in result["errors"][1]["error"]
+        assert self.count(db_session, models.Hotel) == 3
+        # Пачки по две строки: инвалидация на каждую вставленную пачку
+        assert admin == [[], []]
+
+        # Вставка в обход ORM все равно попадает в индекс поиска
+        assert self.count(db_session, models.SearchTrigram, models.SearchTrigram.value == "Kazan") > 0
+
+    def test_import_rooms_csv_rejects_conflicts(self, client, db_session, admin, hotel_id):
+        body = "\n".join([
+            "hotel_id,room_number,floor,room_type,price_per_night,capacity,status,description",
+            f"{hotel_id},101,1,Standard,100,2,available,",
+            f"{hotel_id},102,1,Deluxe,150,2,available,Sea view",
+            f"{hotel_id},102,1,Deluxe,150,2,available,",
+            f"{hotel_id + 100},201,2,Standard,100,2,available,",
+            f"{hotel_id},103,1,Suite,300,4,available,",
+            f"{hotel_id},104,1,Standard,abc,2,available,",
+        ])
+        response = client.post(
+            "/api/v1/rooms/import",
+            content=body,
+            headers={"Content-Type": "text/csv"}
+        )
+        assert response.status_code == 200, response.text
+
+        result = response.json()
+        assert result["inserted"] == 2
+        assert result["rejected"] == 4
+        assert [error["line"] for error in result["errors"]] == [2, 4, 5, 7]
+
+        rooms = dict(db_session.execute(
+            select(models.Room.room_number, models.Room.description).where(models.Room.hotel_id == hotel_id)
+        ).tuples().all())
+        assert rooms == {"101": None, "102": "Sea view", "103": None}
+        assert admin == [[hotel_id], [hotel_id]]
+
+    def test_import_users(self, client, db_session, admin):
+        existing_hash = "$2b$12$" + "a" * 53
+        body = ndjson([
+            {"email": "one@example.com", "first_name": "One", "last_name": "User", "password": "secret1"},
+            {"email": "two@example.com", "first_name": "Two", "last_name": "User", "hashed_password": existing_hash},
+            {"email": "admin@example.com", "first_name": "Dup", "last_name": "User", "password": "secret1"},
+            {"email": "three@example.com", "first_name": "Three", "last_name": "User"},
+        ])
+        response = client.post("/api/v1/users/import", content=body, params={"format": "ndjson"})
+        assert response.status_code == 200, response.text
+
+        result = response.json()
+        assert result["inserted"] == 2
+        assert [error["line"] for error in result["errors"]] == [4, 3]
+
+        db_session.expire_all()
+        users = {user.email: user for user in db_session.execute(select(models.User)).scalars()}
+        assert verify_password("secret1", users["one@example.com"].hashed_password)
+        assert users["two@example.com"].hashed_password == existing_hash
+        assert users["two@example.com"].role == UserRole.USER
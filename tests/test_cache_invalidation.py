@@ -0,0 +1,83 @@
+# tests/test_cache_invalidation.py
+from app.core.redis import tag_key
+from app.services.cache_service import (
+    CacheService,
+    HOTELS_LIST_TAG,
+    ROOMS_LIST_TAG,
+    AVAILABILITY_TAG,
+    hotel_tag,
+    availability_tag,
+)
+from app.services.local_cache import local_cache
+
+class TestTagInvalidation:
+    def setup_method(self):
+        local_cache.clear()
+
+    def service(self, manager):
+        service = CacheService()
+        service.redis_manager = manager
+        return service
+
+    def seed(self, run, service):
+        """Отель 1 и 2, их выборки комнат, общий список отелей и комнат"""
+        run(service.cache_hotel(1, {"id": 1}))
+        run(service.cache_hotel(2, {"id": 2}))
+        for hotel_id in (1, 2):
+            for day in (1, 2, 3):
+                run(service.cache_available_rooms(
+                    {"hotel_id": hotel_id, "check_in_date": f"2030-01-0{day}"},
+                    [{"id": day}]
+                ))
+        run(service.cache_available_rooms({"cache_key": "hotels:all"}, [{"id": 1}], tags=[HOTELS_LIST_TAG]))
+        run(service.cache_available_rooms({"cache_key": "rooms:all"}, [{"id": 1}], tags=[ROOMS_LIST_TAG, AVAILABILITY_TAG]))
+
+    def keys(self, run, manager, pattern="*"):
+        return set(run(manager.redis.keys(pattern)))
+
+    def test_booking_drops_only_availability(self, run, fake_redis):
+        service = self.service(fake_redis)
+        self.seed(run, service)
+
+        run(service.invalidate_booking_related(booking_id=5, user_id=7, hotel_id=1))
+
+        assert self.keys(run, fake_redis, "rooms_search:*hotel_id:1") == set()
+        assert len(self.keys(run, fake_redis, "rooms_search:*hotel_id:2")) == 3
+        assert "rooms_search:cache_key:rooms:all" not in self.keys(run, fake_redis)
+        # Данные отеля и список отелей от бронирований не зависят
+        assert {"hotel:1", "hotel:2", "rooms_search:cache_key:hotels:all"} <= self.keys(run, fake_redis)
+        assert self.keys(run, fake_redis, "tag:availability*") == {tag_key(availability_tag(2))}
+
+    def test_hotel_edit_drops_hotel_scope(self, run, fake_redis):
+        service = self.service(fake_redis)
+        self.seed(run, service)
+
+        run(service.invalidate_hotel_cache(1))
+
+        remaining = self.keys(run, fake_redis)
+        assert "hotel:1" not in remaining
+        assert "rooms_search:cache_key:hotels:all" not in remaining
+        assert "rooms_search:cache_key:rooms:all" not in remaining
+        assert self.keys(run, fake_redis, "rooms_search:*hotel_id:1") == set()
+        assert "hotel:2" in remaining
+        assert len(self.keys(run, fake_redis, "rooms_search:*hotel_id:2")) == 3
+        # Теги очищены от удаленных ключей: пустые множества Redis удаляет сам
+        assert tag_key(hotel_tag(1)) not in remaining
+        assert tag_key(HOTELS_LIST_TAG) not in remaining
+        assert tag_key(hotel_tag(2)) in remaining
+
+    def test_invalidate_tags_returns_deleted_count(self, run, fake_redis):
+        service = self.service(fake_redis)
+        self.seed(run, service)
+
+        deleted = run(fake_redis.invalidate_tags([hotel_tag(2)], keys=["hotel:2"]))
+
+        assert deleted == 4
+
+    def test_delete_pattern_scans_in_batches(self, run, fake_redis):
+        for index in range(25):
+            run(fake_redis.redis.set(f"rooms_search:{index}", "[]"))
+        run(fake_redis.redis.set("hotel:1", "{}"))
+
+        assert run(fake_redis.delete_pattern("rooms_search:*", batch_size=10)) == 25
+        assert self.keys(run, fake_redis) == {"hotel:1"}
@@ -0,0 +1,96 @@
+# tests/test_dataset_generator.py
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+import app.models.hotels as models
+from app.core.enums import ACTIVE_BOOKING_STATUSES, BookingStatus
+from app.services.dataset_generator import DatasetGenerator, clear_dataset
+from app.services.room_nights import check_room_nights
+
+NOW = datetime(2030, 6, 1, 10)
+
+class TestDatasetGenerator:
+    def generate(self, connection, **options):
+        options = {
+            "hotels": 4, "rooms_per_hotel": 5, "bookings": 300, "users": 30,
+            "seed": 7, "now": NOW, "future_days": 20, **options
+        }
+        return DatasetGenerator(**options).generate(connection)
+
+    def bookings(self, connection):
+        table = models.Booking.__table__
+        return connection.execute(
+            select(
+                table.c.user_id, table.c.room_id, table.c.check_in_date,
+                table.c.check_out_date, table.c.status, table.c.booking_reference
+            ).order_by(table.c.id)
+        ).all()
+
+    def test_generates_consistent_dataset(self, test_db):
+        with test_db.engine.connect() as connection:
+            result = self.generate(connection)
+            assert (result["hotels"], result["rooms"], result["users"], result["bookings"]) == (4, 20, 30, 300)
+
+            bookings = self.bookings(connection)
+            assert len(bookings) == 300
+
+            # Проживания одной комнаты не пересекаются
+            by_room = defaultdict(list)
+            for booking in bookings:
+                by_room[booking.room_id].append((booking.check_in_date, booking.check_out_date))
+            assert len(by_room) == 20
+            for stays in by_room.values():
+                stays.sort()
+                assert all(previous[1] <= current[0] for previous, current in zip(stays, stays[1:]))
+
+            # Статус соответствует датам относительно now
+            for booking in bookings:
+                if booking.check_out_date <= NOW:
+                    assert booking.status in (BookingStatus.COMPLETED, BookingStatus.CANCELLED)
+                elif booking.check_in_date <= NOW:
+                    assert booking.status == BookingStatus.CHECKED_IN
+                else:
+                    assert booking.status in (BookingStatus.CONFIRMED, BookingStatus.CANCELLED)
+            assert {booking.status for booking in bookings} >= {BookingStatus.COMPLETED, BookingStatus.CONFIRMED}
+
+            report = check_room_nights(connection)
+            assert report["expected"] == result["room_nights"] > 0
+            assert report["missing"] == report["extra"] == 0
+
+            # Города попали в индекс поиска, хотя вставка шла в обход ORM
+            cities = set(connection.execute(select(models.Hotel.city)).scalars())
+            indexed = set(connection.execute(
+                select(models.SearchTrigram.value).where(models.SearchTrigram.field == "city")
+            ).scalars())
+            assert cities <= indexed
+
+    def test_same_seed_same_rows(self, test_db):
+        with test_db.engine.connect() as connection:
+            self.generate(connection)
+            first = self.bookings(connection)
+
+            clear_dataset(connection)
+            self.generate(connection)
+            assert self.bookings(connection) == first
+
+            clear_dataset(connection)
+            self.generate(connection, seed=8)
+            assert self.bookings(connection) != first
+
+    def test_appends_after_existing_rows(self, test_db, db_session):
+        hotel = models.Hotel(name="Existing", address="Main St", city="Moscow", country="Russia")
+        db_session.add(hotel)
+        db_session.commit()
+
+        with test_db.engine.connect() as connection:
+            self.generate(connection, hotels=1, bookings=10)
+            hotel_ids = connection.execute(select(models.Hotel.id).order_by(models.Hotel.id)).scalars().all()
+            assert hotel_ids == [hotel.id, hotel.id + 1]
+
+            active = connection.execute(
+                select(func.count()).select_from(models.Booking)
+                .where(models.Booking.status.in_(ACTIVE_BOOKING_STATUSES))
+            ).scalar_one()
+            assert active > 0
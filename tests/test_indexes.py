@@ -0,0 +1,148 @@
+# tests/test_indexes.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, inspect, select
+
+import app.models.hotels as models
+from app.config import settings
+from app.database import Base, get_alembic_config
+from app.core.enums import RoomStatus, BookingStatus
+from app.core.pagination import PageParams, encode_cursor
+from app.services.availability_service import AvailabilityService
+
+def query_plans(db, run, bind=None):
+    """Выполнить run() и вернуть EXPLAIN QUERY PLAN каждого выполненного запроса"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    bind = bind or db.get_bind()
+    event.listen(bind, "before_cursor_execute", capture)
+    try:
+        run()
+    finally:
+        event.remove(bind, "before_cursor_execute", capture)
+
+    connection = db.connection()
+    return [
+        " | ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+        for statement, parameters in statements
+    ]
+
+class TestMigrations:
+    def test_migrations_match_models(self, tmp_path):
+        from alembic import command
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+        config = get_alembic_config()
+        with engine.begin() as connection:
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            migrated = {index["name"] for index in inspector.get_indexes(table.name)}
+            declared = {index.name for index in table.indexes}
+            assert declared <= migrated, f"{table.name}: нет индексов {declared - migrated}"
+        engine.dispose()
+
+class TestQueryPlans:
+    @pytest.fixture
+    def data(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="123 Main St", city="Moscow", country="Russia")
+        db_session.add(hotel)
+        db_session.flush()
+
+        room = models.Room(
+            hotel_id=hotel.id,
+            room_number="101",
+            floor=1,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        user = models.User(email="guest@example.com", first_name="John", last_name="Doe", hashed_password="x")
+        db_session.add_all([room, user])
+        db_session.flush()
+
+        check_in = datetime.now() + timedelta(days=5)
+        db_session.add(models.Booking(
+            user_id=user.id,
+            hotel_id=hotel.id,
+            room_id=room.id,
+            check_in_date=check_in,
+            check_out_date=check_in + timedelta(days=2),
+            number_of_guests=1,
+            total_price=200.0,
+            status=BookingStatus.CONFIRMED
+        ))
+        db_session.commit()
+        return {"hotel_id": hotel.id, "room_id": room.id, "user_id": user.id, "check_in": check_in}
+
+    def test_booking_overlap_uses_index(self, db_session, async_db, run, data):
+        service = AvailabilityService(async_db)
+        plans = query_plans(db_session, lambda: run(service.is_room_free(
+            data["room_id"], data["check_in"], data["check_in"] + timedelta(days=1)
+        )), bind=async_db.bind.sync_engine)
+
+        assert len(plans) == 1
+        assert "INDEX ix_bookings_room_status_dates" in plans[0]
+
+    def test_available_rooms_uses_indexes(self, db_session, async_db, run, data):
+        service = AvailabilityService(async_db)
+        plans = query_plans(db_session, lambda: run(service.get_available_rooms(
+            data["hotel_id"], data["check_in"], data["check_in"] + timedelta(days=1), max_price=500.0
+        )), bind=async_db.bind.sync_engine)
+
+        assert len(plans) == 1
+        assert "ix_rooms_hotel_status_price" in plans[0]
+        # Анти-join по первичному ключу room_nights (room_id, night, booking_id)
+        assert "SEARCH room_nights USING COVERING INDEX sqlite_autoindex_room_nights_1" in plans[0]
+
+    def test_available_rooms_without_inventory_uses_indexes(self, db_session, async_db, run, data, monkeypatch):
+        monkeypatch.setattr(settings, "ROOM_NIGHTS_ENABLED", False)
+        service = AvailabilityService(async_db)
+        plans = query_plans(db_session, lambda: run(service.get_available_rooms(
+            data["hotel_id"], data["check_in"], data["check_in"] + timedelta(days=1), max_price=500.0
+        )), bind=async_db.bind.sync_engine)
+
+        assert len(plans) == 1
+        assert "ix_rooms_hotel_status_price" in plans[0]
+        assert "ix_bookings_room_status_dates" in plans[0]
+
+    def test_room_number_duplicate_check_uses_index(self, db_session, data):
+        plans = query_plans(db_session, lambda: db_session.query(models.Room).filter(
+            models.Room.hotel_id == data["hotel_id"],
+            models.Room.room_number == "101"
+        ).first())
+
+        assert "INDEX ix_rooms_hotel_number" in plans[0]
+
+    def test_user_bookings_uses_index(self, db_session, data):
+        plans = query_plans(db_session, lambda: db_session.query(models.Booking).filter(
+            models.Booking.user_id == data["user_id"]
+        ).all())
+
+        assert "INDEX ix_bookings_user_checkin" in plans[0]
+
+    def test_hotels_filters_use_index(self, db_session, data):
+        city_plans = query_plans(db_session, lambda: db_session.query(models.Hotel).filter(
+            models.Hotel.city == "Moscow"
+        ).all())
+        country_plans = query_plans(db_session, lambda: db_session.query(models.Hotel).filter(
+            models.Hotel.country == "Russia"
+        ).all())
+
+        assert "INDEX ix_hotels_city_country" in city_plans[0]
+        assert "INDEX ix_hotels_country" in country_plans[0]
+
+    def test_keyset_page_uses_index(self, db_session, data):
+        page = PageParams(models.Hotel, "name", "asc", 10, encode_cursor("name", "asc", "Grand Hotel", data["hotel_id"]))
+        page.validate(("id", "name"))
+        plans = query_plans(db_session, lambda: db_session.execute(page.apply(select(models.Hotel))).all())
+
+        assert "INDEX ix_hotels_name_id" in plans[0]
+        assert "TEMP B-TREE" not in plans[0]
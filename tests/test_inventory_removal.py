@@ -0,0 +1,117 @@
+# tests/test_inventory_removal.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+
+import app.models.hotels as models
+from app.main import app
+from app.config import settings
+from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.enums import BookingStatus, RoomStatus, UserRole
+from app.services.cache_service import CacheService
+
+CHECK_IN = datetime(2030, 5, 10, 14)
+
+class TestInventoryRemoval:
+    @pytest.fixture
+    def hotel(self, db_session, monkeypatch):
+        # Пачка из двух строк: удаление проходит в несколько транзакций
+        monkeypatch.setattr(settings, "REMOVAL_BATCH_SIZE", 2)
+
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        guest = models.User(email="guest@example.com", first_name="Guest", last_name="User", hashed_password="x")
+        db_session.add_all([hotel, admin, guest])
+        db_session.flush()
+
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=number,
+                floor=1,
+                room_type="Standard",
+                price_per_night=100.0,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for number in ("101", "102")
+        ]
+        db_session.add_all(rooms)
+        db_session.flush()
+
+        statuses = [BookingStatus.CONFIRMED] * 3 + [BookingStatus.COMPLETED] * 2
+        bookings = [
+            models.Booking(
+                user_id=(admin if index % 2 else guest).id,
+                hotel_id=hotel.id,
+                room_id=rooms[0].id,
+                check_in_date=CHECK_IN + timedelta(days=index * 3),
+                check_out_date=CHECK_IN + timedelta(days=index * 3 + 2),
+                number_of_guests=1,
+                total_price=200.0,
+                status=status
+            )
+            for index, status in enumerate(statuses)
+        ]
+        db_session.add_all(bookings)
+        db_session.commit()
+
+        invalidated = []
+
+        async def capture(self, hotel_id, booking_ids=(), user_ids=()):
+            invalidated.append((hotel_id, sorted(booking_ids), sorted(user_ids)))
+
+        monkeypatch.setattr(CacheService, "invalidate_removed_inventory", capture)
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {
+            "hotel_id": hotel.id,
+            "room_id": rooms[0].id,
+            "booking_ids": [booking.id for booking in bookings],
+            "user_ids": sorted([admin.id, guest.id]),
+            "invalidated": invalidated,
+        }
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def count(self, db_session, model, *conditions):
+        db_session.expire_all()
+        return db_session.execute(select(func.count()).select_from(model).where(*conditions)).scalar_one()
+
+    def test_delete_room_cancels_and_detaches_bookings(self, client, db_session, hotel):
+        response = client.delete(f"/api/v1/rooms/{hotel['room_id']}")
+        assert response.status_code == 200, response.text
+
+        details = response.json()["details"]
+        assert details["cancelled_active_bookings"] == 3
+        assert details["preserved_completed_bookings"] == 2
+        assert sorted(details["cancelled_booking_ids"]) == hotel["booking_ids"][:3]
+
+        assert self.count(db_session, models.Room, models.Room.id == hotel["room_id"]) == 0
+        assert self.count(db_session, models.Booking, models.Booking.room_id.isnot(None)) == 0
+        assert self.count(db_session, models.Booking, models.Booking.status == BookingStatus.CANCELLED) == 3
+        assert self.count(db_session, models.RoomNight) == 0
+
+        assert hotel["invalidated"] == [(hotel["hotel_id"], hotel["booking_ids"], hotel["user_ids"])]
+
+    def test_delete_hotel_deletes_bookings_in_batches(self, client, db_session, hotel):
+        response = client.delete(f"/api/v1/hotels/{hotel['hotel_id']}")
+        assert response.status_code == 200, response.text
+
+        body = response.json()
+        assert body["bookings_deleted"] == 5
+        assert body["rooms_deleted"] == 2
+
+        assert self.count(db_session, models.Booking) == 0
+        assert self.count(db_session, models.Room) == 0
+        assert self.count(db_session, models.Hotel) == 0
+        assert self.count(db_session, models.RoomNight) == 0
+
+        assert hotel["invalidated"] == [(hotel["hotel_id"], hotel["booking_ids"], hotel["user_ids"])]
@@ -0,0 +1,102 @@
+# tests/test_local_cache.py
+import asyncio
+import json
+
+import pytest
+
+import app.services.cache_service as cache_module
+from app.core.redis import RedisManager
+from app.services.cache_service import CacheService, WORKER_ID, apply_invalidation_message, hotel_tag
+from app.services.local_cache import LocalCache, local_cache
+
+class TestLocalCache:
+    def test_lru_eviction(self):
+        cache = LocalCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == (True, 1)
+
+        # "b" использовался давнее всех и вытесняется
+        cache.set("c", 3)
+        assert cache.get("b") == (False, None)
+        assert cache.get("a") == (True, 1)
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self):
+        cache = LocalCache(max_entries=10, ttl=60)
+        cache.set("a", 1, ttl=-1)
+
+        assert cache.get("a") == (False, None)
+        assert len(cache) == 0
+
+    def test_tag_invalidation(self):
+        cache = LocalCache(max_entries=10, ttl=60)
+        cache.set("hotel:1", {"id": 1}, tags=["hotel:1"])
+        cache.set("rooms:1", [], tags=["hotel:1", "rooms"])
+        cache.set("rooms:2", [], tags=["hotel:2"])
+
+        assert cache.invalidate(tags=["hotel:1"]) == 2
+        assert cache.get("rooms:1") == (False, None)
+        assert cache.get("rooms:2") == (True, [])
+
+    def test_hit_miss_counters(self):
+        cache = LocalCache(max_entries=10, ttl=60)
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+
+        info = cache.info()
+        assert (info["hits"], info["misses"], info["size"]) == (2, 1, 1)
+
+class TestTwoTierCache:
+    def setup_method(self):
+        local_cache.clear()
+
+    def service(self):
+        # Без подключения к Redis работает только локальный уровень
+        service = CacheService()
+        service.redis_manager = RedisManager()
+        return service
+
+    def test_hotel_served_from_local_tier(self, run):
+        service = self.service()
+        run(service.cache_hotel(1, {"id": 1, "name": "Grand Hotel"}))
+
+        assert run(service.get_cached_hotel(1)) == {"id": 1, "name": "Grand Hotel"}
+        assert service.get_tier_stats()["local"]["hits"] == 1
+
+        run(service.invalidate_hotel_cache(1))
+        assert run(service.get_cached_hotel(1)) is None
+
+    def test_invalidation_message_from_other_worker(self, run):
+        service = self.service()
+        run(service.cache_available_rooms({"cache_key": "rooms:1"}, [{"id": 1}], tags=[hotel_tag(1)], local=True))
+
+        own = json.dumps({"origin": WORKER_ID, "keys": [], "tags": [hotel_tag(1)]})
+        assert apply_invalidation_message(own) == 0
+
+        other = json.dumps({"origin": "other-worker", "keys": [], "tags": [hotel_tag(1)]})
+        assert apply_invalidation_message(other) == 1
+        assert run(service.get_cached_rooms({"cache_key": "rooms:1"}, local=True)) is None
+
+    def test_listener_backs_off_while_disconnected(self, run, monkeypatch):
+        manager = RedisManager()
+        delays = []
+
+        async def no_redis():
+            return manager
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+            if len(delays) == 5:
+                raise asyncio.CancelledError
+
+        monkeypatch.setattr(cache_module, "get_redis_manager", no_redis)
+        monkeypatch.setattr(cache_module.asyncio, "sleep", fake_sleep)
+
+        with pytest.raises(asyncio.CancelledError):
+            run(cache_module.listen_for_invalidations(reconnect_delay=1.0, max_reconnect_delay=4.0))
+
+        assert delays == [1.0, 2.0, 4.0, 4.0, 4.0]
+        assert manager.connected is False
@@ -0,0 +1,165 @@
+# tests/test_occupancy_matrix.py
+import pytest
+from datetime import date, datetime, timedelta
+
+import app.models.hotels as models
+from app.main import app
+from app.config import settings
+from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.enums import BookingStatus, RoomStatus, UserRole
+from app.services.availability_service import AvailabilityService
+from app.services.occupancy_matrix import OccupancyMatrix, occupancy_matrix
+
+np = pytest.importorskip("numpy")
+
+TODAY = date.today()
+START = datetime.combine(TODAY + timedelta(days=10), datetime.min.time())
+
+def night(offset: int) -> datetime:
+    return START + timedelta(days=offset)
+
+class TestOccupancyMatrix:
+    @pytest.fixture
+    def matrix(self, db_session):
+        matrix = OccupancyMatrix()
+        matrix.rebuild(db_session, days=60)
+        return matrix
+
+    def test_free_rooms(self, matrix):
+        matrix.apply_changes([
+            (1, 10, night(0), night(3), True),
+            (2, 20, night(5), night(7), True),
+        ])
+
+        assert matrix.free_rooms([10, 20, 30], night(1), night(2)) == [20, 30]
+        # Выезд в день заезда не пересекается
+        assert matrix.free_rooms([10, 20], night(3), night(5)) == [10, 20]
+        assert matrix.free_rooms([10, 20], night(2), night(6)) == []
+
+    def test_overlapping_bookings_are_counted(self, matrix):
+        matrix.apply_changes([
+            (1, 10, night(0), night(5), True),
+            (2, 10, night(2), night(3), True),
+        ])
+        matrix.apply_changes([(2, 10, night(2), night(3), False)])
+
+        assert matrix.free_rooms([10], night(2), night(3)) == []
+
+    def test_move_cancel_and_remove_rooms(self, matrix):
+        matrix.apply_changes([(1, 10, night(0), night(2), True), (2, 20, night(0), night(2), True)])
+        matrix.apply_changes([(1, 10, night(10), night(12), True)])
+        assert matrix.free_rooms([10], night(0), night(2)) == [10]
+        assert matrix.free_rooms([10], night(10), night(12)) == []
+
+        matrix.apply_changes([(1, None, None, None, False)])
+        assert matrix.free_rooms([10], night(10), night(12)) == [10]
+
+        matrix.remove_rooms([20])
+        assert matrix.free_rooms([20], night(0), night(2)) == [20]
+        assert matrix.info()["bookings"] == 0
+
+    def test_outside_horizon(self, matrix):
+        assert not matrix.covers(night(55), night(70))
+        assert matrix.free_rooms([10], night(55), night(70)) is None
+        assert matrix.free_rooms([10], START - timedelta(days=20), night(1)) is None
+
+    def test_rolling_horizon(self, matrix):
+        matrix.apply_changes([
+            (1, 10, night(0), night(2), True),
+            # За горизонтом: попадает в матрицу, когда горизонт до него дойдет
+            (2, 10, night(55), night(58), True),
+        ])
+
+        matrix._roll_locked(TODAY + timedelta(days=10))
+        assert matrix.origin == TODAY + timedelta(days=10)
+        assert matrix._matrix[matrix._rows[10], 0:2].tolist() == [1, 1]
+        assert matrix._matrix[matrix._rows[10], 55:58].tolist() == [1, 1, 1]
+
+class TestMatrixFromBookingEvents:
+    @pytest.fixture
+    def hotel(self, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "OCCUPANCY_MATRIX_ENABLED", True)
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add_all([hotel, admin])
+        db_session.flush()
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=str(100 + index),
+                floor=1,
+                room_type="Standard",
+                price_per_night=100.0,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for index in range(3)
+        ]
+        db_session.add_all(rooms)
+        db_session.flush()
+        db_session.add(models.Booking(
+            user_id=admin.id,
+            hotel_id=hotel.id,
+            room_id=rooms[0].id,
+            check_in_date=night(0),
+            check_out_date=night(2),
+            number_of_guests=1,
+            total_price=200.0,
+            status=BookingStatus.CONFIRMED
+        ))
+        db_session.commit()
+        occupancy_matrix.rebuild(db_session)
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {"hotel_id": hotel.id, "room_ids": [room.id for room in rooms], "user_id": admin.id}
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def free(self, hotel, offset=0, length=2):
+        return occupancy_matrix.free_rooms(hotel["room_ids"], night(offset), night(offset + length))
+
+    def test_rebuild(self, hotel):
+        assert self.free(hotel) == hotel["room_ids"][1:]
+
+    def test_committed_bookings_update_matrix(self, client, hotel):
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": hotel["user_id"],
+            "hotel_id": hotel["hotel_id"],
+            "room_id": hotel["room_ids"][1],
+            "check_in_date": night(0).isoformat(),
+            "check_out_date": night(2).isoformat(),
+            "number_of_guests": 1
+        })
+        assert response.status_code == 200, response.text
+        assert self.free(hotel) == hotel["room_ids"][2:]
+
+        assert client.put(f"/api/v1/bookings/{response.json()['id']}/cancel").status_code == 200
+        assert self.free(hotel) == hotel["room_ids"][1:]
+
+    def test_rolled_back_changes_are_ignored(self, db_session, hotel):
+        booking = db_session.query(models.Booking).one()
+        booking.status = BookingStatus.CANCELLED
+        db_session.flush()
+        db_session.rollback()
+
+        assert self.free(hotel) == hotel["room_ids"][1:]
+
+    def test_delete_hotel_forgets_rooms(self, client, hotel):
+        assert client.delete(f"/api/v1/hotels/{hotel['hotel_id']}").status_code == 200
+        assert occupancy_matrix.info()["rooms"] == 0
+
+    def test_search_matches_sql(self, async_db, run, hotel, monkeypatch):
+        service = AvailabilityService(async_db)
+        matrix_rooms = run(service.search_available_rooms(city="Moscow", check_in=night(1), check_out=night(3)))
+
+        monkeypatch.setattr(settings, "OCCUPANCY_MATRIX_ENABLED", False)
+        sql_rooms = run(service.search_available_rooms(city="Moscow", check_in=night(1), check_out=night(3)))
+
+        assert [room.id for room in matrix_rooms] == [room.id for room in sql_rooms] == hotel["room_ids"][1:]
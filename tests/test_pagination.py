@@ -0,0 +1,111 @@
+# tests/test_pagination.py
+import pytest
+
+import app.models.hotels as models
+from app.core.enums import RoomStatus
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+def walk(client, url):
+    """Пройти все страницы по курсору и вернуть список страниц"""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor:
+            assert response.headers["Link"].endswith('; rel="next"')
+            assert f"cursor={cursor}" in response.headers["Link"]
+        url = response.headers["Link"][1:-len('>; rel="next"')] if cursor else None
+    return pages
+
+class TestKeysetPagination:
+    @pytest.fixture
+    def hotels(self, db_session):
+        # Повторяющиеся имена проверяют, что id разрешает равенство поля сортировки
+        hotels = [
+            models.Hotel(name=f"Hotel {index % 4}", address="Main St", city="Moscow", country="Russia")
+            for index in range(11)
+        ]
+        db_session.add_all(hotels)
+        db_session.commit()
+        return [hotel.id for hotel in hotels]
+
+    def test_walks_all_hotels_once(self, client, hotels):
+        pages = walk(client, "/api/v1/hotels/?limit=3")
+
+        assert [len(page) for page in pages] == [3, 3, 3, 2]
+        assert [hotel["id"] for page in pages for hotel in page] == sorted(hotels)
+
+    def test_sort_by_name_descending(self, client, hotels):
+        pages = walk(client, "/api/v1/hotels/?limit=4&sort=name&order=desc")
+        walked = [(hotel["name"], hotel["id"]) for page in pages for hotel in page]
+
+        assert walked == sorted(walked, reverse=True)
+        assert sorted(hotel_id for _, hotel_id in walked) == sorted(hotels)
+
+    def test_last_full_page_has_no_cursor(self, client, hotels):
+        response = client.get("/api/v1/hotels/?limit=11")
+
+        assert len(response.json()) == 11
+        assert NEXT_CURSOR_HEADER not in response.headers
+
+    def test_skip_still_supported(self, client, hotels):
+        response = client.get("/api/v1/hotels/?skip=9&limit=5")
+
+        assert [hotel["id"] for hotel in response.json()] == sorted(hotels)[9:]
+
+    def test_cursor_pages_share_cache_entries(self, client, hotels, db_session):
+        first = client.get("/api/v1/hotels/?limit=5")
+        cursor = first.headers[NEXT_CURSOR_HEADER]
+        assert client.get(f"/api/v1/hotels/?cursor={cursor}&limit=5").status_code == 200
+
+        # Новый отель без инвалидации не виден: страница берется из кэша
+        db_session.add(models.Hotel(name="Hotel 0", address="Main St", city="Moscow", country="Russia"))
+        db_session.commit()
+        again = client.get(f"/api/v1/hotels/?cursor={cursor}&limit=5")
+        assert [hotel["id"] for hotel in again.json()] == sorted(hotels)[5:10]
+
+    def test_invalid_cursor(self, client, hotels):
+        assert client.get("/api/v1/hotels/?cursor=not-a-cursor").status_code == 400
+        # Значение поля не приводится к типу колонки
+        bad_value = encode_cursor("price_per_night", "asc", "cheap", 1)
+        assert client.get(f"/api/v1/rooms/?cursor={bad_value}").status_code == 400
+
+    def test_invalid_sort_field(self, client, hotels):
+        assert client.get("/api/v1/hotels/?sort=description").status_code == 400
+        # Курсор другой выборки тоже не принимается
+        foreign = encode_cursor("email", "asc", "a@example.com", 1)
+        assert client.get(f"/api/v1/hotels/?cursor={foreign}").status_code == 400
+
+    def test_rooms_by_price(self, client, db_session, hotels):
+        db_session.add_all([
+            models.Room(
+                hotel_id=hotels[0],
+                room_number=str(100 + index),
+                floor=1,
+                room_type="Standard",
+                price_per_night=float(50 + index % 3 * 25),
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for index in range(7)
+        ])
+        db_session.commit()
+
+        pages = walk(client, f"/api/v1/rooms/?hotel_id={hotels[0]}&sort=price_per_night&limit=2")
+        walked = [(room["price_per_night"], room["id"]) for page in pages for room in page]
+
+        assert len(walked) == 7
+        assert walked == sorted(walked)
+
+    def test_users(self, client, db_session):
+        db_session.add_all([
+            models.User(email=f"user{index}@example.com", first_name="U", last_name="S", hashed_password="x")
+            for index in range(5)
+        ])
+        db_session.commit()
+
+        pages = walk(client, "/api/v1/users/?limit=2")
+
+        assert [len(page) for page in pages] == [2, 2, 1]
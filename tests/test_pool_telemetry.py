@@ -0,0 +1,119 @@
+# tests/test_pool_telemetry.py
+import logging
+import threading
+import time
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.config import settings
+from app.core.pool_telemetry import TelemetryQueuePool, instrument_pool, pool_info
+from app.core.query_stats import QueryStats, is_pool_bound
+
+HOLD_SECONDS = 0.2
+
+def hold_connection(engine, seconds: float):
+    """Занять единственное соединение пула в другом потоке на seconds"""
+    taken = threading.Event()
+
+    def worker():
+        with engine.connect():
+            taken.set()
+            time.sleep(seconds)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    taken.wait()
+    return thread
+
+class TestPoolTelemetry:
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            connect_args={"check_same_thread": False},
+            poolclass=TelemetryQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=2,
+        )
+        instrument_pool(engine, "test")
+        yield engine
+        engine.dispose()
+
+    def test_snapshot(self, engine):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            snapshot = pool_info()["test"]
+            assert snapshot["checked_out"] == 1
+            assert snapshot["pool_size"] == 1
+
+        snapshot = pool_info()["test"]
+        assert snapshot["checked_out"] == 0
+        assert snapshot["checkouts"] == 1
+        assert snapshot["connects"] == 1
+
+    def test_invalidations(self, engine):
+        with engine.connect() as connection:
+            connection.invalidate()
+
+        assert pool_info()["test"]["invalidations"] == 1
+
+    def test_saturated_wait_and_timeout(self, engine, monkeypatch):
+        thread = hold_connection(engine, HOLD_SECONDS)
+        with engine.connect():
+            pass
+        thread.join()
+
+        snapshot = pool_info()["test"]
+        assert snapshot["saturated_waits"] == 1
+        assert snapshot["max_wait_ms"] >= HOLD_SECONDS * 1000 * 0.5
+
+        engine.pool._timeout = 0.05
+        thread = hold_connection(engine, HOLD_SECONDS)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        thread.join()
+        assert pool_info()["test"]["timeouts"] == 1
+
+    def test_warns_when_exhausted(self, engine, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "DB_POOL_WAIT_WARN_MS", 50)
+        monkeypatch.setattr(settings, "DB_POOL_AUTOTUNE", False)
+
+        thread = hold_connection(engine, HOLD_SECONDS)
+        with caplog.at_level(logging.WARNING, logger="app.core.pool_telemetry"):
+            with engine.connect():
+                pass
+        thread.join()
+
+        assert "Pool test exhausted" in caplog.text
+        assert engine.pool._max_overflow == 0
+
+    def test_autotune_raises_overflow(self, engine, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL_WAIT_WARN_MS", 50)
+        monkeypatch.setattr(settings, "DB_POOL_AUTOTUNE", True)
+        monkeypatch.setattr(settings, "DB_POOL_AUTOTUNE_STEP", 2)
+        monkeypatch.setattr(settings, "DB_POOL_AUTOTUNE_MAX_OVERFLOW", 3)
+
+        thread = hold_connection(engine, HOLD_SECONDS)
+        with engine.connect():
+            pass
+        thread.join()
+        assert engine.pool._max_overflow == 2
+        assert pool_info()["test"]["autotuned"] == 1
+
+        # Пересозданный пул (dispose) сохраняет счетчики и подстроенный размер
+        engine.dispose()
+        assert engine.pool._max_overflow == 2
+        assert pool_info()["test"]["autotuned"] == 1
+
+    def test_pool_bound_request(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL_WAIT_WARN_MS", 100)
+        monkeypatch.setattr(settings, "DB_POOL_WAIT_DOMINANT_RATIO", 0.5)
+        stats = QueryStats()
+
+        stats.pool_wait = 0.3
+        assert is_pool_bound(stats, elapsed=0.4)
+        assert not is_pool_bound(stats, elapsed=2.0)
+
+        stats.pool_wait = 0.05
+        assert not is_pool_bound(stats, elapsed=0.06)
@@ -0,0 +1,102 @@
+# tests/test_query_counts.py
+import pytest
+from datetime import date, datetime, timedelta
+
+import app.models.hotels as models
+from app.main import app
+from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.enums import RoomStatus, BookingStatus, UserRole
+
+HOTELS = 3
+ROOMS_PER_HOTEL = 8
+BOOKINGS = 40
+
+# Бюджет запросов на вызов списка: не зависит от числа строк.
+# N+1 на этих данных превысил бы его в десятки раз. Поиску по городу
+# на SQLite нужен еще запрос к search_trigrams.
+LIST_QUERY_BUDGETS = {
+    "/api/v1/hotels/": 1,
+    "/api/v1/rooms/": 1,
+    "/api/v1/rooms/available?hotel_id={hotel_id}&check_in_date={check_in}&check_out_date={check_out}": 2,
+    "/api/v1/rooms/search/available?city=Moscow&check_in={check_in}T14:00:00&check_out={check_out}T12:00:00": 2,
+    "/api/v1/bookings/": 1,
+    "/api/v1/bookings/user/{user_id}/bookings": 2,
+    "/api/v1/users/": 1,
+}
+
+class TestListQueryBudgets:
+    @pytest.fixture
+    def data(self, db_session):
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        hotels = [
+            models.Hotel(name=f"Hotel {index}", address="Main St", city="Moscow", country="Russia")
+            for index in range(HOTELS)
+        ]
+        db_session.add_all([admin, *hotels])
+        db_session.flush()
+
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=str(100 + index),
+                floor=1,
+                room_type="Standard",
+                price_per_night=100.0,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for hotel in hotels
+            for index in range(ROOMS_PER_HOTEL)
+        ]
+        db_session.add_all(rooms)
+        db_session.flush()
+
+        start = datetime.combine(date.today() + timedelta(days=10), datetime.min.time())
+        db_session.add_all([
+            models.Booking(
+                user_id=admin.id,
+                hotel_id=rooms[index % len(rooms)].hotel_id,
+                room_id=rooms[index % len(rooms)].id,
+                check_in_date=start + timedelta(days=index // len(rooms) * 3),
+                check_out_date=start + timedelta(days=index // len(rooms) * 3 + 2),
+                number_of_guests=1,
+                total_price=200.0,
+                status=BookingStatus.CONFIRMED
+            )
+            for index in range(BOOKINGS)
+        ])
+        db_session.commit()
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {
+            "hotel_id": hotels[0].id,
+            "user_id": admin.id,
+            # Окно поиска после всех броней: списки доступных комнат не пусты
+            "check_in": (start + timedelta(days=30)).date().isoformat(),
+            "check_out": (start + timedelta(days=33)).date().isoformat(),
+        }
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    @pytest.mark.parametrize("url, budget", LIST_QUERY_BUDGETS.items())
+    def test_list_endpoint_within_budget(self, client, query_budget, data, url, budget):
+        response = client.get(url.format(**data))
+
+        assert response.status_code == 200, response.text
+        assert response.json(), "Список пуст - бюджет ничего не проверяет"
+        query_budget(response, statements=budget)
+
+    def test_booking_details_single_query(self, client, query_budget, data, db_session):
+        booking_id = db_session.query(models.Booking.id).first()[0]
+        response = client.get(f"/api/v1/bookings/{booking_id}")
+
+        assert response.status_code == 200, response.text
+        assert response.json()["room"]["id"]
+        query_budget(response, statements=1)
@@ -0,0 +1,94 @@
+# tests/test_query_stats.py
+import logging
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.query_stats import (
+    QueryStats,
+    QueryStatsMiddleware,
+    STATEMENTS_HEADER,
+    DUPLICATES_HEADER,
+    query_metrics,
+    statement_shape,
+)
+
+class TestStatementShape:
+    def test_in_lists_of_any_length_share_shape(self):
+        short = statement_shape("SELECT * FROM rooms WHERE id IN (?, ?)")
+        long = statement_shape("SELECT *\n  FROM rooms WHERE id IN (?,?, ?, ?)")
+
+        assert short == long == "SELECT * FROM rooms WHERE id IN (?...)"
+
+    def test_driver_placeholders(self):
+        assert statement_shape("SELECT * FROM rooms WHERE id = $1::INTEGER") == "SELECT * FROM rooms WHERE id = ?"
+        assert statement_shape("SELECT * FROM rooms WHERE id = %(id_1)s") == "SELECT * FROM rooms WHERE id = ?"
+
+    def test_duplicates(self):
+        stats = QueryStats()
+        for _ in range(4):
+            stats.record("SELECT * FROM hotels WHERE id = ?", 0.001)
+        stats.record("SELECT * FROM rooms", 0.001)
+
+        assert stats.statements == 5
+        assert stats.duplicates == 3
+        assert stats.repeated(threshold=3) == [("SELECT * FROM hotels WHERE id = ?", 4)]
+
+class TestQueryStatsMiddleware:
+    @pytest.fixture
+    def probe(self, test_db, db_session):
+        db_session.add_all([
+            models.Hotel(name=f"Hotel {index}", address="Main St", city="Moscow", country="Russia")
+            for index in range(6)
+        ])
+        db_session.commit()
+
+        probe_app = FastAPI()
+        probe_app.add_middleware(QueryStatsMiddleware)
+
+        @probe_app.get("/n-plus-one")
+        async def n_plus_one():
+            async with test_db.async_session_factory() as db:
+                ids = (await db.execute(select(models.Hotel.id))).scalars().all()
+                for hotel_id in ids:
+                    await db.execute(select(models.Hotel).where(models.Hotel.id == hotel_id))
+            return {"hotels": len(ids)}
+
+        query_metrics.clear()
+        with TestClient(probe_app) as client:
+            yield client
+        query_metrics.clear()
+
+    def test_headers_in_debug(self, probe, monkeypatch):
+        monkeypatch.setattr(settings, "DEBUG", True)
+        response = probe.get("/n-plus-one")
+
+        assert response.headers[STATEMENTS_HEADER] == "7"
+        assert response.headers[DUPLICATES_HEADER] == "5"
+
+    def test_no_headers_without_debug(self, probe, monkeypatch):
+        monkeypatch.setattr(settings, "DEBUG", False)
+        response = probe.get("/n-plus-one")
+
+        assert STATEMENTS_HEADER not in response.headers
+
+    def test_metrics_and_warning(self, probe, caplog):
+        with caplog.at_level(logging.WARNING, logger="app.core.query_stats"):
+            probe.get("/n-plus-one")
+            probe.get("/n-plus-one")
+
+        metrics = query_metrics.info()["GET n_plus_one"]
+        assert metrics["requests"] == 2
+        assert metrics["statements"] == 14
+        assert metrics["max_statements"] == 7
+        assert metrics["n_plus_one_requests"] == 2
+        assert "Possible N+1 in GET n_plus_one: 6 x" in caplog.text
+
+    def test_budget_fixture_catches_n_plus_one(self, probe, query_budget):
+        response = probe.get("/n-plus-one")
+
+        with pytest.raises(AssertionError, match="Бюджет 2 превышен"):
+            query_budget(response, statements=2)
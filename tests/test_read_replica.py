@@ -0,0 +1,116 @@
+# tests/test_read_replica.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import app.models.hotels as models
+from app.main import app
+from app.config import settings
+from app.core.replica import READ_PRIMARY_COOKIE, ReplicaRouter
+from app.database import AsyncSessionLocal, Base, get_db, replica_async_engine, replica_router
+
+def add_user(bind, email: str):
+    with Session(bind) as db:
+        db.add(models.User(email=email, first_name="Test", last_name="User", hashed_password="x"))
+        db.commit()
+
+class TestReadReplica:
+    @pytest.fixture
+    def replica(self, test_db, tmp_path, monkeypatch):
+        """Реплика - второй файл SQLite; "репликация" - запись в оба файла вручную"""
+        path = tmp_path / "replica.db"
+        replica_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=replica_engine)
+        replica_async = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+
+        monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 0)
+        replica_router.configure(test_db.async_session_factory, replica_async)
+        # Сессии выдает сам get_db, а не тестовая подмена
+        app.dependency_overrides.pop(get_db, None)
+
+        add_user(test_db.engine, "primary@example.com")
+        add_user(replica_engine, "replica@example.com")
+
+        yield replica_engine
+
+        replica_router.configure(AsyncSessionLocal, replica_async_engine)
+        replica_engine.dispose()
+
+    def emails(self, client):
+        response = client.get("/api/v1/users/")
+        assert response.status_code == 200, response.text
+        return {user["email"] for user in response.json()}
+
+    def test_get_reads_from_replica(self, client, replica):
+        assert self.emails(client) == {"replica@example.com"}
+        assert replica_router.stats["replica"] == 1
+
+    def test_writes_go_to_primary_and_stick(self, client, test_db, replica):
+        response = client.post("/api/v1/users/register", json={
+            "email": "new@example.com",
+            "first_name": "New",
+            "last_name": "User",
+            "password": "secret123"
+        })
+        assert response.status_code == 200, response.text
+        assert READ_PRIMARY_COOKIE in response.cookies
+
+        # Реплика еще не получила запись, но клиент видит ее сразу
+        assert self.emails(client) == {"primary@example.com", "new@example.com"}
+        assert replica_router.stats["sticky"] == 1
+
+        client.cookies.clear()
+        assert self.emails(client) == {"replica@example.com"}
+
+    def test_failed_write_does_not_stick(self, client, replica):
+        response = client.post("/api/v1/users/register", json={
+            "email": "primary@example.com",
+            "first_name": "Dup",
+            "last_name": "User",
+            "password": "secret123"
+        })
+        assert response.status_code == 400
+        assert READ_PRIMARY_COOKIE not in response.cookies
+
+    def test_lagging_replica_falls_back_to_primary(self, client, replica, monkeypatch):
+        async def lagging(self):
+            return settings.REPLICA_MAX_LAG_SECONDS + 1
+
+        monkeypatch.setattr(ReplicaRouter, "probe_lag", lagging)
+
+        assert self.emails(client) == {"primary@example.com"}
+        assert replica_router.stats["lagging"] == 1
+
+    def test_unavailable_replica_falls_back_to_primary(self, client, replica, monkeypatch):
+        async def broken(self):
+            raise OSError("connection refused")
+
+        monkeypatch.setattr(ReplicaRouter, "probe_lag", broken)
+
+        assert self.emails(client) == {"primary@example.com"}
+        assert replica_router.stats["unavailable"] == 1
+
+    def test_lag_is_cached(self, client, replica, monkeypatch):
+        probes = []
+
+        async def counting(self):
+            probes.append(1)
+            return 0.0
+
+        monkeypatch.setattr(ReplicaRouter, "probe_lag", counting)
+        monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_INTERVAL", 60)
+
+        self.emails(client)
+        self.emails(client)
+        assert len(probes) == 1
+
+    def test_without_replica_everything_reads_primary(self, client, test_db):
+        app.dependency_overrides.pop(get_db, None)
+        replica_router.configure(test_db.async_session_factory)
+        try:
+            add_user(test_db.engine, "primary@example.com")
+            assert self.emails(client) == {"primary@example.com"}
+        finally:
+            replica_router.configure(AsyncSessionLocal, replica_async_engine)
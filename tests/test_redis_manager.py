@@ -0,0 +1,73 @@
+# tests/test_redis_manager.py
+import pytest
+from redis.exceptions import ResponseError
+
+from app.core.redis import RedisManager
+from app.services.cache_service import CacheService
+
+class TestRedisManager:
+    def test_multi_key_helpers(self, run, fake_redis):
+        run(fake_redis.set_many({"a": {"id": 1}, "b": [1, 2]}, expire=60))
+
+        assert run(fake_redis.get_many(["a", "missing", "b"])) == [{"id": 1}, None, [1, 2]]
+        assert 0 < run(fake_redis.redis.ttl("a")) <= 60
+
+        assert run(fake_redis.increment_many(["n", "n", "m"])) == [1, 2, 1]
+        assert run(fake_redis.delete_keys(["a", "b", "missing"])) == 2
+        assert run(fake_redis.get_many(["a", "b"])) == [None, None]
+
+    def test_helpers_without_redis(self, run):
+        manager = RedisManager()
+
+        assert run(manager.get_many(["a", "b"])) == [None, None]
+        assert run(manager.increment_many(["a"])) == [0]
+        assert run(manager.delete_keys(["a"])) == 0
+
+    def test_pipeline_executes_on_exit(self, run, fake_redis):
+        async def queue():
+            async with fake_redis.pipeline() as pipe:
+                pipe.set("a", "1")
+                pipe.incr("counter")
+
+        run(queue())
+
+        assert run(fake_redis.redis.get("a")) == "1"
+        assert run(fake_redis.redis.get("counter")) == "1"
+
+    def test_pipeline_errors_propagate(self, run, fake_redis):
+        run(fake_redis.redis.set("text", "not a number"))
+
+        async def on_exit():
+            async with fake_redis.pipeline() as pipe:
+                pipe.incr("text")
+
+        async def explicit():
+            async with fake_redis.pipeline() as pipe:
+                pipe.incr("text")
+                await pipe.execute()
+
+        with pytest.raises(ResponseError):
+            run(on_exit())
+        with pytest.raises(ResponseError):
+            run(explicit())
+
+class TestBookingStats:
+    def test_track_and_read_stats(self, run, fake_redis):
+        service = CacheService()
+        service.redis_manager = fake_redis
+
+        run(service.track_booking_stats(1, 101))
+        run(service.track_booking_stats(1, 102))
+
+        stats = run(service.get_booking_stats())
+        assert stats["total_bookings"] == 2
+        assert sorted(stats["popular_rooms"]) == ["101", "102"]
+        assert stats["popular_hotels"] == ["1"]
+        assert run(fake_redis.redis.get("stats:hotel:1:bookings")) == "2"
+
+    def test_stats_without_redis(self, run):
+        service = CacheService()
+        service.redis_manager = RedisManager()
+
+        run(service.track_booking_stats(1, 101))
+        assert run(service.get_booking_stats()) == {"total_bookings": 0, "popular_rooms": [], "popular_hotels": []}
@@ -0,0 +1,109 @@
+# tests/test_repository.py
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+import app.models.hotels as models
+from app.core.enums import BookingStatus, RoomStatus
+from app.core.query_stats import compiled_cache_stats
+from app.services.repository import Repository
+
+CHECK_IN = datetime(2030, 5, 10, 14)
+
+class TestRepository:
+    @pytest.fixture
+    def data(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        user = models.User(email="user@example.com", first_name="Test", last_name="User", hashed_password="x")
+        db_session.add_all([hotel, user])
+        db_session.flush()
+        room = models.Room(
+            hotel_id=hotel.id,
+            room_number="101",
+            floor=1,
+            room_type="Standard",
+            price_per_night=100.0,
+            capacity=2,
+            status=RoomStatus.AVAILABLE
+        )
+        db_session.add(room)
+        db_session.flush()
+        booking = models.Booking(
+            user_id=user.id,
+            hotel_id=hotel.id,
+            room_id=room.id,
+            check_in_date=CHECK_IN,
+            check_out_date=CHECK_IN + timedelta(days=2),
+            number_of_guests=1,
+            total_price=200.0,
+            status=BookingStatus.CONFIRMED
+        )
+        db_session.add(booking)
+        db_session.commit()
+        return {"hotel_id": hotel.id, "user_id": user.id, "room_id": room.id, "booking_id": booking.id}
+
+    @pytest.fixture
+    def statements(self, test_db):
+        executed = []
+
+        def count(conn, cursor, statement, parameters, context, executemany):
+            executed.append(statement)
+
+        event.listen(test_db.async_engine.sync_engine, "before_cursor_execute", count)
+        yield executed
+        event.remove(test_db.async_engine.sync_engine, "before_cursor_execute", count)
+
+    def test_primary_key_lookups(self, async_db, run, data):
+        repository = Repository(async_db)
+
+        assert run(repository.get_hotel(data["hotel_id"])).name == "Grand Hotel"
+        assert run(repository.get_user(data["user_id"])).email == "user@example.com"
+        assert run(repository.get_user_by_token("user@example.com", data["user_id"])) is not None
+        assert run(repository.get_user_by_token("other@example.com", data["user_id"])) is None
+        assert run(repository.get_hotel(data["hotel_id"] + 100)) is None
+
+        room = run(repository.get_room(data["room_id"], with_hotel=True))
+        assert room.hotel.name == "Grand Hotel"
+
+        booking = run(repository.get_booking(data["booking_id"], with_details=True))
+        assert (booking.user.id, booking.hotel.id, booking.room.id) == (
+            data["user_id"], data["hotel_id"], data["room_id"]
+        )
+
+    def test_identity_map_hit_skips_query(self, async_db, run, data, statements):
+        repository = Repository(async_db)
+        hotel = run(repository.get_hotel(data["hotel_id"]))
+        assert len(statements) == 1
+
+        assert run(repository.get_hotel(data["hotel_id"])) is hotel
+        assert len(statements) == 1
+
+        # Комната без загруженного отеля не подходит для with_hotel=True
+        run(repository.get_room(data["room_id"]))
+        room = run(repository.get_room(data["room_id"], with_hotel=True))
+        assert room.hotel is hotel
+        assert len(statements) > 2
+
+    def test_booking_overlaps(self, async_db, run, data):
+        repository = Repository(async_db)
+        room_id = data["room_id"]
+
+        assert run(repository.booking_overlaps(room_id, CHECK_IN + timedelta(days=1), CHECK_IN + timedelta(days=3)))
+        assert not run(repository.booking_overlaps(room_id, CHECK_IN + timedelta(days=2), CHECK_IN + timedelta(days=4)))
+        assert not run(repository.booking_overlaps(
+            room_id, CHECK_IN, CHECK_IN + timedelta(days=1), exclude_booking_id=data["booking_id"]
+        ))
+
+    def test_compiled_cache_hits(self, async_db, run, data):
+        repository = Repository(async_db)
+        run(repository.get_user(data["user_id"]))
+        before = compiled_cache_stats.info()["primary"]
+
+        for _ in range(3):
+            async_db.expunge_all()
+            run(repository.get_user(data["user_id"]))
+            run(repository.booking_overlaps(data["room_id"], CHECK_IN, CHECK_IN + timedelta(days=1)))
+
+        after = compiled_cache_stats.info()["primary"]
+        assert after["hits"] - before["hits"] >= 5
+        assert after["size"] > 0
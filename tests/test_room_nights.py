@@ -0,0 +1,148 @@
+# tests/test_room_nights.py
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, text
+
+import app.models.hotels as models
+from app.main import app
+from app.core.dependencies import require_admin, require_user_or_admin
+from app.core.enums import RoomStatus, UserRole
+from app.services.availability_service import AvailabilityService
+from app.services.room_nights import booking_nights, check_room_nights, rebuild_room_nights
+
+CHECK_IN = datetime.combine(date.today() + timedelta(days=20), datetime.min.time()) + timedelta(hours=14)
+
+def nights(db_session, booking_id=None):
+    query = select(models.RoomNight.night).order_by(models.RoomNight.night)
+    if booking_id is not None:
+        query = query.where(models.RoomNight.booking_id == booking_id)
+    db_session.expire_all()
+    return db_session.execute(query).scalars().all()
+
+def days(offset: int, count: int):
+    return [CHECK_IN.date() + timedelta(days=offset + index) for index in range(count)]
+
+class TestBookingNights:
+    def test_nights_between_check_in_and_check_out(self):
+        assert booking_nights(CHECK_IN, CHECK_IN + timedelta(days=2, hours=-2)) == days(0, 2)
+
+    def test_same_day_stay_takes_a_night(self):
+        assert booking_nights(CHECK_IN, CHECK_IN + timedelta(hours=3)) == days(0, 1)
+
+class TestRoomNightInventory:
+    @pytest.fixture
+    def room(self, db_session):
+        hotel = models.Hotel(name="Grand Hotel", address="Main St", city="Moscow", country="Russia")
+        admin = models.User(
+            email="admin@example.com",
+            first_name="Admin",
+            last_name="User",
+            hashed_password="x",
+            role=UserRole.ADMIN
+        )
+        db_session.add_all([hotel, admin])
+        db_session.flush()
+
+        rooms = [
+            models.Room(
+                hotel_id=hotel.id,
+                room_number=number,
+                floor=1,
+                room_type="Standard",
+                price_per_night=100.0,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            )
+            for number in ("101", "102")
+        ]
+        db_session.add_all(rooms)
+        db_session.commit()
+
+        app.dependency_overrides[require_admin] = lambda: admin
+        app.dependency_overrides[require_user_or_admin] = lambda: admin
+        yield {"hotel_id": hotel.id, "room_id": rooms[0].id, "other_room_id": rooms[1].id, "user_id": admin.id}
+        app.dependency_overrides.pop(require_admin, None)
+        app.dependency_overrides.pop(require_user_or_admin, None)
+
+    def book(self, client, room, offset=0, length=2):
+        response = client.post("/api/v1/bookings/", json={
+            "user_id": room["user_id"],
+            "hotel_id": room["hotel_id"],
+            "room_id": room["room_id"],
+            "check_in_date": (CHECK_IN + timedelta(days=offset)).isoformat(),
+            "check_out_date": (CHECK_IN + timedelta(days=offset + length, hours=-2)).isoformat(),
+            "number_of_guests": 1
+        })
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+
+    def test_booking_transitions(self, client, db_session, room):
+        booking_id = self.book(client, room)
+        assert nights(db_session, booking_id) == days(0, 2)
+
+        response = client.put(f"/api/v1/bookings/{booking_id}", json={
+            "check_out_date": (CHECK_IN + timedelta(days=3)).isoformat()
+        })
+        assert response.status_code == 200, response.text
+        assert nights(db_session, booking_id) == days(0, 3)
+
+        assert client.put(f"/api/v1/bookings/{booking_id}/check-in").status_code == 200
+        assert nights(db_session, booking_id) == days(0, 3)
+
+        assert client.put(f"/api/v1/bookings/{booking_id}/check-out").status_code == 200
+        assert nights(db_session, booking_id) == []
+
+    def test_cancel_and_delete(self, client, db_session, room):
+        cancelled = self.book(client, room)
+        assert client.put(f"/api/v1/bookings/{cancelled}/cancel").status_code == 200
+        assert nights(db_session, cancelled) == []
+
+        deleted = self.book(client, room, offset=5)
+        assert client.delete(f"/api/v1/bookings/{deleted}").status_code == 200
+        assert nights(db_session) == []
+
+    def test_delete_room_and_hotel(self, client, db_session, room):
+        self.book(client, room)
+        assert client.delete(f"/api/v1/rooms/{room['room_id']}").status_code == 200
+        assert nights(db_session) == []
+
+        room["room_id"] = room["other_room_id"]
+        self.book(client, room)
+        assert client.delete(f"/api/v1/hotels/{room['hotel_id']}").status_code == 200
+        assert nights(db_session) == []
+
+    def test_availability_uses_nights(self, client, db_session, async_db, run, room):
+        self.book(client, room, offset=1, length=2)
+        # Бронирование помечает комнату занятой - здесь важны только даты
+        db_session.query(models.Room).filter_by(id=room["room_id"]).update({models.Room.status: RoomStatus.AVAILABLE})
+        db_session.commit()
+        service = AvailabilityService(async_db)
+
+        free = run(service.get_available_rooms(room["hotel_id"], CHECK_IN, CHECK_IN + timedelta(days=2)))
+        assert [r.id for r in free] == [room["other_room_id"]]
+
+        # Выезд в день заезда следующего гостя не пересекается
+        free = run(service.get_available_rooms(room["hotel_id"], CHECK_IN + timedelta(days=3), CHECK_IN + timedelta(days=5)))
+        assert {r.id for r in free} == {room["room_id"], room["other_room_id"]}
+
+    def test_check_and_rebuild(self, client, test_db, db_session, room):
+        booking_id = self.book(client, room)
+        db_session.execute(text("DELETE FROM room_nights WHERE night = :night"), {"night": CHECK_IN.date()})
+        db_session.add(models.RoomNight(room_id=room["other_room_id"], night=CHECK_IN.date(), booking_id=booking_id))
+        db_session.commit()
+
+        with test_db.engine.begin() as connection:
+            assert check_room_nights(connection) == {"expected": 2, "actual": 2, "missing": 1, "extra": 1}
+            assert rebuild_room_nights(connection) == 2
+            assert check_room_nights(connection)["missing"] == 0
+
+        assert nights(db_session, booking_id) == days(0, 2)
+
+    def test_anti_join_uses_primary_key(self, db_session, room):
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT rooms.id FROM rooms WHERE NOT EXISTS ("
+            "SELECT 1 FROM room_nights WHERE room_nights.room_id = rooms.id "
+            "AND room_nights.night >= '2030-01-01' AND room_nights.night < '2030-01-03')"
+        )).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "SEARCH room_nights USING" in details and "INDEX" in details
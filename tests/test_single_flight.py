@@ -0,0 +1,151 @@
+# tests/test_single_flight.py
+import asyncio
+import pytest
+from types import SimpleNamespace
+
+from app.config import settings
+from app.core.redis import RedisManager
+from app.services.cache_service import CacheService, unwrap_entry, wrap_entry
+from app.services.local_cache import local_cache
+from app.services.single_flight import SingleFlight
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_computation(self, run):
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"rooms": 3}
+
+        async def burst():
+            return await asyncio.gather(*(flight.do("rooms_search:1", compute) for _ in range(20)))
+
+        results = run(burst())
+
+        assert len(calls) == 1
+        assert results == [{"rooms": 3}] * 20
+        assert flight.info() == {"in_flight": 0, "leaders": 1, "followers": 19}
+
+    def test_error_is_shared(self, run):
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            raise ValueError("db is down")
+
+        async def burst():
+            return await asyncio.gather(*(flight.do("key", compute) for _ in range(3)), return_exceptions=True)
+
+        results = run(burst())
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(flight) == 0
+
+    def test_cancelled_leader_hands_over(self, run):
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        async def scenario():
+            leader = asyncio.create_task(flight.do("key", compute))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.do("key", compute))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert run(scenario()) == 2
+
+# Вместо сессии: compute в этих тестах к БД не обращается
+NO_DB = SimpleNamespace(bind=None)
+
+class TestCacheSingleFlight:
+    def setup_method(self):
+        local_cache.clear()
+
+    def service(self, manager):
+        service = CacheService()
+        service.redis_manager = manager
+        return service
+
+    def test_get_or_compute_without_redis(self, run):
+        service = self.service(RedisManager())
+        calls = []
+
+        async def compute(session):
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [{"id": 1}]
+
+        async def burst():
+            return await asyncio.gather(*(
+                service.get_or_compute("rooms_search:hotel_id:1", compute, family="rooms_search", db=NO_DB) for _ in range(10)
+            ))
+
+        assert run(burst()) == [[{"id": 1}]] * 10
+        assert len(calls) == 1
+
+    def test_result_is_cached_in_redis(self, run, fake_redis):
+        pytest.importorskip("lupa")
+        service = self.service(fake_redis)
+
+        async def compute(session):
+            return []
+
+        # Пустая выборка - тоже значение, а не промах
+        assert run(service.get_or_compute("rooms_search:hotel_id:1", compute, family="rooms_search", db=NO_DB, tags=["hotel:1"])) == []
+        assert unwrap_entry(run(fake_redis.get_key("rooms_search:hotel_id:1"))) == []
+        assert run(fake_redis.redis.smembers("tag:hotel:1")) == {"rooms_search:hotel_id:1"}
+        assert not run(fake_redis.exists("lock:rooms_search:hotel_id:1"))
+
+    def test_waits_for_other_worker(self, run, fake_redis, monkeypatch):
+        pytest.importorskip("lupa")
+        monkeypatch.setattr(settings, "SINGLE_FLIGHT_POLL_INTERVAL", 0.01)
+        service = self.service(fake_redis)
+        key = "rooms_search:hotel_id:1"
+
+        async def compute(session):
+            raise AssertionError("значение вычисляет другой воркер")
+
+        async def other_worker():
+            _, lock = await fake_redis.try_lock(f"lock:{key}", 5)
+            await asyncio.sleep(0.05)
+            await fake_redis.set_key(key, wrap_entry([{"id": 7}], 60, 0.01))
+            await fake_redis.release_lock(lock)
+
+        async def scenario():
+            worker = asyncio.create_task(other_worker())
+            await asyncio.sleep(0.01)
+            value = await service.get_or_compute(key, compute, family="rooms_search", db=NO_DB)
+            await worker
+            return value
+
+        assert run(scenario()) == [{"id": 7}]
+
+    def test_computes_when_other_worker_gives_up(self, run, fake_redis, monkeypatch):
+        pytest.importorskip("lupa")
+        monkeypatch.setattr(settings, "SINGLE_FLIGHT_POLL_INTERVAL", 0.01)
+        service = self.service(fake_redis)
+        key = "rooms_search:hotel_id:1"
+
+        async def compute(session):
+            return [{"id": 1}]
+
+        async def failed_worker():
+            _, lock = await fake_redis.try_lock(f"lock:{key}", 5)
+            await asyncio.sleep(0.03)
+            await fake_redis.release_lock(lock)
+
+        async def scenario():
+            worker = asyncio.create_task(failed_worker())
+            await asyncio.sleep(0.01)
+            value = await service.get_or_compute(key, compute, family="rooms_search", db=NO_DB)
+            await worker
+            return value
+
+        assert run(scenario()) == [{"id": 1}]
@@ -0,0 +1,93 @@
+# tests/test_stale_while_revalidate.py
+import pytest
+from types import SimpleNamespace
+
+import app.services.cache_service as cache_module
+from app.config import settings
+from app.core.redis import RedisManager
+from app.services.cache_service import CacheService, drain_refreshes, entry_state, swr_stats, wrap_entry
+from app.services.local_cache import local_cache
+
+KEY = "rooms_search:hotel_id:1"
+
+class TestEntryState:
+    def test_soft_expiry(self):
+        entry = wrap_entry([], soft_ttl=60, delta=0.0)
+
+        assert entry_state(entry) == "fresh"
+        assert entry_state(entry, now=entry["soft_expires_at"]) == "stale"
+
+    def test_xfetch_refreshes_early_for_expensive_entries(self, monkeypatch):
+        # rand -> 1 - e^-1: -ln(1 - rand) = 1, ранний пересчет за delta * beta до мягкого TTL
+        monkeypatch.setattr(cache_module.random, "random", lambda: 1 - 0.36787944117144233)
+        entry = wrap_entry([], soft_ttl=60, delta=2.0)
+        soft = entry["soft_expires_at"]
+
+        assert entry_state(entry, now=soft - 3) == "fresh"
+        assert entry_state(entry, now=soft - 1) == "early"
+
+        monkeypatch.setattr(settings, "CACHE_XFETCH_BETA", 0.0)
+        assert entry_state(entry, now=soft - 1) == "fresh"
+
+    def test_legacy_values_are_fresh(self):
+        assert entry_state([{"id": 1}]) == "fresh"
+
+class TestStaleWhileRevalidate:
+    def setup_method(self):
+        local_cache.clear()
+
+    def service(self):
+        service = CacheService()
+        service.redis_manager = RedisManager()
+        return service
+
+    def test_stale_served_while_refreshing(self, run):
+        service = self.service()
+        local_cache.set(KEY, wrap_entry(["old"], soft_ttl=-1, delta=0.0))
+        refreshes_before = swr_stats["refreshes"]
+
+        async def compute(session):
+            return ["new"]
+
+        db = SimpleNamespace(bind=None)
+        assert run(service.get_or_compute(KEY, compute, family="rooms_search", db=db, local=True)) == ["old"]
+        run(drain_refreshes())
+
+        assert swr_stats["refreshes"] == refreshes_before + 1
+        assert run(service.get_or_compute(KEY, compute, family="rooms_search", db=db, local=True)) == ["new"]
+
+    def test_failed_refresh_keeps_stale_value(self, run):
+        service = self.service()
+        local_cache.set(KEY, wrap_entry(["old"], soft_ttl=-1, delta=0.0))
+        errors_before = swr_stats["refresh_errors"]
+
+        async def compute(session):
+            raise RuntimeError("db is down")
+
+        db = SimpleNamespace(bind=None)
+        assert run(service.get_or_compute(KEY, compute, family="rooms_search", db=db, local=True)) == ["old"]
+        run(drain_refreshes())
+
+        assert swr_stats["refresh_errors"] == errors_before + 1
+        assert local_cache.get(KEY)[1]["value"] == ["old"]
+
+    def test_refresh_uses_own_session(self, run, async_db):
+        service = self.service()
+        local_cache.set(KEY, wrap_entry(["old"], soft_ttl=-1, delta=0.0))
+        sessions = []
+
+        async def compute(session):
+            sessions.append(session)
+            return ["new"]
+
+        run(service.get_or_compute(KEY, compute, family="rooms_search", db=async_db, local=True))
+        run(drain_refreshes())
+
+        assert len(sessions) == 1
+        assert sessions[0] is not async_db
+        assert sessions[0].bind is async_db.bind
+
+    @pytest.mark.parametrize("family", ["hotels", "rooms", "rooms_search", "user_bookings"])
+    def test_families_are_configured(self, family):
+        soft_ttl, hard_ttl = cache_module.cache_ttls(family)
+        assert 0 < soft_ttl <= hard_ttl
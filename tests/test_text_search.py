@@ -0,0 +1,97 @@
+# tests/test_text_search.py
+import pytest
+from sqlalchemy import text
+
+import app.models.hotels as models
+from app.config import settings
+from app.core.enums import RoomStatus
+from app.services.text_search import (
+    TextSearch, rebuild_search_index, similarity, substring_trigrams, trigrams
+)
+
+CITIES = [("Moscow", "Russia"), ("Saint Petersburg", "Russia"), ("New York", "USA"), ("Nizhny Novgorod", "Russia")]
+
+class TestTrigrams:
+    def test_padded_like_pg_trgm(self):
+        assert trigrams("Cat") == {"  c", " ca", "cat", "at "}
+        assert trigrams("New-York") == trigrams("new york")
+
+    def test_substring_trigrams(self):
+        assert substring_trigrams("Mosc") == {"mos", "osc"}
+        assert substring_trigrams("NY") == set()
+
+    def test_similarity(self):
+        assert similarity(trigrams("Moscow"), trigrams("Moscow")) == 1.0
+        assert similarity(trigrams("Moskow"), trigrams("Moscow")) >= settings.SEARCH_SIMILARITY_THRESHOLD
+        assert similarity(trigrams("Kazan"), trigrams("Moscow")) == 0.0
+
+class TestTextSearch:
+    @pytest.fixture
+    def hotels(self, db_session):
+        for index, (city, country) in enumerate(CITIES):
+            hotel = models.Hotel(name=f"Hotel {index}", address="Main St", city=city, country=country)
+            db_session.add(hotel)
+            db_session.flush()
+            db_session.add(models.Room(
+                hotel_id=hotel.id,
+                room_number="101",
+                floor=1,
+                room_type="Deluxe Suite" if index % 2 else "Standard",
+                price_per_night=100.0,
+                capacity=2,
+                status=RoomStatus.AVAILABLE
+            ))
+        db_session.commit()
+
+    def values(self, async_db, run, field, needle):
+        return sorted(run(TextSearch(async_db).matching_values(field, needle)))
+
+    def test_substring(self, async_db, run, hotels):
+        assert self.values(async_db, run, "city", "peters") == ["Saint Petersburg"]
+        assert self.values(async_db, run, "city", "YORK") == ["New York"]
+        assert self.values(async_db, run, "room_type", "suite") == ["Deluxe Suite"]
+
+    def test_fuzzy(self, async_db, run, hotels):
+        assert self.values(async_db, run, "city", "Moskow") == ["Moscow"]
+        assert self.values(async_db, run, "city", "Kazan") == []
+
+    def test_short_needle_scans_values(self, async_db, run, hotels):
+        assert self.values(async_db, run, "country", "us") == ["Russia", "USA"]
+        assert self.values(async_db, run, "city", "in") == ["Saint Petersburg"]
+
+    def test_orm_changes_are_indexed(self, db_session, async_db, run, hotels):
+        hotel = db_session.query(models.Hotel).filter_by(city="Moscow").one()
+        hotel.city = "Kazan"
+        db_session.commit()
+
+        assert self.values(async_db, run, "city", "kaz") == ["Kazan"]
+
+    def test_rebuild_prunes_stale_values(self, test_db, db_session, async_db, run, hotels):
+        db_session.query(models.Hotel).filter_by(city="Moscow").update({models.Hotel.city: "Omsk"})
+        db_session.commit()
+        # Массовое обновление в обход ORM - индекс устарел до перестроения
+        assert self.values(async_db, run, "city", "omsk") == []
+
+        with test_db.engine.begin() as connection:
+            rebuild_search_index(connection)
+
+        assert self.values(async_db, run, "city", "omsk") == ["Omsk"]
+        assert self.values(async_db, run, "city", "mosc") == []
+
+    def test_lookup_uses_index(self, db_session, hotels):
+        plan = db_session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT value FROM search_trigrams "
+            "WHERE field = 'city' AND trigram IN ('mos', 'osc') GROUP BY value"
+        )).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "USING" in details and "INDEX" in details
+        assert "SCAN search_trigrams" not in details
+
+    def test_search_endpoint(self, client, hotels):
+        response = client.get("/api/v1/rooms/search/available", params={"city": "moskow"})
+        assert response.status_code == 200, response.text
+        assert [room["hotel"]["city"] for room in response.json()] == ["Moscow"]
+
+        response = client.get("/api/v1/rooms/search/available", params={"room_type": "suite", "country": "rus"})
+        assert response.status_code == 200, response.text
+        assert {room["hotel"]["city"] for room in response.json()} == {"Saint Petersburg", "Nizhny Novgorod"}